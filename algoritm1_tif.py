@@ -4,9 +4,15 @@ import numpy as np
 import heapq
 import os
 import json
+import time
 import argparse
 from pathlib import Path
 from rasterio.warp import transform_bounds, transform
+from rasterio.windows import Window
+from functools import lru_cache
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
+from pyproj import CRS, Transformer
 
 if sys.platform.startswith('win'):
     sys.stdout.reconfigure(encoding='utf-8')
@@ -15,14 +21,29 @@ if sys.platform.startswith('win'):
 # --- CONFIGURARE ---
 INPUT_FILE = "MATRICE_SCOR_FINAL.tif"
 OUTPUT_JSON_FILE = "rezultate_baze_gps.json"
-
-def primele100ElementeMaxime(mat):
-    """Găsește cele mai mari 100 de valori din matricea dată."""
+# Sub atâția pixeli de crescut în total (semințe x patrate) creșterea secvențială
+# e mai rapidă decât copierea ferestrei în memoria partajată și distribuirea pe procese
+PRAG_PIXELI_PARALEL = 100_000
+# Optimizare: pool-ul de regiuni candidate are de atâtea ori mai multe semințe decât bazele cerute
+FACTOR_POOL_OPTIMIZARE = 8
+MARIME_MINIMA_POOL = 64
+# Modul streaming: memoria de lucru țintă și cât ocupă un pixel al blocului curent
+# (int8 citit + măști + indicii int64 ai pixelilor pozitivi)
+MEMORIE_STREAMING_MB = 256
+OCTETI_PE_PIXEL_STREAMING = 16
+
+def primeleKElementeMaxime(mat, k, exclusi=None):
+    """
+    Găsește cele mai mari k valori pozitive din matricea dată, sortate descrescător.
+    'exclusi' (mască booleană aplatizată) marchează pixelii deja returnați anterior.
+    """
     matrice_aplatizata = mat.ravel()
-    k = min(100, len(matrice_aplatizata))
+    k = min(k, len(matrice_aplatizata))
     if k == 0: return []
     
     indici_maximi = np.argpartition(-matrice_aplatizata, k-1)[:k]
+    if exclusi is not None:
+        indici_maximi = indici_maximi[~exclusi[indici_maximi]]
     maxime = matrice_aplatizata[indici_maximi]
     coordonate = np.unravel_index(indici_maximi, mat.shape)
     
@@ -34,50 +55,194 @@ def primele100ElementeMaxime(mat):
     elemente_maxime.sort(key=lambda x: x[0], reverse=True)
     return elemente_maxime
 
-def selectareCuRespectareDistanta(baze, patrate, elemente_maxime):
-    selectate = []
-    distanta_minima = int(np.sqrt(patrate)) + 2 
+def primele100ElementeMaxime(mat):
+    """Găsește cele mai mari 100 de valori din matricea dată."""
+    return primeleKElementeMaxime(mat, 100)
+
+def loturiCandidati(mat, lot_initial=100, factor_crestere=4):
+    """
+    Generator de loturi de candidați (val, r, c), fiecare sortat descrescător.
+    Primul lot este exact primele100ElementeMaxime; dacă mai e nevoie, restul
+    pixelilor pozitivi sunt ordonați o singură dată și livrați în loturi tot mai mari.
+    """
+    matrice_aplatizata = mat.ravel()
+    nr_pozitive = int(np.count_nonzero(matrice_aplatizata > 0))
+    if nr_pozitive == 0:
+        return
+
+    primul_lot = primeleKElementeMaxime(mat, lot_initial)
+    yield primul_lot
+    if lot_initial >= nr_pozitive:
+        return
+
+    # Sortare stabilă: pentru int8 numpy folosește radix sort (O(n)), deci costă cât un argpartition
+    ordine = np.argsort(-matrice_aplatizata, kind="stable")[:nr_pozitive]
+    livrati = np.zeros(matrice_aplatizata.size, dtype=bool)
+    livrati[np.ravel_multi_index(
+        (np.array([e[1] for e in primul_lot], dtype=np.intp),
+         np.array([e[2] for e in primul_lot], dtype=np.intp)), mat.shape)] = True
+    ordine = ordine[~livrati[ordine]]
+
+    start, marime = 0, lot_initial * factor_crestere
+    while start < len(ordine):
+        indici = ordine[start:start + marime]
+        rows, cols = np.unravel_index(indici, mat.shape)
+        yield list(zip(matrice_aplatizata[indici], rows, cols))
+        start += marime
+        marime *= factor_crestere
+
+class GrilaDistanta:
+    """
+    Hash spațial pentru verificarea distanței minime dintre semințe: celulele au
+    latura 'distanta', deci un conflict poate apărea doar în cele 3x3 celule vecine.
+    """
+
+    def __init__(self, distanta, distanta_col=None):
+        # 'distanta_col' diferit de 'distanta' pentru dreptunghiuri (linii x coloane)
+        self.distanta = distanta
+        self.distanta_col = distanta if distanta_col is None else distanta_col
+        self.celule = {}
+
+    def liber(self, i, j):
+        di, dj = self.distanta, self.distanta_col
+        gi, gj = i // di, j // dj
+        for ci in (gi - 1, gi, gi + 1):
+            for cj in (gj - 1, gj, gj + 1):
+                for si, sj in self.celule.get((ci, cj), ()):
+                    if abs(i - si) < di and abs(j - sj) < dj:
+                        return False
+        return True
+
+    def adauga(self, i, j):
+        self.celule.setdefault((i // self.distanta, j // self.distanta_col), []).append((i, j))
+
+def selectareCuRespectareDistanta(baze, patrate, elemente_maxime, grila=None, selectate=None):
+    """
+    Alege, în ordinea scorului, candidații aflați la distanță de cei deja aleși.
+    'grila' și 'selectate' permit continuarea selecției peste mai multe loturi.
+    """
+    if selectate is None:
+        selectate = []
+    if grila is None:
+        grila = GrilaDistanta(int(np.sqrt(patrate)) + 2)
 
     for val, i, j in elemente_maxime:
-        bagam = True
-        for _, si, sj in selectate:
-            if abs(i - si) < distanta_minima and abs(j - sj) < distanta_minima:
-                bagam = False
-                break
-        if bagam:
+        if len(selectate) >= baze:
+            break
+        if grila.liber(i, j):
+            grila.adauga(i, j)
             selectate.append((val, i, j))
-            if len(selectate) == baze:
-                break
     return selectate
 
-def generareOConfiguratie(element_curent, patrate, mat):
-    scor_start, start_i, start_j = element_curent
-    linii, coloane = mat.shape
+def selecteazaSeminte(mat, baze, patrate, timpi=None, distanta=None):
+    """
+    Selecția semințelor: cere loturi tot mai mari de candidați până găsește 'baze'
+    semințe bine distanțate sau până se epuizează zona (ex: platouri întinse).
+    'distanta' înlocuiește distanța minimă implicită sqrt(patrate) + 2.
+    """
+    if timpi is None:
+        timpi = {}
+    timpi.setdefault("maxime", 0.0)
+    timpi.setdefault("selectie", 0.0)
+
+    if distanta is None:
+        distanta = int(np.sqrt(patrate)) + 2
+    grila = GrilaDistanta(distanta)
+    selectate = []
+    loturi = loturiCandidati(mat)
 
-    max_heap = [(-int(mat[start_i, start_j]), start_i, start_j)]
-    vizitate = set([(start_i, start_j)])
-    configuratie = []
+    while len(selectate) < baze:
+        t = time.perf_counter()
+        lot = next(loturi, None)
+        timpi["maxime"] += time.perf_counter() - t
+        if lot is None:
+            break
 
-    while len(configuratie) < patrate and max_heap:
-        val_neg, r, c = heapq.heappop(max_heap)
-        val = -val_neg
-        
-        if val <= 0: continue
-            
-        configuratie.append((val, r, c))
+        t = time.perf_counter()
+        selectareCuRespectareDistanta(baze, patrate, lot, grila, selectate)
+        timpi["selectie"] += time.perf_counter() - t
 
-        for dr, dc in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-            nr, nc = r + dr, c + dc
-            if 0 <= nr < linii and 0 <= nc < coloane and (nr, nc) not in vizitate:
-                vizitate.add((nr, nc))
-                heapq.heappush(max_heap, (-int(mat[nr, nc]), nr, nc))
+    return selectate
 
-    return configuratie
+class ZonaCrestere:
+    """
+    Structurile pentru creșterea regiunilor, alocate o singură dată per fereastră:
+    matricea bordată cu o ramă de -1 și aplatizată, plus harta celulelor vizitate
+    (rama e marcată vizitată, deci vecinii nu mai au nevoie de verificări de limite).
+    """
 
-def generareConfiguratii(selectate, patrate, mat, baze):
+    def __init__(self, mat, deja_bordata=False):
+        # 'deja_bordata': 'mat' are deja rama de -1 (ex: fereastra din memoria partajată), nu o copiem
+        bordata = mat if deja_bordata else np.pad(mat, 1, constant_values=-1)
+        linii = bordata.shape[0] - 2
+        self.latime = bordata.shape[1]
+        self.valori = memoryview(np.ascontiguousarray(bordata).ravel())
+        self.n = len(self.valori)
+        self.val_max = max(int(bordata.max()), 0)
+
+        self.vizitate = bytearray(self.n)
+        self.vizitate[:self.latime] = b"\x01" * self.latime
+        self.vizitate[-self.latime:] = b"\x01" * self.latime
+        self.vizitate[::self.latime] = b"\x01" * (linii + 2)
+        self.vizitate[self.latime - 1::self.latime] = b"\x01" * (linii + 2)
+
+    def configuratie(self, start_i, start_j, patrate):
+        """
+        Crește regiunea din (start_i, start_j) mereu spre vecinul cu scorul cel mai mare.
+        Coada conține chei întregi (val_max - val) * n + index, deci ordinea este cea a
+        tuplurilor (-val, r, c) din implementarea inițială.
+        """
+        valori, vizitate, n, w, val_max = self.valori, self.vizitate, self.n, self.latime, self.val_max
+        heappush, heappop = heapq.heappush, heapq.heappop
+
+        start = (start_i + 1) * w + start_j + 1
+        if vizitate[start]:
+            return []  # sămânța e într-o regiune deja ocupată (vezi 'ocupa')
+        coada = [(val_max - valori[start]) * n + start]
+        vizitate[start] = 1
+        atinse = [start]
+        configuratie = []
+
+        while len(configuratie) < patrate and coada:
+            cheie = heappop(coada)
+            val = val_max - cheie // n
+            if val <= 0: continue
+
+            p = cheie % n
+            configuratie.append((val, p // w - 1, p % w - 1))
+
+            for q in (p - w, p - 1, p + 1, p + w):
+                if not vizitate[q]:
+                    vizitate[q] = 1
+                    atinse.append(q)
+                    heappush(coada, (val_max - valori[q]) * n + q)
+
+        # Resetăm doar celulele atinse: harta se refolosește pentru următoarea sămânță
+        for q in atinse:
+            vizitate[q] = 0
+        return configuratie
+
+    def ocupa(self, configuratie):
+        """Marchează celulele ca vizitate permanent: regiunile crescute ulterior le ocolesc."""
+        w = self.latime
+        for _, r, c in configuratie:
+            self.vizitate[(r + 1) * w + c + 1] = 1
+
+    def suprapusa(self, configuratie):
+        """True dacă vreo celulă a configurației a fost ocupată între timp."""
+        w, vizitate = self.latime, self.vizitate
+        return any(vizitate[(r + 1) * w + c + 1] for _, r, c in configuratie)
+
+def generareOConfiguratie(element_curent, patrate, mat, zona=None):
+    if zona is None:
+        zona = ZonaCrestere(mat)
+    _, start_i, start_j = element_curent
+    return zona.configuratie(int(start_i), int(start_j), patrate)
+
+def clasareConfiguratii(configuratii, patrate, baze):
+    """Păstrează configurațiile complete și le ordonează după scorul total (stabil, în ordinea semințelor)."""
     toate_configuratiile = []
-    for element in selectate:
-        configuratie = generareOConfiguratie(element, patrate, mat)
+    for configuratie in configuratii:
         if len(configuratie) == patrate:
             suma_totala = sum(celula[0] for celula in configuratie)
             toate_configuratiile.append((suma_totala, configuratie))
@@ -85,6 +250,390 @@ def generareConfiguratii(selectate, patrate, mat, baze):
     toate_configuratiile.sort(key=lambda x: x[0], reverse=True)
     return toate_configuratiile[:baze]
 
+def generareConfiguratii(selectate, patrate, mat, baze):
+    zona = ZonaCrestere(mat)
+    configuratii = [generareOConfiguratie(element, patrate, mat, zona) for element in selectate]
+    return clasareConfiguratii(configuratii, patrate, baze)
+
+def _ataseazaMemorie(nume):
+    try:
+        # Python 3.13+: worker-ul doar citește, nu trebuie urmărit de resource_tracker
+        return shared_memory.SharedMemory(name=nume, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=nume)
+
+def _crestereSeminte(nume_shm, forma, dtype, seminte, patrate):
+    """
+    Rulează în procesele worker: crește un grup de semințe [(k, i, j)] pe fereastra
+    bordată din memoria partajată. Returnează [(k, array N x 3 cu (val, r, c))].
+    """
+    shm = _ataseazaMemorie(nume_shm)
+    fereastra = np.ndarray(forma, dtype=dtype, buffer=shm.buf)
+    zona = None
+    try:
+        zona = ZonaCrestere(fereastra, deja_bordata=True)
+        rezultate = [(k, np.array(zona.configuratie(i, j, patrate), dtype=np.int64).reshape(-1, 3))
+                     for k, i, j in seminte]
+    finally:
+        # Vederile peste shm.buf trebuie eliberate înainte de close (altfel BufferError ascunde eroarea)
+        if zona is not None:
+            zona.valori.release()
+        del fereastra, zona
+        shm.close()
+    return rezultate
+
+def generareConfiguratiiParalel(selectate, patrate, mat, baze, executor, nr_grupuri=None):
+    """
+    Varianta paralelă a lui generareConfiguratii: fereastra (bordată) este copiată o
+    singură dată în memoria partajată, iar semințele sunt împărțite pe procesele din
+    'executor'. Rezultatul este identic cu varianta secvențială.
+    """
+    configuratii = crestereParalela(selectate, patrate, mat, executor, nr_grupuri)
+    return clasareConfiguratii(configuratii, patrate, baze)
+
+def crestereParalela(selectate, patrate, mat, executor, nr_grupuri=None):
+    """Configurația fiecărei semințe (în ordinea semințelor), crescute pe procesele din 'executor'."""
+    linii, coloane = mat.shape
+    nr_grupuri = min(len(selectate), nr_grupuri or os.cpu_count() or 1)
+
+    shm = shared_memory.SharedMemory(create=True, size=max((linii + 2) * (coloane + 2) * mat.itemsize, 1))
+    try:
+        bordata = np.ndarray((linii + 2, coloane + 2), dtype=mat.dtype, buffer=shm.buf)
+        bordata[...] = -1
+        bordata[1:-1, 1:-1] = mat
+        del bordata
+
+        seminte = [(k, int(e[1]), int(e[2])) for k, e in enumerate(selectate)]
+        futures = [executor.submit(_crestereSeminte, shm.name, (linii + 2, coloane + 2), mat.dtype.str,
+                                   seminte[g::nr_grupuri], patrate)
+                   for g in range(nr_grupuri)]
+
+        configuratii = [None] * len(selectate)
+        for future in futures:
+            for k, celule in future.result():
+                configuratii[k] = list(map(tuple, celule.tolist()))
+    finally:
+        shm.close()
+        shm.unlink()
+
+    return configuratii
+
+# --- OPTIMIZARE (configurații care nu se suprapun) ---
+def semintePool(mat, baze, patrate, timpi=None):
+    """
+    Pool-ul de semințe pentru optimizare: de FACTOR_POOL_OPTIMIZARE ori mai multe decât
+    bazele cerute și la jumătate din distanța obișnuită, ca o sămânță mai slabă aflată
+    lângă una puternică să-și poată crește totuși regiunea.
+    """
+    marime = max(baze * FACTOR_POOL_OPTIMIZARE, MARIME_MINIMA_POOL)
+    return selecteazaSeminte(mat, marime, patrate, timpi, distanta=int(np.sqrt(patrate)) // 2 + 1)
+
+def optimizareConfiguratii(selectate, patrate, mat, baze, executor=None, timpi=None):
+    """
+    Alege până la 'baze' configurații care nu se suprapun, cu scor total cât mai mare
+    (greedy leneș): regiunile pool-ului intră într-o coadă după scor; la extragere, o
+    regiune care se suprapune cu cele deja alese este crescută din nou din sămânța ei,
+    ocolind celulele ocupate (harta de vizitate a ZonaCrestere), și pusă înapoi cu noul
+    scor. O regiune fără suprapuneri e încă exactă, deci se acceptă direct.
+    """
+    if timpi is None:
+        timpi = {}
+
+    t = time.perf_counter()
+    if executor is not None and len(selectate) > 1 and len(selectate) * patrate >= PRAG_PIXELI_PARALEL:
+        configuratii = crestereParalela(selectate, patrate, mat, executor)
+    else:
+        zona_pool = ZonaCrestere(mat)
+        configuratii = [generareOConfiguratie(e, patrate, mat, zona_pool) for e in selectate]
+    timpi["pool"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    coada = [(-sum(celula[0] for celula in conf), k, conf)
+             for k, conf in enumerate(configuratii) if len(conf) == patrate]
+    heapq.heapify(coada)
+
+    zona = ZonaCrestere(mat)
+    alese, reevaluari = [], 0
+    while coada and len(alese) < baze:
+        scor_neg, k, configuratie = heapq.heappop(coada)
+        if not zona.suprapusa(configuratie):
+            zona.ocupa(configuratie)
+            alese.append((-scor_neg, configuratie))
+            continue
+
+        reevaluari += 1
+        _, i, j = selectate[k]
+        configuratie = zona.configuratie(int(i), int(j), patrate)
+        if len(configuratie) == patrate:
+            heapq.heappush(coada, (-sum(celula[0] for celula in configuratie), k, configuratie))
+    timpi["optimizare"] = time.perf_counter() - t
+
+    print(f"Optimizare: pool de {len(configuratii)} regiuni, {reevaluari} reevaluări, {len(alese)} alese")
+    return alese
+
+def crestereLocala(src, window, r, c, patrate, banda=1):
+    """
+    Crește regiunea semințe (r, c) citind din raster doar o vecinătate a ei din fereastră.
+    Dacă regiunea atinge o margine a vecinătății care nu e și marginea ferestrei,
+    vecinătatea se dublează: rezultatul este identic cu creșterea pe toată fereastra.
+    Returnează (configuratie relativ la fereastră, pixeli cititi).
+    """
+    raza = 2 * int(np.sqrt(patrate)) + 2
+    pixeli_cititi = 0
+    while True:
+        r0, c0 = max(r - raza, 0), max(c - raza, 0)
+        r1, c1 = min(r + raza + 1, window.height), min(c + raza + 1, window.width)
+        mat = src.read(banda, window=Window(window.col_off + c0, window.row_off + r0, c1 - c0, r1 - r0))
+        pixeli_cititi += mat.size
+
+        configuratie = ZonaCrestere(mat).configuratie(r - r0, c - c0, patrate)
+        atinge_marginea = any(
+            (i == 0 and r0 > 0) or (i == mat.shape[0] - 1 and r1 < window.height) or
+            (j == 0 and c0 > 0) or (j == mat.shape[1] - 1 and c1 < window.width)
+            for _, i, j in configuratie)
+        if not atinge_marginea:
+            return [(val, i + r0, j + c0) for val, i, j in configuratie], pixeli_cititi
+        raza *= 2
+
+def baze_din_seminte_locale(src, window, selectate, patrate, nr_baze, timpi, banda=1):
+    """
+    Crește semințele deja alese citind doar vecinătatea fiecăreia (crestereLocala) și
+    construiește JSON-ul. Folosit de modurile care nu țin toată fereastra în memorie.
+    Returnează (lista_baze, pixeli_cititi).
+    """
+    t = time.perf_counter()
+    configuratii, pixeli_cititi = [], 0
+    for _, r, c in selectate:
+        configuratie, pixeli = crestereLocala(src, window, r, c, patrate, banda)
+        configuratii.append(configuratie)
+        pixeli_cititi += pixeli
+    configuratii = clasareConfiguratii(configuratii, patrate, nr_baze)
+    timpi["configuratii"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    rezultat_final = structurarePentruJSON(configuratii, src, window.row_off, window.col_off)
+    timpi["gps"] = time.perf_counter() - t
+
+    return rezultat_final, pixeli_cititi
+
+# --- MOD STREAMING (zone foarte mari, memorie limitată) ---
+def fereastraInRaster(src, window):
+    """Partea ferestrei aflată în raster (ca la citirea din cauta_baze)."""
+    try:
+        return window.intersection(Window(0, 0, src.width, src.height))
+    except Exception:
+        raise ValueError("Zona selectată este în afara hărții.")
+
+def _primeleKOrdonate(valori, indici, k):
+    """Primele k perechi (valoare, index) după valoare descrescătoare, apoi index crescător."""
+    if valori.size > k:
+        prag = np.partition(valori, valori.size - k)[valori.size - k]
+        pastrate = valori >= prag
+        valori, indici = valori[pastrate], indici[pastrate]
+    ordine = np.lexsort((indici, -valori.astype(np.int16)))[:k]
+    return valori[ordine], indici[ordine]
+
+def blocuriFereastra(window, latura):
+    """Blocurile de latura x latura ale ferestrei: (Window absolut, row, col relativ la fereastră)."""
+    for r in range(0, window.height, latura):
+        for c in range(0, window.width, latura):
+            yield (Window(window.col_off + c, window.row_off + r,
+                          min(latura, window.width - c), min(latura, window.height - r)), r, c)
+
+def candidatiStreaming(src, window, k, latura, banda=1):
+    """
+    Primii k pixeli pozitivi ai ferestrei, citită bloc cu bloc: după fiecare bloc
+    păstrăm doar topul global curent. Returnează (valori, indici aplatizați în
+    fereastră, număr total de pixeli pozitivi).
+    """
+    valori = np.zeros(0, dtype=np.int8)
+    indici = np.zeros(0, dtype=np.int64)
+    nr_pozitive = 0
+    for bloc, r, c in blocuriFereastra(window, latura):
+        mat = src.read(banda, window=bloc).ravel()
+        pozitive = np.flatnonzero(mat > 0)
+        nr_pozitive += pozitive.size
+
+        # Reducem întâi în interiorul blocului, ca temporarele să rămână mici
+        valori_bloc, pozitive = _primeleKOrdonate(mat[pozitive].astype(np.int8), pozitive, k)
+        indici_bloc = (pozitive // bloc.width + r) * window.width + (pozitive % bloc.width + c)
+        valori, indici = _primeleKOrdonate(np.concatenate([valori, valori_bloc]),
+                                           np.concatenate([indici, indici_bloc]), k)
+    return valori, indici, nr_pozitive
+
+def cauta_baze_streaming(src, window, patrate, nr_baze, timpi=None, memorie_mb=MEMORIE_STREAMING_MB, banda=1):
+    """
+    Căutare cu memorie limitată (independentă de mărimea zonei): fereastra este parcursă
+    pe blocuri dimensionate după 'memorie_mb', semințele vin dintr-un top global al
+    pixelilor, iar regiunile cresc citind doar vecinătatea fiecărei semințe.
+    Dacă topul nu ajunge pentru 'nr_baze' semințe distanțate, fereastra se reparcurge
+    cu un top mai mare. Returnează (lista_baze, pixeli_cititi).
+    """
+    if timpi is None:
+        timpi = {}
+    timpi.setdefault("maxime", 0.0)
+    timpi.setdefault("selectie", 0.0)
+
+    window = fereastraInRaster(src, window)
+    octeti = memorie_mb * 1024 * 1024
+    latura = max(int(np.sqrt(octeti / OCTETI_PE_PIXEL_STREAMING)), 256)
+    k_max = max(octeti // (4 * OCTETI_PE_PIXEL_STREAMING), 100)
+    print(f"Streaming: zonă {window.width}x{window.height}, blocuri de {latura}x{latura} pixeli")
+
+    k, pixeli_cititi = min(max(100, 4 * nr_baze), k_max), 0
+    while True:
+        t = time.perf_counter()
+        valori, indici, nr_pozitive = candidatiStreaming(src, window, k, latura, banda)
+        pixeli_cititi += window.width * window.height
+        timpi["maxime"] += time.perf_counter() - t
+        if nr_pozitive == 0:
+            print("Zona este goală sau neconstruibilă (doar 0 sau -1).")
+            return [], pixeli_cititi
+
+        t = time.perf_counter()
+        candidati = list(zip(valori.tolist(), (indici // window.width).tolist(), (indici % window.width).tolist()))
+        selectate = selectareCuRespectareDistanta(nr_baze, patrate, candidati)
+        timpi["selectie"] += time.perf_counter() - t
+
+        if len(selectate) >= nr_baze or k >= nr_pozitive or k >= k_max:
+            break
+        k = min(k * 8, k_max)
+
+    baze, pixeli = baze_din_seminte_locale(src, window, selectate, patrate, nr_baze, timpi, banda)
+    return baze, pixeli_cititi + pixeli
+
+# --- MOD AMPRENTĂ FIXĂ (baze dreptunghiulare) ---
+def dimensiuniAmprenta(src, inaltime, latime, unitate="pixeli"):
+    """Transformă dimensiunile amprentei (pixeli sau metri) în (linii, coloane) de pixeli."""
+    if unitate == "metri":
+        if src.crs is None or src.crs.is_geographic:
+            raise ValueError("Dimensiunile în metri cer un raster într-un CRS proiectat.")
+        res_x, res_y = src.res
+        inaltime, latime = inaltime / res_y, latime / res_x
+    elif unitate != "pixeli":
+        raise ValueError(f"Unitate necunoscută: {unitate}")
+
+    linii, coloane = max(1, int(round(inaltime))), max(1, int(round(latime)))
+    return linii, coloane
+
+def imagineIntegrala(mat, dtype=np.int64):
+    """Tabelul de sume cumulate, cu o linie și o coloană de zerouri în față."""
+    integrala = np.zeros((mat.shape[0] + 1, mat.shape[1] + 1), dtype=dtype)
+    np.cumsum(mat, axis=0, dtype=dtype, out=integrala[1:, 1:])
+    np.cumsum(integrala[1:, 1:], axis=1, out=integrala[1:, 1:])
+    return integrala
+
+def sumeDreptunghiuri(integrala, linii, coloane):
+    """Suma fiecărui dreptunghi linii x coloane, indexată după colțul stânga-sus (O(1) per poziție)."""
+    return (integrala[linii:, coloane:] - integrala[:-linii, coloane:]
+            - integrala[linii:, :-coloane] + integrala[:-linii, :-coloane])
+
+def scoruriAmprenta(mat, linii, coloane):
+    """
+    Scorul fiecărei poziții posibile a unui dreptunghi linii x coloane în fereastră.
+    Pozițiile care ating o celulă negativă (-1 = neconstruibil) primesc -1.
+    """
+    if linii > mat.shape[0] or coloane > mat.shape[1]:
+        return np.full((max(mat.shape[0] - linii + 1, 0), max(mat.shape[1] - coloane + 1, 0)), -1, dtype=np.int64)
+
+    scoruri = sumeDreptunghiuri(imagineIntegrala(np.maximum(mat, 0)), linii, coloane)
+    interzise = sumeDreptunghiuri(imagineIntegrala(mat < 0, dtype=np.int32), linii, coloane)
+    scoruri[interzise > 0] = -1
+    return scoruri
+
+def selectareAmprente(scoruri, linii, coloane, baze, lot_initial=100, factor_crestere=4):
+    """
+    Alege greedy, în ordinea scorului, cele mai bune 'baze' poziții care nu se suprapun.
+    Candidații vin în loturi; după fiecare lot pozițiile care se suprapun cu bazele
+    alese sunt eliminate din matrice, deci niciun candidat nu este evaluat de două ori.
+    La scor egal câștigă poziția aflată prima în ordinea rasterului.
+    """
+    scoruri = scoruri.copy()
+    plat = scoruri.ravel()
+    grila = GrilaDistanta(linii, coloane)
+    selectate = []
+    lot = lot_initial
+
+    ramase = np.flatnonzero(plat > 0)
+
+    while len(selectate) < baze:
+        valori = plat[ramase]
+        pastrate = valori > 0
+        ramase, valori = ramase[pastrate], valori[pastrate]
+        if ramase.size == 0:
+            break
+
+        # Tot ce e >= al k-lea scor (inclusiv egalitățile), la egalitate în ordinea rasterului
+        k = min(lot, ramase.size)
+        prag = np.partition(valori, ramase.size - k)[ramase.size - k]
+        in_lot = valori >= prag
+        indici, valori = ramase[in_lot], valori[in_lot]
+        ordine = np.argsort(-valori, kind="stable")
+        indici, valori = indici[ordine], valori[ordine]
+        rows, cols = np.unravel_index(indici, scoruri.shape)
+
+        noi = []
+        for val, r, c in zip(valori.tolist(), rows.tolist(), cols.tolist()):
+            if len(selectate) >= baze:
+                break
+            if grila.liber(r, c):
+                grila.adauga(r, c)
+                selectate.append((val, r, c))
+                noi.append((r, c))
+
+        # Orice poziție la mai puțin de linii/coloane de o bază aleasă s-ar suprapune cu ea
+        for r, c in noi:
+            scoruri[max(r - linii + 1, 0):r + linii, max(c - coloane + 1, 0):c + coloane] = -1
+        lot *= factor_crestere
+
+    return selectate
+
+def configuratiiDinAmprente(amprente, linii, coloane, mat):
+    """Celulele fiecărei amprente, în formatul lui generareConfiguratii: (suma, [(val, r, c)])."""
+    rr, cc = np.mgrid[0:linii, 0:coloane]
+    rr, cc = rr.ravel(), cc.ravel()
+
+    configuratii = []
+    for suma, r, c in amprente:
+        rows, cols = (rr + r).tolist(), (cc + c).tolist()
+        valori = mat[r:r + linii, c:c + coloane].ravel().tolist()
+        configuratii.append((int(suma), list(zip(valori, rows, cols))))
+    return configuratii
+
+def amprente_din_matrice(mat_local, src, row_off, col_off, linii, coloane, nr_baze, timpi=None):
+    """
+    Varianta cu amprentă fixă a lui baze_din_matrice: cele mai bune 'nr_baze'
+    dreptunghiuri linii x coloane care nu se suprapun, în aceeași structură JSON.
+    """
+    if timpi is None:
+        timpi = {}
+
+    if mat_local.size == 0 or np.max(mat_local) <= 0:
+        print("Zona este goală sau neconstruibilă (doar 0 sau -1).")
+        return []
+
+    t = time.perf_counter()
+    scoruri = scoruriAmprenta(mat_local, linii, coloane)
+    timpi["amprente"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    amprente = selectareAmprente(scoruri, linii, coloane, nr_baze)
+    timpi["selectie_amprente"] = time.perf_counter() - t
+
+    if not amprente:
+        print(f"Nu încape niciun dreptunghi {linii}x{coloane} construibil în zonă.")
+        return []
+
+    t = time.perf_counter()
+    configuratii = configuratiiDinAmprente(amprente, linii, coloane, mat_local)
+    timpi["configuratii"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    rezultat_final = structurarePentruJSON(configuratii, src, row_off, col_off)
+    timpi["gps"] = time.perf_counter() - t
+
+    return rezultat_final
+
 def pixel_to_gps(src, row, col):
     """Transformă indecșii matricii (Row, Col) în coordonate GPS (Lat, Lon)."""
     # 1. Obținem coordonatele native ale hărții (UTM)
@@ -96,6 +645,27 @@ def pixel_to_gps(src, row, col):
     
     return lat[0], lon[0]
 
+@lru_cache(maxsize=8)
+def _transformer_gps(crs_wkt):
+    """Transformer pyproj (CRS raster -> WGS84), creat o singură dată per CRS."""
+    return Transformer.from_crs(CRS.from_wkt(crs_wkt), "EPSG:4326", always_xy=True)
+
+def pixeli_to_gps(src, rows, cols):
+    """
+    Varianta vectorizată a pixel_to_gps: transformă toți pixelii (Row, Col) într-un
+    singur apel. Returnează două array-uri (lat, lon).
+    """
+    rows = np.asarray(rows, dtype=np.float64)
+    cols = np.asarray(cols, dtype=np.float64)
+
+    # Centrul pixelului, ca src.xy(row, col)
+    t = src.transform
+    x = t.a * (cols + 0.5) + t.b * (rows + 0.5) + t.c
+    y = t.d * (cols + 0.5) + t.e * (rows + 0.5) + t.f
+
+    lon, lat = _transformer_gps(src.crs.to_wkt()).transform(x, y)
+    return np.asarray(lat), np.asarray(lon)
+
 def structurarePentruJSON(configuratii, src, offset_row, offset_col):
     """
     Construiește JSON-ul final convertind pixelii înapoi în Lat/Lon.
@@ -107,25 +677,27 @@ def structurarePentruJSON(configuratii, src, offset_row, offset_col):
     start, end = 30, 230
     pas_variatie = (end - start) / max(baze, 1)
 
+    # Convertim toate celulele tuturor configurațiilor într-un singur apel
+    toate_celulele = [celula for _, configuratie in configuratii for celula in configuratie]
+    rows = np.fromiter((r for _, r, _ in toate_celulele), dtype=np.int64, count=len(toate_celulele)) + offset_row
+    cols = np.fromiter((c for _, _, c in toate_celulele), dtype=np.int64, count=len(toate_celulele)) + offset_col
+    lat_toate, lon_toate = pixeli_to_gps(src, rows, cols)
+    lat_toate, lon_toate = lat_toate.tolist(), lon_toate.tolist()
+
+    idx = 0
     for k, (suma, configuratie) in enumerate(configuratii):
         valoare_gb = int(min(255, round(start + k * pas_variatie)))
         gb_hex = f"{valoare_gb:02X}"
         culoare_hex = f"#FF{gb_hex}{gb_hex}"
 
         lista_celule = []
-        for scor, r_local, c_local in configuratie:
-            # Calculăm indexul global
-            r_global = r_local + offset_row
-            c_global = c_local + offset_col
-            
-            # Convertim în GPS
-            lat, lon = pixel_to_gps(src, r_global, c_global)
-            
+        for scor, _, _ in configuratie:
             lista_celule.append({
-                "lat": round(lat, 6),
-                "lon": round(lon, 6),
+                "lat": round(lat_toate[idx], 6),
+                "lon": round(lon_toate[idx], 6),
                 "scor": int(scor)
             })
+            idx += 1
 
         baza_structurata = {
             "id": k + 1,
@@ -137,10 +709,10 @@ def structurarePentruJSON(configuratii, src, offset_row, offset_col):
 
     return rezultat
 
-def afisare_si_salvare_rezultate(rezultate_json):
+def afisare_si_salvare_rezultate(rezultate_json, output_json=OUTPUT_JSON_FILE):
     if not rezultate_json:
         print("❌ Nu au fost găsite baze valide.")
-        with open(OUTPUT_JSON_FILE, "w") as f: json.dump([], f)
+        with open(output_json, "w") as f: json.dump([], f)
         return
 
     print("\n" + "="*80)
@@ -155,13 +727,122 @@ def afisare_si_salvare_rezultate(rezultate_json):
         print(f"{baza['id']:<4} | {baza['scor_total']:<6} | {start_str:<25} | {len(baza['celule'])}")
 
     try:
-        with open(OUTPUT_JSON_FILE, "w") as f:
+        with open(output_json, "w") as f:
             json.dump(rezultate_json, f, indent=4)
-        print(f"\n✅ JSON salvat: '{OUTPUT_JSON_FILE}'")
+        print(f"\n✅ JSON salvat: '{output_json}'")
     except Exception as e:
         print(f"❌ Eroare salvare JSON: {e}")
 
-def algoritm_baze_gps(lat1, lon1, lat2, lon2, patrate, nr_baze):
+def fereastra_din_gps(src, lat1, lon1, lat2, lon2):
+    """Transformă BBox-ul GPS (Lat/Lon) în fereastra de pixeli (rotunjită) a rasterului."""
+    south, north = min(lat1, lat2), max(lat1, lat2)
+    west, east = min(lon1, lon2), max(lon1, lon2)
+
+    try:
+        # Lat/Lon -> UTM
+        left, bottom, right, top = transform_bounds("EPSG:4326", src.crs, west, south, east, north)
+
+        # UTM -> Pixeli (Window)
+        window = rasterio.windows.from_bounds(left, bottom, right, top, transform=src.transform)
+
+        # Rotunjim și convertim la int
+        window = window.round_offsets().round_lengths()
+        return rasterio.windows.Window(int(window.col_off), int(window.row_off),
+                                       int(window.width), int(window.height))
+
+    except Exception as e:
+        raise ValueError(f"Eroare conversie coordonate: {e}")
+
+def banda_profil(src, profil=None):
+    """
+    Banda rasterului de scor pentru profilul cerut (scor_final.py scrie o bandă per profil,
+    cu numele în eticheta PROFILURI). Fără profil: banda 1, profilul implicit.
+    """
+    if not profil:
+        return 1
+    profiluri = [p for p in src.tags().get("PROFILURI", "").split(",") if p]
+    if profil not in profiluri:
+        disponibile = ", ".join(profiluri) if profiluri else "doar profilul implicit"
+        raise ValueError(f"Profil de scor necunoscut: '{profil}' (disponibile: {disponibile})")
+    return profiluri.index(profil) + 1
+
+def cauta_baze(src, lat1, lon1, lat2, lon2, patrate, nr_baze, timpi=None, window=None, amprenta=None,
+               executor=None, optimizare=False, banda=1):
+    """
+    Rulează căutarea pe un dataset deja deschis și returnează lista de baze
+    (structura JSON). Dacă 'timpi' este un dict, se completează cu durata
+    fiecărei etape (secunde). 'window' poate fi dat dacă a fost deja calculat.
+    'amprenta' = (linii, coloane) activează modul cu dreptunghiuri fixe ('patrate' e ignorat).
+    'executor' (ProcessPoolExecutor) permite creșterea semințelor în paralel pe zone mari.
+    'optimizare' alege bazele dintr-un pool mai mare de regiuni, fără suprapuneri.
+    'banda' = banda profilului de scor (banda_profil).
+    """
+    if timpi is None:
+        timpi = {}
+
+    # 1. Transformăm BBox-ul GPS (Lat/Lon) în Indecși Matrice (Row/Col)
+    if window is None:
+        window = fereastra_din_gps(src, lat1, lon1, lat2, lon2)
+    col_off, row_off = window.col_off, window.row_off
+    width, height = window.width, window.height
+
+    # 2. Citim datele
+    print(f"Analizez o zonă de {width}x{height} pixeli...")
+
+    t = time.perf_counter()
+    try:
+        mat_local = src.read(banda, window=window)
+    except Exception:
+        raise ValueError("Zona selectată este în afara hărții.")
+    timpi["citire"] = time.perf_counter() - t
+
+    if amprenta is not None:
+        return amprente_din_matrice(mat_local, src, row_off, col_off, amprenta[0], amprenta[1], nr_baze, timpi)
+    return baze_din_matrice(mat_local, src, row_off, col_off, patrate, nr_baze, timpi, executor, optimizare)
+
+def baze_din_matrice(mat_local, src, row_off, col_off, patrate, nr_baze, timpi=None, executor=None,
+                     optimizare=False):
+    """
+    Rulează algoritmul pe o matrice deja citită. (row_off, col_off) este poziția
+    matricii în raster, folosită la conversia înapoi în GPS. Cu 'optimizare', bazele
+    vin din optimizareConfiguratii (pool mai mare, fără suprapuneri).
+    """
+    if timpi is None:
+        timpi = {}
+
+    if mat_local.size == 0 or np.max(mat_local) <= 0:
+        print("Zona este goală sau neconstruibilă (doar 0 sau -1).")
+        return []
+
+    # 3. Rulăm Algoritmul
+    if optimizare:
+        selectate = semintePool(mat_local, nr_baze, patrate, timpi)
+    else:
+        selectate = selecteazaSeminte(mat_local, nr_baze, patrate, timpi)
+
+    if not selectate:
+        print("Nu s-au găsit puncte valide.")
+        return []
+
+    t = time.perf_counter()
+    if optimizare:
+        configuratii = optimizareConfiguratii(selectate, patrate, mat_local, nr_baze, executor, timpi)
+    elif executor is not None and len(selectate) > 1 and len(selectate) * patrate >= PRAG_PIXELI_PARALEL:
+        configuratii = generareConfiguratiiParalel(selectate, patrate, mat_local, nr_baze, executor)
+    else:
+        configuratii = generareConfiguratii(selectate, patrate, mat_local, nr_baze)
+    timpi["configuratii"] = time.perf_counter() - t
+
+    # 4. Generăm rezultatul cu conversie inversă (Pixel -> GPS)
+    # Pasăm 'src' și offset-urile ferestrei pentru a putea calcula coordonatele globale
+    t = time.perf_counter()
+    rezultat_final = structurarePentruJSON(configuratii, src, row_off, col_off)
+    timpi["gps"] = time.perf_counter() - t
+
+    return rezultat_final
+
+def algoritm_baze_gps(lat1, lon1, lat2, lon2, patrate, nr_baze, output_json=OUTPUT_JSON_FILE,
+                      dreptunghi=None, unitate="pixeli", procese=1, streaming_mb=None, optimizare=False, profil=None):
     if not Path(INPUT_FILE).exists():
         print(f"EROARE: Fișierul '{INPUT_FILE}' lipsește.")
         return
@@ -169,56 +850,28 @@ def algoritm_baze_gps(lat1, lon1, lat2, lon2, patrate, nr_baze):
     print(f"--- Căutare Baze în zona: {lat1}, {lon1} <-> {lat2}, {lon2} ---")
 
     with rasterio.open(INPUT_FILE) as src:
-        # 1. Transformăm BBox-ul GPS (Lat/Lon) în Indecși Matrice (Row/Col)
-        south, north = min(lat1, lat2), max(lat1, lat2)
-        west, east = min(lon1, lon2), max(lon1, lon2)
-        
-        try:
-            # Lat/Lon -> UTM
-            left, bottom, right, top = transform_bounds("EPSG:4326", src.crs, west, south, east, north)
-            
-            # UTM -> Pixeli (Window)
-            window = rasterio.windows.from_bounds(left, bottom, right, top, transform=src.transform)
-            
-            # Rotunjim și convertim la int
-            window = window.round_offsets().round_lengths()
-            col_off, row_off = int(window.col_off), int(window.row_off)
-            width, height = int(window.width), int(window.height)
-            
-        except Exception as e:
-            print(f"Eroare conversie coordonate: {e}")
-            return
-
-        # 2. Citim datele
-        print(f"Analizez o zonă de {width}x{height} pixeli...")
-        
         try:
-            mat_local = src.read(1, window=window)
-        except Exception:
-            print("Zona selectată este în afara hărții.")
-            return
-
-        if mat_local.size == 0 or np.max(mat_local) <= 0:
-            print("Zona este goală sau neconstruibilă (doar 0 sau -1).")
-            afisare_si_salvare_rezultate([])
+            banda = banda_profil(src, profil)
+            amprenta = None
+            if dreptunghi is not None:
+                amprenta = dimensiuniAmprenta(src, dreptunghi[0], dreptunghi[1], unitate)
+                print(f"Mod amprentă fixă: {amprenta[0]}x{amprenta[1]} pixeli")
+            if streaming_mb:
+                window = fereastra_din_gps(src, lat1, lon1, lat2, lon2)
+                rezultat_final, _ = cauta_baze_streaming(src, window, patrate, nr_baze, memorie_mb=streaming_mb,
+                                                         banda=banda)
+            elif procese > 1:
+                with ProcessPoolExecutor(max_workers=procese) as executor:
+                    rezultat_final = cauta_baze(src, lat1, lon1, lat2, lon2, patrate, nr_baze, amprenta=amprenta,
+                                                executor=executor, optimizare=optimizare, banda=banda)
+            else:
+                rezultat_final = cauta_baze(src, lat1, lon1, lat2, lon2, patrate, nr_baze, amprenta=amprenta,
+                                            optimizare=optimizare, banda=banda)
+        except ValueError as e:
+            print(e)
             return
 
-        # 3. Rulăm Algoritmul
-        elemente_maxime = primele100ElementeMaxime(mat_local)
-        
-        if not elemente_maxime:
-            print("Nu s-au găsit puncte valide.")
-            afisare_si_salvare_rezultate([])
-            return
-
-        selectate = selectareCuRespectareDistanta(nr_baze, patrate, elemente_maxime)
-        configuratii = generareConfiguratii(selectate, patrate, mat_local, nr_baze)
-        
-        # 4. Generăm rezultatul cu conversie inversă (Pixel -> GPS)
-        # Pasăm 'src' și offset-urile ferestrei pentru a putea calcula coordonatele globale
-        rezultat_final = structurarePentruJSON(configuratii, src, row_off, col_off)
-
-        afisare_si_salvare_rezultate(rezultat_final)
+        afisare_si_salvare_rezultate(rezultat_final, output_json)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Găsește baze militare folosind coordonate GPS.")
@@ -229,7 +882,20 @@ if __name__ == "__main__":
     parser.add_argument("lon2", type=float, help="Longitudine punct 2")
     parser.add_argument("pixeli_baze", type=int, help="Mărimea bazei (nr pixeli)")
     parser.add_argument("nr_baze", type=int, help="Numărul de baze")
+    parser.add_argument("--output", default=OUTPUT_JSON_FILE, help="Fișierul JSON generat")
+    parser.add_argument("--dreptunghi", type=float, nargs=2, metavar=("INALTIME", "LATIME"),
+                        help="Baze dreptunghiulare de dimensiune fixă (ignoră pixeli_baze)")
+    parser.add_argument("--metri", action="store_true", help="Dimensiunile --dreptunghi sunt în metri")
+    parser.add_argument("--procese", type=int, default=1, help="Procese pentru creșterea semințelor în paralel")
+    parser.add_argument("--streaming", type=int, nargs="?", const=MEMORIE_STREAMING_MB, metavar="MB",
+                        help="Zone foarte mari: parcurge zona pe blocuri cu memorie limitată (implicit 256 MB)")
+    parser.add_argument("--optimizare", action="store_true",
+                        help="Alege bazele dintr-un pool mai mare de regiuni, fără suprapuneri")
+    parser.add_argument("--profil", help="Profilul de scor (banda din MATRICE_SCOR_FINAL.tif); implicit primul")
 
     args = parser.parse_args()
 
-    algoritm_baze_gps(args.lat1, args.lon1, args.lat2, args.lon2, args.pixeli_baze, args.nr_baze)
\ No newline at end of file
+    algoritm_baze_gps(args.lat1, args.lon1, args.lat2, args.lon2, args.pixeli_baze, args.nr_baze, args.output,
+                      dreptunghi=args.dreptunghi, unitate="metri" if args.metri else "pixeli",
+                      procese=args.procese, streaming_mb=args.streaming, optimizare=args.optimizare,
+                      profil=args.profil)
\ No newline at end of file
@@ -0,0 +1,218 @@
+import os
+import time
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from rasterio.windows import Window
+
+import motor_analiza
+import metrici
+from algoritm1_tif import baze_din_matrice, cauta_baze_streaming, fereastra_din_gps
+from index_varfuri import baze_din_index
+from cache_rezultate import cheie_cerere
+
+# --- CONFIGURARE ---
+MAX_ZONE_BATCH = 100
+MAX_WORKERS = os.cpu_count() or 2
+# Două zone care se suprapun sunt citite împreună doar dacă fereastra comună
+# nu depășește de atâtea ori suma suprafețelor lor (altfel citim separat).
+FACTOR_UNIRE = 2.0
+# Fereastra comună a unui grup nu depășește pragul de la care /api/run nu mai citește fereastra
+# completă; zonele mai mari merg pe calea cu memorie limitată (index / streaming), câte una.
+MAX_PIXELI_GRUP = motor_analiza.PRAG_PIXELI_INDEX
+
+_pool = None
+_lock_pool = threading.Lock()
+
+# --- PROCESELE WORKER ---
+def _init_worker(cale_raster):
+    # Fiecare proces își deschide rasterul o singură dată (handle-ul rămâne deschis între task-uri)
+    motor_analiza.INPUT_FILE = cale_raster
+
+def _analizeaza_grup(fereastra_grup, zone):
+    """
+    Citește o singură dată fereastra comună a grupului și rulează algoritmul pe
+    fiecare zonă (feliată din matricea comună).
+    'zone' = [(id, (col_off, row_off, width, height), patrate, nr_baze)]
+    Returnează [(id, baze, eroare, timpi, pixeli_cititi)].
+    """
+    with motor_analiza.dataset_scor() as src:
+        g_col, g_row, g_w, g_h = fereastra_grup
+
+        t = time.perf_counter()
+        mat_grup = src.read(1, window=Window(g_col, g_row, g_w, g_h), boundless=True, fill_value=-1)
+        t_citire = time.perf_counter() - t
+
+        # Citirea e comună grupului: fiecare zonă primește partea ei (suma pe grup = timpul real)
+        t_citire /= len(zone)
+
+        rezultate = []
+        for id_zona, (col, row, w, h), patrate, nr_baze in zone:
+            timpi = {"citire": t_citire}
+            try:
+                # Păstrăm doar partea din raster, ca în cauta_baze (fereastra se taie la margine)
+                r0, c0 = max(row, 0), max(col, 0)
+                r1, c1 = min(row + h, src.height), min(col + w, src.width)
+                mat_local = mat_grup[r0 - g_row:r1 - g_row, c0 - g_col:c1 - g_col]
+                baze = baze_din_matrice(mat_local, src, r0, c0, patrate, nr_baze, timpi)
+                rezultate.append((id_zona, baze, None, timpi, w * h))
+            except Exception as e:
+                rezultate.append((id_zona, None, str(e), timpi, 0))
+        return rezultate
+
+def _analizeaza_zona_mare(id_zona, fereastra, patrate, nr_baze, mod):
+    """
+    O zonă mare, cu modul ales de motor_analiza.mod_cautare ca în /api/run: semințele din
+    indexul de vârfuri ("index") sau parcurgere pe blocuri ("streaming"), fără să citească
+    toată fereastra. Returnează [(id, baze, eroare, timpi, pixeli_cititi)].
+    """
+    timpi = {}
+    with motor_analiza.dataset_scor() as src:
+        window = Window(*fereastra)
+        try:
+            if mod == "index":
+                index = motor_analiza.index_varfuri(src)
+                if index is None:
+                    raise ValueError("Peak index no longer matches the score raster, retry")
+                baze, pixeli = baze_din_index(src, index, window, patrate, nr_baze, timpi)
+            else:
+                baze, pixeli = cauta_baze_streaming(src, window, patrate, nr_baze, timpi,
+                                                    motor_analiza.MEMORIE_STREAMING_MB)
+            return [(id_zona, baze, None, timpi, pixeli)]
+        except Exception as e:
+            return [(id_zona, None, str(e), timpi, 0)]
+
+# --- PROCESUL PRINCIPAL ---
+def pool():
+    """Pool-ul de procese, creat la prima cerere și refolosit."""
+    global _pool
+    with _lock_pool:
+        # Worker-ii își deschid propriul handle: nu pornim alții cât rasterul e rescris
+        if motor_analiza.blocat():
+            raise motor_analiza.RasterIndisponibil()
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=MAX_WORKERS, initializer=_init_worker,
+                                        initargs=(motor_analiza.INPUT_FILE,))
+        return _pool
+
+def opreste_pool():
+    """Oprește worker-ii (ex: înainte de update, ca rasterul să poată fi rescris)."""
+    global _pool
+    with _lock_pool:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+def _intersecteaza(a, b):
+    return (a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and
+            a[1] < b[1] + b[3] and b[1] < a[1] + a[3])
+
+def _uniune(a, b):
+    col0, row0 = min(a[0], b[0]), min(a[1], b[1])
+    col1, row1 = max(a[0] + a[2], b[0] + b[2]), max(a[1] + a[3], b[1] + b[3])
+    return (col0, row0, col1 - col0, row1 - row0)
+
+def grupeaza_ferestre(zone):
+    """
+    Grupează zonele care se suprapun, ca fereastra comună să fie citită o singură dată.
+    Returnează [(fereastra_grup, [zone...])].
+    """
+    grupuri = []  # [fereastra, suprafata_membri, membri]
+    for zona in sorted(zone, key=lambda z: (z[1][1], z[1][0])):
+        fereastra = zona[1]
+        suprafata = fereastra[2] * fereastra[3]
+        for grup in grupuri:
+            if not _intersecteaza(grup[0], fereastra):
+                continue
+            unita = _uniune(grup[0], fereastra)
+            if unita[2] * unita[3] <= min(FACTOR_UNIRE * (grup[1] + suprafata), MAX_PIXELI_GRUP):
+                grup[0], grup[1] = unita, grup[1] + suprafata
+                grup[2].append(zona)
+                break
+        else:
+            grupuri.append([fereastra, suprafata, [zona]])
+    return [(g[0], g[2]) for g in grupuri]
+
+def parseaza_cereri(items):
+    """Validează lista de zone din cerere. Returnează [(id, lat1, lon1, lat2, lon2, patrate, nr_baze)]."""
+    if not isinstance(items, list) or not items:
+        raise ValueError("Expected a non-empty list of zones")
+    if len(items) > MAX_ZONE_BATCH:
+        raise ValueError(f"Too many zones (max {MAX_ZONE_BATCH})")
+
+    cereri = []
+    for i, item in enumerate(items):
+        zone = item.get("zone") or {}
+        preferences = item.get("preferences", {})
+        id_zona = str(item.get("id", i))
+        try:
+            cereri.append((
+                id_zona,
+                float(zone['nw'][0]), float(zone['nw'][1]),
+                float(zone['se'][0]), float(zone['se'][1]),
+                int(preferences.get("size", 20)),
+                int(preferences.get("count", 4)),
+            ))
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid zone '{id_zona}': {e}")
+
+    if len({c[0] for c in cereri}) != len(cereri):
+        raise ValueError("Zone ids must be unique")
+    return cereri
+
+def ruleaza_batch(cereri):
+    """
+    Generator: produce (id, baze, eroare, timpi, din_cache) pe măsură ce zonele se termină.
+    Zonele găsite în cache-ul de rezultate sunt returnate imediat.
+    """
+    de_calculat = []
+    mari = []      # zone de la PRAG_PIXELI_INDEX pixeli: câte una, cu memorie limitată
+    imediate = []  # erori de coordonate și rezultate din cache
+    chei = {}
+    # Handle-ul e ținut doar cât citim metadatele, nu între yield-uri (clientul poate citi încet)
+    with motor_analiza.dataset_scor() as src:
+        versiune = motor_analiza.versiune_continut(src)
+        cache = motor_analiza.cache_rezultate()
+        cache.verifica_versiune(versiune)
+
+        marime_pixel = np.dtype(src.dtypes[0]).itemsize
+        for id_zona, lat1, lon1, lat2, lon2, patrate, nr_baze in cereri:
+            try:
+                window = fereastra_din_gps(src, lat1, lon1, lat2, lon2)
+            except ValueError as e:
+                imediate.append((id_zona, None, str(e), {}, False))
+                continue
+
+            # Aceeași cheie ca /api/run: modul de căutare face parte din ea
+            _, mod = motor_analiza.mod_cautare(src, window)
+            parametri = patrate if mod is None else f"{patrate}|{mod}"
+            cheie = cheie_cerere(versiune, window, parametri, nr_baze)
+            baze = cache.get(cheie)
+            if baze is not None:
+                imediate.append((id_zona, baze, None, {}, True))
+                continue
+
+            chei[id_zona] = cheie
+            fereastra = (window.col_off, window.row_off, window.width, window.height)
+            if mod is None:
+                de_calculat.append((id_zona, fereastra, patrate, nr_baze))
+            else:
+                mari.append((id_zona, fereastra, patrate, nr_baze, mod))
+
+    yield from imediate
+
+    if not de_calculat and not mari:
+        return
+
+    executor = pool()
+    futures = [executor.submit(_analizeaza_grup, fereastra_grup, zone)
+               for fereastra_grup, zone in grupeaza_ferestre(de_calculat)]
+    futures += [executor.submit(_analizeaza_zona_mare, *zona) for zona in mari]
+
+    for future in as_completed(futures):
+        for id_zona, baze, eroare, timpi, pixeli in future.result():
+            if eroare is None:
+                cache.put(chei[id_zona], versiune, baze)
+                metrici.inregistreaza_analiza(timpi, pixeli, pixeli * marime_pixel, operatie="batch")
+            yield id_zona, baze, eroare, timpi, False
@@ -1,58 +1,91 @@
 import os
-import sys
-import subprocess
 import json
-import osmnx as ox
-from flask import Flask, request, jsonify, Response, send_file
+import time
+from flask import Flask, request, jsonify, Response, g
+
+import motor_analiza
+import joburi_update
+import tile_scor
+import geometrie_judete
+import analiza_batch
+import metrici
+import scor_virtual
 
 app = Flask(__name__)
 
 # --- CONFIGURARE DINAMICĂ ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-PYTHON_EXE = sys.executable 
 
-SCRIPT_ANALIZA = "algoritm1_tif.py"
-SCRIPT_UPDATE = "update_pipeline.py"
-SCRIPT_VIZUALIZARE = "export_zona.py"  
+JUDETE_TARGET = geometrie_judete.JUDETE_TARGET
 
-OUTPUT_JSON = "rezultate_baze_gps.json"
-OUTPUT_PNG = "zona_selectata.png"     
+# --- METRICI (expuse pe /metrics) ---
+def _statistici_cache():
+    """(nume_cache, intrari, hits, misses) pentru toate cache-urile serverului."""
+    tiles = tile_scor.statistici_cache()
+    rezultat = [("tiles", tiles["intrari"], tiles["hits"], tiles["misses"])]
 
-JUDETE_TARGET = [
-    {"county": "Suceava", "country": "Romania"},
-    {"county": "Botoșani", "country": "Romania"},
-    {"county": "Iași", "country": "Romania"},
-    {"county": "Neamț", "country": "Romania"},
-    {"county": "Bacău", "country": "Romania"},
-    {"county": "Vaslui", "country": "Romania"}
-]
+    if motor_analiza._cache is not None:
+        st = motor_analiza._cache.statistici()
+        # Un miss în memorie servit din SQLite nu este un miss al cache-ului
+        rezultat.append(("results_memory", st["memorie_intrari"], st["memorie_hits"], st["memorie_misses"]))
+        rezultat.append(("results_sqlite", st["db_intrari"], st["db_hits"], st["memorie_misses"] - st["db_hits"]))
 
-def run_subprocess(command_list):
-    try:
-        print(f"Executing: {' '.join(command_list)}")
-        result = subprocess.run(
-            command_list,
-            cwd=BASE_DIR,
-            capture_output=True,
-            text=True,
-            encoding='utf-8', 
-            errors='replace'
-        )
-        return result
-    except Exception as e:
-        print(f"Subprocess Error: {e}")
-        return None
+    if motor_analiza.SCOR_VIRTUAL:
+        blocuri = scor_virtual.statistici_cache()
+        rezultat.append(("virtual_score_blocks", blocuri["intrari"], blocuri["hits"], blocuri["misses"]))
+    return rezultat
+
+def _hit_ratio(hits, misses):
+    return hits / (hits + misses) if hits + misses else 0.0
+
+metrici.Gauge("app_cache_entries", "Numar de intrari in cache",
+              lambda: [({"cache": n}, e) for n, e, h, m in _statistici_cache()], ("cache",))
+metrici.Gauge("app_cache_hits_total", "Hit-uri cache",
+              lambda: [({"cache": n}, h) for n, e, h, m in _statistici_cache()], ("cache",), tip="counter")
+metrici.Gauge("app_cache_misses_total", "Miss-uri cache",
+              lambda: [({"cache": n}, m) for n, e, h, m in _statistici_cache()], ("cache",), tip="counter")
+metrici.Gauge("app_cache_hit_ratio", "Rata de hit a cache-ului",
+              lambda: [({"cache": n}, _hit_ratio(h, m)) for n, e, h, m in _statistici_cache()], ("cache",))
+
+@app.before_request
+def _start_cronometru():
+    g.t_start = time.perf_counter()
+
+@app.after_request
+def _inregistreaza_cerere(response):
+    # Pentru răspunsurile în streaming se măsoară doar timpul până la primul byte
+    ruta = request.url_rule.rule if request.url_rule else "unmatched"
+    durata = time.perf_counter() - g.get("t_start", time.perf_counter())
+    metrici.CERERI_HTTP.inc(route=ruta, method=request.method, status=response.status_code)
+    metrici.LATENTA_HTTP.observe(durata, route=ruta, method=request.method)
+    return response
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    return Response(metrici.genereaza(), mimetype="text/plain; version=0.0.4")
 
 @app.route("/api/boundaries", methods=["GET"])
 def api_boundaries():
     try:
-        print("Fetching county boundaries...")
-        gdf = ox.geocode_to_gdf(JUDETE_TARGET)
-        geojson_str = gdf.to_json()
-        return Response(geojson_str, mimetype='application/json')
+        toleranta = float(request.args.get("tol", geometrie_judete.TOLERANTA_IMPLICITA))
+        date, date_gzip, etag = geometrie_judete.geojson_simplificat(toleranta, JUDETE_TARGET)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+    # Browserul păstrează conturul în cache; revalidăm doar prin ETag
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    elif "gzip" in request.headers.get("Accept-Encoding", ""):
+        response = Response(date_gzip, mimetype='application/json')
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        response = Response(date, mimetype='application/json')
+
+    response.headers["ETag"] = f'"{etag}"'
+    response.headers["Vary"] = "Accept-Encoding"
+    response.headers["Cache-Control"] = "public, max-age=86400"
+    return response
+
 # --- RUTA NOUĂ: VIZUALIZARE ZONĂ (Returnează PNG) ---
 @app.route("/api/visualize", methods=["POST"])
 def api_visualize():
@@ -62,29 +95,44 @@ def api_visualize():
     if not zone:
         return jsonify({"error": "No zone selected"}), 400
 
-    # Pregătim coordonatele
-    lat1 = str(zone['nw'][0])
-    lon1 = str(zone['nw'][1])
-    lat2 = str(zone['se'][0])
-    lon2 = str(zone['se'][1])
+    try:
+        lat1, lon1 = float(zone['nw'][0]), float(zone['nw'][1])
+        lat2, lon2 = float(zone['se'][0]), float(zone['se'][1])
+    except (KeyError, IndexError, TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid parameters: {e}"}), 400
 
-    script_path = os.path.join(BASE_DIR, SCRIPT_VIZUALIZARE)
+    # Imaginea se generează în memorie, separat pentru fiecare cerere
+    try:
+        png, timpi = motor_analiza.randeaza_zona(lat1, lon1, lat2, lon2)
+    except FileNotFoundError:
+        return jsonify({"error": "Score raster missing. Run the update pipeline first."}), 500
+    except motor_analiza.RasterIndisponibil as e:
+        return jsonify({"error": str(e)}), 503
+    except ValueError as e:
+        return jsonify({"error": "Visualization failed", "details": str(e)}), 400
+    except Exception as e:
+        print(f"Eroare Vizualizare: {e}")
+        return jsonify({"error": "Visualization failed", "details": str(e)}), 500
 
-    # Rulăm scriptul: python export_zona.py lat1 lon1 lat2 lon2
-    cmd = [PYTHON_EXE, script_path, lat1, lon1, lat2, lon2]
-    result = run_subprocess(cmd)
+    response = Response(png, mimetype='image/png')
+    response.headers["Server-Timing"] = motor_analiza.format_server_timing(timpi)
+    return response
 
-    if not result or result.returncode != 0:
-        err_msg = result.stderr if result else "Unknown execution error"
-        print(f"Eroare Vizualizare: {err_msg}")
-        return jsonify({"error": "Visualization failed", "details": err_msg}), 500
+# --- TILE-URI XYZ CU SCORUL (overlay Leaflet) ---
+@app.route("/tiles/<int:z>/<int:x>/<int:y>.png", methods=["GET"])
+def tiles(z, x, y):
+    try:
+        png = tile_scor.tile_png(z, x, y)
+    except ValueError:
+        return jsonify({"error": "Invalid tile"}), 404
+    except FileNotFoundError:
+        return jsonify({"error": "Score raster missing"}), 404
+    except motor_analiza.RasterIndisponibil as e:
+        return jsonify({"error": str(e)}), 503
 
-    # Returnăm imaginea generată direct către browser
-    png_path = os.path.join(BASE_DIR, OUTPUT_PNG)
-    if os.path.exists(png_path):
-        return send_file(png_path, mimetype='image/png')
-    else:
-        return jsonify({"error": "Image not generated"}), 500
+    response = Response(png, mimetype="image/png")
+    response.headers["Cache-Control"] = "public, max-age=300"
+    return response
 
 @app.route("/api/run", methods=["POST"])
 def api_run():
@@ -95,51 +143,158 @@ def api_run():
     if not zone:
         return jsonify({"error": "No zone selected"}), 400
 
-    lat1 = str(zone['nw'][0])
-    lon1 = str(zone['nw'][1])
-    lat2 = str(zone['se'][0])
-    lon2 = str(zone['se'][1])
-    
-    size = str(preferences.get("size", 20)) 
-    count = str(preferences.get("count", 4))
+    try:
+        lat1, lon1 = float(zone['nw'][0]), float(zone['nw'][1])
+        lat2, lon2 = float(zone['se'][0]), float(zone['se'][1])
+        size = int(preferences.get("size", 20))
+        count = int(preferences.get("count", 4))
+        optimize = bool(preferences.get("optimize", False))
+        # Opțional: profilul de scor (banda din rasterul de scor), ex: "logistica"
+        profile = preferences.get("profile") or None
+        if profile is not None and not isinstance(profile, str):
+            raise ValueError("profile must be a string")
+        # Opțional: pragul pădurii adânci în metri, ex: 100 (implicit cel al rasterului de scor)
+        forest_depth = preferences.get("forest_depth")
+        forest_depth = None if forest_depth is None else float(forest_depth)
 
-    script_path = os.path.join(BASE_DIR, SCRIPT_ANALIZA)
+        # Opțional: baze dreptunghiulare fixe, ex: {"height": 30, "width": 50, "unit": "m"}
+        dreptunghi, unitate = None, "pixeli"
+        footprint = preferences.get("footprint")
+        if footprint:
+            dreptunghi = (float(footprint["height"]), float(footprint["width"]))
+            unitate = {"px": "pixeli", "m": "metri"}[footprint.get("unit", "px")]
+            if min(dreptunghi) <= 0:
+                raise ValueError("footprint dimensions must be positive")
+    except (KeyError, IndexError, TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid parameters: {e}"}), 400
 
-    cmd = [PYTHON_EXE, script_path, lat1, lon1, lat2, lon2, size, count]
-    result = run_subprocess(cmd)
+    # Rulăm analiza direct în proces (datasetul rămâne deschis între cereri)
+    try:
+        bases, timpi, din_cache = motor_analiza.ruleaza_analiza(lat1, lon1, lat2, lon2, size, count,
+                                                                dreptunghi=dreptunghi, unitate=unitate,
+                                                                optimizare=optimize, profil=profile,
+                                                                prag_padure=forest_depth)
+    except FileNotFoundError:
+        return jsonify({"error": "Score raster missing. Run the update pipeline first."}), 500
+    except motor_analiza.RasterIndisponibil as e:
+        return jsonify({"error": str(e)}), 503
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(f"Eroare Analiză: {e}")
+        return jsonify({"error": "Analysis failed", "details": str(e)}), 500
 
-    if not result or result.returncode != 0:
-        err_msg = result.stderr if result else "Unknown execution error"
-        print(f"Eroare Script (STDERR): {err_msg}")
-        return jsonify({"error": "Analysis failed", "details": err_msg}), 500
+    sursa = "cache" if din_cache else "calcul"
+    print(f"Analiză ({sursa}): {len(bases)} baze | " + " ".join(f"{k}={v * 1000:.1f}ms" for k, v in timpi.items()))
 
-    json_path = os.path.join(BASE_DIR, OUTPUT_JSON)
-    if os.path.exists(json_path):
+    response = jsonify(bases)
+    response.headers["Server-Timing"] = motor_analiza.format_server_timing(timpi)
+    response.headers["X-Cache"] = "HIT" if din_cache else "MISS"
+    return response
+
+@app.route("/api/run/batch", methods=["POST"])
+def api_run_batch():
+    data = request.get_json()
+    try:
+        cereri = analiza_batch.parseaza_cereri(data.get("zones"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # În modul virtual scorul e calculat din cubul master (MATRICE_SCOR_FINAL.tif poate lipsi)
+    raster = motor_analiza.MASTER_FILE if motor_analiza.SCOR_VIRTUAL else motor_analiza.INPUT_FILE
+    if not os.path.exists(raster):
+        return jsonify({"error": "Score raster missing. Run the update pipeline first."}), 500
+    # Verificat dinainte: în modul streaming statusul nu mai poate fi schimbat
+    if motor_analiza.blocat():
+        return jsonify({"error": str(motor_analiza.RasterIndisponibil())}), 503
+
+    def rezultat(id_zona, baze, eroare, timpi, din_cache):
+        if eroare is not None:
+            return {"id": id_zona, "status": "error", "error": eroare}
+        return {"id": id_zona, "status": "ok", "cache": din_cache, "bases": baze,
+                "timings_ms": {k: round(v * 1000, 1) for k, v in timpi.items()}}
+
+    # Fără streaming: un singur obiect JSON, cu rezultatele indexate după id-ul zonei
+    if not data.get("stream", True):
         try:
-            with open(json_path, "r", encoding='utf-8') as f:
-                bases = json.load(f)
-            return jsonify(bases)
+            rezultate = {r[0]: rezultat(*r) for r in analiza_batch.ruleaza_batch(cereri)}
+        except motor_analiza.RasterIndisponibil as e:
+            return jsonify({"error": str(e)}), 503
         except Exception as e:
-            return jsonify({"error": f"Corrupt JSON output: {str(e)}"}), 500
-    else:
-        return jsonify([])
+            return jsonify({"error": "Batch analysis failed", "details": str(e)}), 500
+        return jsonify(rezultate)
+
+    # Streaming NDJSON: o linie per zonă, în ordinea în care se termină
+    def stream():
+        try:
+            for r in analiza_batch.ruleaza_batch(cereri):
+                yield json.dumps(rezultat(*r), ensure_ascii=False) + "\n"
+        except Exception as e:
+            yield json.dumps({"status": "error", "error": str(e)}) + "\n"
+
+    return Response(stream(), mimetype="application/x-ndjson",
+                    headers={"X-Accel-Buffering": "no"})
+
+def _elibereaza_raster():
+    """
+    Apelat de jobul de update chiar înainte de primul pas care rescrie rasterul de scor:
+    închide handle-urile și worker-ii, iar până la sfârșitul jobului cererile primesc 503.
+    """
+    motor_analiza.blocheaza()
+    analiza_batch.opreste_pool()
+    motor_analiza.opreste_pool_crestere()
 
 @app.route("/api/update", methods=["POST"])
 def api_update():
     print("Starting Pipeline Update...")
-    script_path = os.path.join(BASE_DIR, SCRIPT_UPDATE)
-    cmd = [PYTHON_EXE, script_path]
-    result = run_subprocess(cmd)
-
-    if result and result.returncode == 0:
-        return jsonify({
-            "status": "success", 
-            "message": "Toate hărțile au fost actualizate și recalculate.",
-            "logs": result.stdout[-500:]
-        })
-    else:
-        err = result.stderr if result else "Script not found"
-        return jsonify({"status": "error", "message": err}), 500
+    try:
+        job = joburi_update.porneste_update(la_rescriere=_elibereaza_raster,
+                                            dupa_rescriere=motor_analiza.deblocheaza)
+    except joburi_update.UpdateInCurs as e:
+        return jsonify({"status": "error", "message": str(e), "job_id": e.job.id}), 409
+
+    return jsonify({
+        "status": "started",
+        "job_id": job.id,
+        "status_url": f"/api/jobs/{job.id}",
+        "events_url": f"/api/jobs/{job.id}/events"
+    }), 202
+
+@app.route("/api/jobs/<job_id>", methods=["GET"])
+def api_job_status(job_id):
+    job = joburi_update.gaseste_job(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict())
+
+@app.route("/api/jobs/<job_id>/events", methods=["GET"])
+def api_job_events(job_id):
+    job = joburi_update.gaseste_job(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+
+    # EventSource retrimite ultimul id primit la reconectare
+    try:
+        de_la = int(request.headers.get("Last-Event-ID", -1)) + 1
+    except ValueError:
+        de_la = 0
+
+    def stream():
+        for ev in job.evenimente(de_la=de_la):
+            if ev is None:
+                yield ": keepalive\n\n"
+            else:
+                yield joburi_update.format_sse(*ev)
+
+    return Response(stream(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.route("/api/jobs/<job_id>/cancel", methods=["POST"])
+def api_job_cancel(job_id):
+    job = joburi_update.anuleaza_job(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict())
 
 @app.route("/")
 def index():
@@ -147,4 +302,5 @@ def index():
     return send_from_directory(BASE_DIR, 'versiune1.html')
 
 if __name__ == "__main__":
-    app.run(debug=True, port=5000)
\ No newline at end of file
+    # threaded=True: cererile nu mai partajează fișiere de ieșire, deci pot rula în paralel
+    app.run(debug=True, port=5000, threaded=True)
\ No newline at end of file
@@ -0,0 +1,234 @@
+import io
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import tracemalloc
+import subprocess
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import rasterio
+from rasterio.windows import Window
+from rasterio.transform import from_origin
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+RADACINA = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RADACINA))
+from algoritm1_tif import cauta_baze
+
+# Suită de benchmark pentru algoritmul de baze (etapele din cauta_baze, ca în algoritm_baze_gps),
+# pe rastere de scor sintetice int8 cu structură apropiată de MATRICE_SCOR_FINAL.tif:
+#  - câmp de scor neted (variază pe sute de pixeli), ca distanțele interpolate din scor_final.py
+#  - platouri (zone cu scor constant, ex: interiorul pădurii), cu multe egalități
+#  - coridoare de -1 (drumuri, râuri, căi ferate) și pete de -1 (localități)
+#  - zgomot de ±2 puncte
+# Rasterele sunt generate o singură dată per (mărime, sămânță) și refolosite între rulări.
+# Nu are nevoie de rețea. Rezultatele se scriu în JSON; cu --compara se afișează
+# diferențele față de o rulare anterioară (ex: de pe alt commit).
+
+# --- CONFIGURARE ---
+MARIMI = [1000, 2000, 5000, 10000, 20000]
+PATRATE = [20, 200, 2000]
+NR_BAZE = [4, 20, 100]
+LATURA_CAMP = 256          # pixeli între nodurile câmpului neted
+LINII_PE_BANDA = 512       # rasterul e generat (și scris) în benzi, cu memorie limitată
+SCOR_MAXIM = 110
+
+def director_implicit():
+    return Path(tempfile.gettempdir()) / "bench_scor_sintetic"
+
+def _camp_neted(grila, r0, r1, latime):
+    """Interpolare biliniară a grilei grosiere pe liniile [r0, r1) (float32)."""
+    y = np.arange(r0, r1, dtype=np.float32) / LATURA_CAMP
+    x = np.arange(latime, dtype=np.float32) / LATURA_CAMP
+    i0, j0 = y.astype(np.intp), x.astype(np.intp)
+    fy, fx = (y - i0)[:, None], x - j0
+    linii = grila[i0] * (1 - fy) + grila[i0 + 1] * fy
+    return linii[:, j0] * (1 - fx) + linii[:, j0 + 1] * fx
+
+def genereaza_raster(cale, n, samanta=0):
+    """Scrie un raster de scor sintetic n x n (int8, LZW, tile-uri 256, grila UTM 35N / 10m)."""
+    rng = np.random.default_rng(samanta)
+    noduri = n // LATURA_CAMP + 2
+
+    scor = rng.uniform(0, 80, (noduri, noduri)).astype(np.float32)
+    platouri = rng.uniform(0, 1, (noduri, noduri)).astype(np.float32)
+    localitati = rng.uniform(0, 1, (noduri, noduri)).astype(np.float32)
+
+    # Coridoare: linii cu meandre, (x0, y0, unghi, lățime, amplitudine, perioadă)
+    nr_coridoare = max(2, n // 800)
+    coridoare = list(zip(rng.uniform(0, n, nr_coridoare), rng.uniform(0, n, nr_coridoare),
+                         rng.uniform(0, np.pi, nr_coridoare), rng.integers(1, 6, nr_coridoare),
+                         rng.uniform(0, 40, nr_coridoare), rng.uniform(300, 3000, nr_coridoare)))
+
+    profile = dict(driver="GTiff", height=n, width=n, count=1, dtype="int8", nodata=-1,
+                   crs="EPSG:32635", transform=from_origin(400000, 5350000, 10, 10),
+                   tiled=True, blockxsize=256, blockysize=256, compress="lzw", BIGTIFF="IF_SAFER")
+
+    tmp = f"{cale}.{os.getpid()}.tmp"
+    with rasterio.open(tmp, "w", **profile) as dst:
+        dst.update_tags(VERSIUNE_SCOR=f"sintetic_{n}_{samanta}")
+        x = np.arange(n, dtype=np.float32)
+        for r0 in range(0, n, LINII_PE_BANDA):
+            r1 = min(r0 + LINII_PE_BANDA, n)
+            rng_banda = np.random.default_rng((samanta, r0))
+
+            camp = _camp_neted(scor, r0, r1, n)
+            # Platourile: scorul e cuantizat în trepte de 10 (mult mai multe egalități)
+            plat = _camp_neted(platouri, r0, r1, n) > 0.6
+            camp = np.where(plat, np.round(camp / 10) * 10, camp + rng_banda.integers(-2, 3, camp.shape))
+            banda = np.clip(np.round(camp), 0, SCOR_MAXIM).astype(np.int8)
+
+            banda[_camp_neted(localitati, r0, r1, n) < 0.3] = -1
+            y = np.arange(r0, r1, dtype=np.float32)[:, None]
+            for x0, y0, unghi, latime, amplitudine, perioada in coridoare:
+                dx, dy = x - x0, y - y0
+                de_a_lungul = dx * np.cos(unghi) + dy * np.sin(unghi)
+                distanta = np.abs(dy * np.cos(unghi) - dx * np.sin(unghi)
+                                  - amplitudine * np.sin(de_a_lungul * (2 * np.pi / perioada)))
+                banda[distanta < latime] = -1
+
+            dst.write(banda, 1, window=Window(0, r0, n, r1 - r0))
+    os.replace(tmp, cale)
+
+def raster_sintetic(director, n, samanta):
+    cale = Path(director) / f"scor_sintetic_{n}_{samanta}.tif"
+    if not cale.exists():
+        print(f"Generez rasterul sintetic {n}x{n} -> {cale}")
+        t = time.perf_counter()
+        cale.parent.mkdir(parents=True, exist_ok=True)
+        genereaza_raster(cale, n, samanta)
+        print(f"  generat în {time.perf_counter() - t:.1f} s")
+    return cale
+
+def _ruleaza(src, patrate, nr_baze, optimizare):
+    timpi = {}
+    window = Window(0, 0, src.width, src.height)
+    t = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        baze = cauta_baze(src, 0, 0, 0, 0, patrate, nr_baze, timpi=timpi, window=window, optimizare=optimizare)
+    timpi["total"] = time.perf_counter() - t
+    return baze, timpi
+
+def masoara(src, patrate, nr_baze, repetari, optimizare=False, memorie=True):
+    """
+    Cea mai rapidă din 'repetari' rulări (timpii pe etape ai acelei rulări) și, separat,
+    vârful de memorie alocată de Python/numpy într-o rulare sub tracemalloc (încetinește
+    bucla de creștere, deci nu e cronometrată).
+    """
+    cea_mai_buna = None
+    for _ in range(repetari):
+        baze, timpi = _ruleaza(src, patrate, nr_baze, optimizare)
+        if cea_mai_buna is None or timpi["total"] < cea_mai_buna["total"]:
+            cea_mai_buna = timpi
+
+    rezultat = {
+        "timpi_ms": {k: round(v * 1000, 3) for k, v in cea_mai_buna.items()},
+        "baze_gasite": len(baze),
+        "scor_total": sum(b["scor_total"] for b in baze),
+        "pixeli_in_baze": sum(len(b["celule"]) for b in baze),
+    }
+    if memorie:
+        tracemalloc.start()
+        _ruleaza(src, patrate, nr_baze, optimizare)
+        rezultat["memorie_varf_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+        tracemalloc.stop()
+    return rezultat
+
+def commit_curent():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RADACINA, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "necunoscut"
+
+def rss_maxim_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux raportează în KB, macOS în octeți
+    return round(rss / (2**20 if sys.platform == "darwin" else 2**10), 1)
+
+def compara(rezultate, cale_anterioara):
+    with open(cale_anterioara) as f:
+        anterior = json.load(f)
+    vechi = {(r["marime"], r["patrate"], r["nr_baze"], r["mod"]): r for r in anterior["rezultate"]}
+
+    print(f"\nComparație cu {anterior['meta']['commit']} ({cale_anterioara}):")
+    print(f"{'mărime':>7} {'px/bază':>8} {'baze':>5} {'mod':>10} | {'total vechi':>12} | {'total nou':>10} | "
+          f"{'raport':>6} | {'memorie':>15} | scor")
+    for r in rezultate:
+        v = vechi.get((r["marime"], r["patrate"], r["nr_baze"], r["mod"]))
+        if v is None:
+            continue
+        t_vechi, t_nou = v["timpi_ms"]["total"], r["timpi_ms"]["total"]
+        mem = f"{v.get('memorie_varf_mb', '-')} -> {r.get('memorie_varf_mb', '-')}"
+        scor = "identic" if v["scor_total"] == r["scor_total"] else f"{v['scor_total']} -> {r['scor_total']}"
+        print(f"{r['marime']:>7} {r['patrate']:>8} {r['nr_baze']:>5} {r['mod']:>10} | {t_vechi:9.1f} ms | "
+              f"{t_nou:7.1f} ms | {t_nou / t_vechi:5.2f}x | {mem:>15} | {scor}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark algoritm baze pe rastere sintetice")
+    parser.add_argument("--marimi", type=int, nargs="+", default=MARIMI, help="Laturile rasterelor (pixeli)")
+    parser.add_argument("--patrate", type=int, nargs="+", default=PATRATE, help="Valori pixeli_baze")
+    parser.add_argument("--baze", type=int, nargs="+", default=NR_BAZE, help="Valori nr_baze")
+    parser.add_argument("--optimizare", action="store_true", help="Măsoară și modul --optimizare")
+    parser.add_argument("--repetari", type=int, default=3)
+    parser.add_argument("--samanta", type=int, default=0, help="Sămânța generatorului de rastere")
+    parser.add_argument("--director", default=director_implicit(), help="Unde sunt păstrate rasterele sintetice")
+    parser.add_argument("--fara-memorie", action="store_true", help="Nu măsura vârful de memorie (mai rapid)")
+    parser.add_argument("--output", help="Fișierul JSON (implicit benchmarks/rezultate_<commit>.json)")
+    parser.add_argument("--compara", help="JSON-ul unei rulări anterioare")
+    args = parser.parse_args()
+
+    commit = commit_curent()
+    moduri = [False, True] if args.optimizare else [False]
+    rezultate = []
+
+    print(f"{'mărime':>7} {'px/bază':>8} {'baze':>5} {'mod':>10} | {'total':>10} | {'memorie':>9} | etape (ms)")
+    for n in args.marimi:
+        cale = raster_sintetic(args.director, n, args.samanta)
+        with rasterio.open(cale) as src:
+            for patrate in args.patrate:
+                for nr_baze in args.baze:
+                    for optimizare in moduri:
+                        r = masoara(src, patrate, nr_baze, args.repetari, optimizare, not args.fara_memorie)
+                        r.update(marime=n, patrate=patrate, nr_baze=nr_baze,
+                                 mod="optimizare" if optimizare else "standard")
+                        rezultate.append(r)
+
+                        etape = ", ".join(f"{k} {v:.1f}" for k, v in r["timpi_ms"].items() if k != "total")
+                        memorie = f"{r['memorie_varf_mb']:6.1f} MB" if "memorie_varf_mb" in r else "-"
+                        print(f"{n:>7} {patrate:>8} {nr_baze:>5} {r['mod']:>10} | "
+                              f"{r['timpi_ms']['total']:7.1f} ms | {memorie:>9} | {etape}")
+
+    meta = {
+        "commit": commit,
+        "data": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "rasterio": rasterio.__version__,
+        "gdal": rasterio.__gdal_version__,
+        "platforma": platform.platform(),
+        "procesoare": os.cpu_count(),
+        "samanta": args.samanta,
+        "repetari": args.repetari,
+        "rss_maxim_mb": rss_maxim_mb(),
+    }
+    output = args.output or RADACINA / "benchmarks" / f"rezultate_{commit}.json"
+    with open(output, "w") as f:
+        json.dump({"meta": meta, "rezultate": rezultate}, f, indent=2)
+    print(f"\nRezultate salvate în '{output}'")
+
+    if args.compara:
+        compara(rezultate, args.compara)
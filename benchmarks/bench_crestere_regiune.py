@@ -0,0 +1,83 @@
+import sys
+import time
+import heapq
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from algoritm1_tif import ZonaCrestere, selecteazaSeminte
+
+# Benchmark: creșterea regiunilor (generareOConfiguratie).
+#  - "set+tupluri": implementarea inițială (set de tupluri, heap de tupluri, verificări de limite)
+#  - "bitmap":      ZonaCrestere (hartă de vizitate prealocată, coadă cu chei întregi pe index aplatizat)
+
+def configuratie_initiala(element_curent, patrate, mat):
+    """Implementarea inițială (referință)."""
+    scor_start, start_i, start_j = element_curent
+    linii, coloane = mat.shape
+
+    max_heap = [(-int(mat[start_i, start_j]), start_i, start_j)]
+    vizitate = set([(start_i, start_j)])
+    configuratie = []
+
+    while len(configuratie) < patrate and max_heap:
+        val_neg, r, c = heapq.heappop(max_heap)
+        val = -val_neg
+        if val <= 0: continue
+        configuratie.append((val, r, c))
+
+        for dr, dc in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
+            nr, nc = r + dr, c + dc
+            if 0 <= nr < linii and 0 <= nc < coloane and (nr, nc) not in vizitate:
+                vizitate.add((nr, nc))
+                heapq.heappush(max_heap, (-int(mat[nr, nc]), nr, nc))
+
+    return configuratie
+
+def normalizeaza(configuratie):
+    return [(int(v), int(r), int(c)) for v, r, c in configuratie]
+
+def matrice_test(n, rng):
+    """Zgomot + câteva platouri (multe egalități de scor, ca în rasterul real)."""
+    mat = rng.integers(-1, 46, (n, n)).astype(np.int8)
+    for _ in range(20):
+        r, c = rng.integers(0, n - 200, 2)
+        mat[r:r + 200, c:c + 200] = rng.integers(30, 46)
+    return mat
+
+def cronometreaza(functie, repetari):
+    rezultat, cel_mai_bun = None, float("inf")
+    for _ in range(repetari):
+        t = time.perf_counter()
+        rezultat = functie()
+        cel_mai_bun = min(cel_mai_bun, time.perf_counter() - t)
+    return rezultat, cel_mai_bun
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark creștere regiuni")
+    parser.add_argument("--marime", type=int, default=1500, help="Latura matricii sintetice (pixeli)")
+    parser.add_argument("--baze", type=int, default=12, help="Numărul de semințe per interogare")
+    parser.add_argument("--repetari", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    mat = matrice_test(args.marime, rng)
+
+    print(f"Matrice {args.marime}x{args.marime}, {args.baze} semințe per interogare")
+    print(f"{'pixeli/bază':>12} | {'set+tupluri':>12} | {'bitmap':>10} | {'accelerare':>10} | identic")
+    for patrate in [20, 200, 2000, 20000]:
+        seminte = selecteazaSeminte(mat, args.baze, patrate)
+
+        vechi, t_vechi = cronometreaza(
+            lambda: [configuratie_initiala(s, patrate, mat) for s in seminte], args.repetari)
+
+        def bitmap():
+            zona = ZonaCrestere(mat)
+            return [zona.configuratie(int(s[1]), int(s[2]), patrate) for s in seminte]
+        nou, t_nou = cronometreaza(bitmap, args.repetari)
+
+        identic = all(normalizeaza(a) == normalizeaza(b) for a, b in zip(vechi, nou))
+        print(f"{patrate:>12} | {t_vechi * 1000:9.1f} ms | {t_nou * 1000:7.1f} ms | "
+              f"{t_vechi / t_nou:9.1f}x | {identic}")
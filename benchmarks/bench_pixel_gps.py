@@ -0,0 +1,50 @@
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+from rasterio.io import MemoryFile
+from rasterio.transform import from_origin
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from algoritm1_tif import pixel_to_gps, pixeli_to_gps
+
+# Benchmark: conversia Pixel -> GPS, celulă cu celulă (vechi) vs. vectorizat (nou).
+# Folosește un raster sintetic în memorie, cu aceeași grilă UTM 35N / 10m ca harta reală.
+
+def ruleaza(nr_baze, pixeli_baza, repetari):
+    rng = np.random.default_rng(0)
+    profile = dict(driver="GTiff", height=20000, width=20000, count=1, dtype="int8",
+                   crs="EPSG:32635", transform=from_origin(400000, 5350000, 10, 10))
+
+    with MemoryFile() as mem, mem.open(**profile) as src:
+        n = nr_baze * pixeli_baza
+        rows = rng.integers(0, src.height, n)
+        cols = rng.integers(0, src.width, n)
+
+        t = time.perf_counter()
+        for _ in range(repetari):
+            vechi = [pixel_to_gps(src, r, c) for r, c in zip(rows, cols)]
+        t_vechi = (time.perf_counter() - t) / repetari
+
+        t = time.perf_counter()
+        for _ in range(repetari):
+            lat, lon = pixeli_to_gps(src, rows, cols)
+        t_nou = (time.perf_counter() - t) / repetari
+
+        identic = all(
+            round(la_v, 6) == round(la_n, 6) and round(lo_v, 6) == round(lo_n, 6)
+            for (la_v, lo_v), la_n, lo_n in zip(vechi, lat.tolist(), lon.tolist())
+        )
+
+    print(f"{nr_baze:>4} baze x {pixeli_baza:>5} px | vechi {t_vechi * 1000:9.1f} ms | "
+          f"nou {t_nou * 1000:7.2f} ms | x{t_vechi / t_nou:7.1f} | identic: {identic}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark conversie Pixel -> GPS")
+    parser.add_argument("--repetari", type=int, default=3)
+    args = parser.parse_args()
+
+    for nr_baze, pixeli_baza in [(4, 20), (10, 500), (30, 2000)]:
+        ruleaza(nr_baze, pixeli_baza, args.repetari)
@@ -0,0 +1,54 @@
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from scor_final import scor_bloc, scor_bloc_interp, tabel_scor
+
+# Benchmark: scorul unui bloc din MASTER_DATASET_EXTENDED.tif.
+#  - "interp": np.interp de trei ori în float64, np.where, rotunjire la int8 (scor_bloc_interp)
+#  - "tabel":  un indice întreg per pixel + o indexare în tabelul de scor (scor_bloc)
+# Blocurile sintetice au distanțe întregi (float32, ca în cub), cu -1 pe obiecte,
+# valori dincolo de ultimul nod și ~20% pixeli neconstruibili.
+
+def bloc_test(latura, rng):
+    date = np.empty((5, latura, latura), dtype=np.float32)
+    for banda, maxim in enumerate([400, 300, 120, 100]):
+        date[banda] = rng.integers(-1, maxim, (latura, latura))
+        date[banda][rng.random((latura, latura)) < 0.1] = -1
+    date[4] = rng.random((latura, latura)) < 0.8
+    return date
+
+def cronometreaza(functie, blocuri, repetari):
+    cel_mai_bun = float("inf")
+    for _ in range(repetari):
+        t = time.perf_counter()
+        for bloc in blocuri:
+            functie(bloc)
+        cel_mai_bun = min(cel_mai_bun, time.perf_counter() - t)
+    return cel_mai_bun / len(blocuri)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark scor pe bloc: np.interp vs. tabel de scor")
+    parser.add_argument("--blocuri", type=int, default=20, help="Blocuri per măsurătoare")
+    parser.add_argument("--repetari", type=int, default=3)
+    args = parser.parse_args()
+
+    t = time.perf_counter()
+    tabel, _ = tabel_scor()
+    print(f"Tabel de scor: {tabel.size} intrări ({tabel.nbytes / 2**20:.1f} MB), "
+          f"construit în {(time.perf_counter() - t) * 1000:.0f} ms (o singură dată per proces)")
+
+    rng = np.random.default_rng(0)
+    print(f"{'bloc':>9} | {'interp':>10} | {'tabel':>9} | {'accelerare':>10} | identic")
+    for latura in [256, 512, 1024]:
+        blocuri = [bloc_test(latura, rng) for _ in range(args.blocuri)]
+        identic = all(np.array_equal(scor_bloc_interp(b), scor_bloc(b)) for b in blocuri)
+
+        t_interp = cronometreaza(scor_bloc_interp, blocuri, args.repetari)
+        t_tabel = cronometreaza(scor_bloc, blocuri, args.repetari)
+        print(f"{latura:>4}x{latura:<4} | {t_interp * 1000:7.2f} ms | {t_tabel * 1000:6.2f} ms | "
+              f"{t_interp / t_tabel:9.1f}x | {identic}")
@@ -0,0 +1,69 @@
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from algoritm1_tif import (primele100ElementeMaxime, primeleKElementeMaxime,
+                           selectareCuRespectareDistanta, selecteazaSeminte)
+
+# Benchmark: selecția semințelor (distanță minimă între baze).
+#  - "liniar": verificarea O(n·k) de dinainte, față de fiecare sămânță deja aleasă
+#  - "grila":  hash spațial (GrilaDistanta) + loturi adaptive de candidați
+
+def selectie_liniara(baze, patrate, elemente_maxime):
+    """Implementarea inițială (referință)."""
+    selectate = []
+    distanta_minima = int(np.sqrt(patrate)) + 2
+    for val, i, j in elemente_maxime:
+        bagam = True
+        for _, si, sj in selectate:
+            if abs(i - si) < distanta_minima and abs(j - sj) < distanta_minima:
+                bagam = False
+                break
+        if bagam:
+            selectate.append((val, i, j))
+            if len(selectate) == baze:
+                break
+    return selectate
+
+def matrice_zgomot(n, rng):
+    return rng.integers(-1, 60, (n, n)).astype(np.int8)
+
+def matrice_platou(n, rng):
+    """Un platou mare cu scor maxim + zgomot slab: top-100 cad toate în platou."""
+    mat = rng.integers(-1, 30, (n, n)).astype(np.int8)
+    mat[n // 4:n // 4 + 150, n // 4:n // 4 + 150] = 60
+    return mat
+
+def cronometreaza(functie):
+    t = time.perf_counter()
+    rezultat = functie()
+    return rezultat, time.perf_counter() - t
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark selecție semințe")
+    parser.add_argument("--marime", type=int, default=4000, help="Latura matricii sintetice (pixeli)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+
+    print("--- 1. Aceeași listă de candidați: liniar vs. grilă ---")
+    mat = matrice_zgomot(args.marime, rng)
+    candidati = primeleKElementeMaxime(mat, 200_000)
+    for baze, patrate in [(30, 20), (300, 20), (1000, 50)]:
+        vechi, t_vechi = cronometreaza(lambda: selectie_liniara(baze, patrate, candidati))
+        nou, t_nou = cronometreaza(lambda: selectareCuRespectareDistanta(baze, patrate, candidati))
+        print(f"{baze:>5} baze | liniar {t_vechi * 1000:9.1f} ms | grilă {t_nou * 1000:7.1f} ms | "
+              f"identic: {vechi == nou}")
+
+    print("\n--- 2. Platou: top-100 fix vs. loturi adaptive ---")
+    mat = matrice_platou(args.marime, rng)
+    for baze, patrate in [(10, 400), (50, 400), (300, 100)]:
+        vechi, t_vechi = cronometreaza(
+            lambda: selectie_liniara(baze, patrate, primele100ElementeMaxime(mat)))
+        nou, t_nou = cronometreaza(lambda: selecteazaSeminte(mat, baze, patrate))
+        print(f"{baze:>5} baze cerute | top-100: {len(vechi):>4} găsite ({t_vechi * 1000:6.1f} ms) | "
+              f"adaptiv: {len(nou):>4} găsite ({t_nou * 1000:6.1f} ms)")
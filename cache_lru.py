@@ -0,0 +1,36 @@
+import threading
+from collections import OrderedDict
+
+class CacheLRU:
+    """Cache LRU thread-safe cu număr maxim de intrări."""
+
+    def __init__(self, max_intrari):
+        self.max_intrari = max_intrari
+        self._date = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, cheie):
+        with self._lock:
+            valoare = self._date.get(cheie)
+            if valoare is None:
+                self.misses += 1
+                return None
+            self._date.move_to_end(cheie)
+            self.hits += 1
+            return valoare
+
+    def put(self, cheie, valoare):
+        with self._lock:
+            self._date[cheie] = valoare
+            self._date.move_to_end(cheie)
+            while len(self._date) > self.max_intrari:
+                self._date.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._date.clear()
+
+    def __len__(self):
+        return len(self._date)
@@ -0,0 +1,112 @@
+import os
+import json
+import time
+import zlib
+import sqlite3
+import threading
+
+from cache_lru import CacheLRU
+
+# --- CONFIGURARE ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_FILE = os.path.join(BASE_DIR, "cache_rezultate.sqlite")
+MAX_INTRARI_MEMORIE = 512
+MAX_BYTES_DB = 256 * 1024 * 1024   # peste această mărime ștergem intrările cele mai vechi
+FRACTIE_DUPA_EVICTIE = 0.8         # după evicție coborâm la 80% din limită
+
+def cheie_cerere(versiune, window, patrate, nr_baze):
+    """Cheia unei cereri: versiunea rasterului + fereastra de pixeli + parametrii algoritmului."""
+    return (f"{versiune}|{window.col_off},{window.row_off},{window.width},{window.height}"
+            f"|{patrate}|{nr_baze}")
+
+class CacheRezultate:
+    """
+    Cache pe două niveluri pentru rezultatele căutării de baze:
+    memorie (LRU) + SQLite pe disc (persistă între reporniri, evicție după mărime).
+    """
+
+    def __init__(self, cale_db=DB_FILE, max_memorie=MAX_INTRARI_MEMORIE, max_bytes=MAX_BYTES_DB):
+        self.cale_db = cale_db
+        self.max_bytes = max_bytes
+        self.memorie = CacheLRU(max_memorie)
+        self.hits_db = 0
+        self._versiune = None
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(cale_db, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS rezultate ("
+            " cheie TEXT PRIMARY KEY, versiune TEXT NOT NULL, date BLOB NOT NULL,"
+            " marime INTEGER NOT NULL, accesat REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_accesat ON rezultate(accesat)")
+
+    def verifica_versiune(self, versiune):
+        """Șterge tot ce aparține altor versiuni ale rasterului (a fost regenerat)."""
+        if versiune == self._versiune:
+            return
+        with self._lock:
+            if versiune == self._versiune:
+                return
+            self.memorie.clear()
+            self._db.execute("DELETE FROM rezultate WHERE versiune != ?", (versiune,))
+            self._versiune = versiune
+
+    def get(self, cheie):
+        rezultat = self.memorie.get(cheie)
+        if rezultat is not None:
+            return rezultat
+
+        with self._lock:
+            rand = self._db.execute("SELECT date FROM rezultate WHERE cheie = ?", (cheie,)).fetchone()
+            if rand is None:
+                return None
+            self._db.execute("UPDATE rezultate SET accesat = ? WHERE cheie = ?", (time.time(), cheie))
+            self.hits_db += 1
+
+        rezultat = json.loads(zlib.decompress(rand[0]))
+        self.memorie.put(cheie, rezultat)
+        return rezultat
+
+    def put(self, cheie, versiune, rezultat):
+        self.memorie.put(cheie, rezultat)
+        date = zlib.compress(json.dumps(rezultat, separators=(",", ":")).encode("utf-8"))
+
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO rezultate (cheie, versiune, date, marime, accesat) VALUES (?, ?, ?, ?, ?)",
+                (cheie, versiune, date, len(date), time.time()),
+            )
+            self._evictie()
+
+    def _evictie(self):
+        total = self._db.execute("SELECT COALESCE(SUM(marime), 0) FROM rezultate").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        tinta = self.max_bytes * FRACTIE_DUPA_EVICTIE
+        de_sters = []
+        for cheie, marime in self._db.execute("SELECT cheie, marime FROM rezultate ORDER BY accesat"):
+            if total <= tinta:
+                break
+            de_sters.append((cheie,))
+            total -= marime
+        self._db.executemany("DELETE FROM rezultate WHERE cheie = ?", de_sters)
+
+    def golire(self):
+        with self._lock:
+            self.memorie.clear()
+            self._db.execute("DELETE FROM rezultate")
+
+    def statistici(self):
+        with self._lock:
+            intrari, marime = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(marime), 0) FROM rezultate").fetchone()
+        return {
+            "memorie_intrari": len(self.memorie),
+            "memorie_hits": self.memorie.hits,
+            "memorie_misses": self.memorie.misses,
+            "db_intrari": intrari,
+            "db_bytes": marime,
+            "db_hits": self.hits_db,
+        }
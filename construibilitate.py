@@ -1,9 +1,14 @@
 import rasterio
+from rasterio.windows import Window
 import numpy as np
-from scipy.ndimage import binary_erosion
+from scipy.ndimage import distance_transform_cdt
 from pathlib import Path
 import os
 import sys
+import json
+import argparse
+
+from manifest_blocuri import ManifestBlocuri, amprenta_bloc
 
 
 
@@ -19,30 +24,69 @@ INPUT_FILE = "MASTER_DATASET_NORD_EST.tif"
 OUTPUT_FILE = "MASTER_DATASET_EXTENDED.tif"
 
 # Parametrii Pădurii
-DISTANTA_INTERIOR_PADURE = 50 # metri
+DISTANTA_INTERIOR_PADURE = 50 # metri (pragul implicit al pădurii adânci, pentru banda Construibil)
 PIXEL_SIZE = 10 # metri
 ITERATII_EROZIUNE = DISTANTA_INTERIOR_PADURE // PIXEL_SIZE # 5 pixeli
+# Banda 7 = adâncimea în pădure: distanța (pași orizontali/verticali, în pixeli) de la fiecare pixel
+# de pădure la cel mai apropiat pixel fără pădure, tăiată la ADANCIME_MAXIMA; 0 în afara pădurii.
+# "Pădure adâncă" cu pragul de K pixeli = adâncime > K, exact ca eroziunea cu K iterații, deci
+# pragul se poate alege ulterior (scor_final.py, serverul în modul virtual), până la ADANCIME_MAXIMA - 1.
+ADANCIME_MAXIMA = 30 # pixeli (300m)
+
+# Benzile cubului (1-based): 1:Drum, 2:Rail, 3:Padure, 4:Apa, 5:Urban, 6:Construibil, 7:Adâncime pădure
+IDX_CONSTRUIBIL = 6
+IDX_ADANCIME_PADURE = 7
+
+def fereastra_halo(window, halo, height, width):
+    """Fereastra extinsă cu 'halo' pixeli pe fiecare parte, tăiată la marginea rasterului."""
+    r0, c0 = max(window.row_off - halo, 0), max(window.col_off - halo, 0)
+    r1 = min(window.row_off + window.height + halo, height)
+    c1 = min(window.col_off + window.width + halo, width)
+    return Window(c0, r0, c1 - c0, r1 - r0)
+
+def iteratii_padure(distanta_metri):
+    """Pragul pădurii adânci în pixeli (iterațiile eroziunii echivalente), validat față de banda de adâncime."""
+    distanta = float(distanta_metri)
+    iteratii = int(distanta // PIXEL_SIZE) if np.isfinite(distanta) else 0
+    if not 1 <= iteratii < ADANCIME_MAXIMA:
+        raise ValueError(f"Pragul pădurii adânci trebuie să fie între {PIXEL_SIZE}m și "
+                         f"{(ADANCIME_MAXIMA - 1) * PIXEL_SIZE}m (primit: {distanta_metri}m)")
+    return iteratii
+
+def masca_construibil(b_drum, b_rail, b_apa, b_urban, adancime_padure, iteratii=ITERATII_EROZIUNE):
+    """Masca Construibil (uint8, 1 = construibil) a unui bloc, cu pragul pădurii adânci de 'iteratii' pixeli."""
+    # Inițializăm cu 1 (True - Construibil)
+    construibil = np.ones(b_drum.shape, dtype=np.uint8)
+
+    # APLICĂM REGULILE DE EXCLUDERE (False = 0)
+    # Obstacole directe (-1 înseamnă "pe obiect")
+    construibil[b_drum == -1] = 0
+    construibil[b_rail == -1] = 0
+    construibil[b_apa == -1]  = 0
+    construibil[b_urban == -1]= 0
 
-def calculeaza_construibil():
+    # Unde e pădure adâncă, punem 0
+    construibil[adancime_padure > iteratii] = 0
+    return construibil
+
+def calculeaza_construibil(complet=False):
+    """
+    Scrie OUTPUT_FILE = benzile din INPUT_FILE + masca Construibil + adâncimea în pădure.
+    Dacă OUTPUT_FILE are un manifest de blocuri cu aceiași parametri, sunt rescrise doar
+    blocurile ale căror intrări (benzile blocului și pădurea din jur, pe ADANCIME_MAXIMA
+    pixeli) s-au schimbat.
+    """
     if not Path(INPUT_FILE).exists():
         print(f"EROARE: Nu găsesc '{INPUT_FILE}'.")
         return
 
-    # Ștergem fișierul vechi de output dacă există
-    if os.path.exists(OUTPUT_FILE):
-        try:
-            os.remove(OUTPUT_FILE)
-        except PermissionError:
-            print(f"EROARE: Nu pot șterge '{OUTPUT_FILE}'. Este deschis?")
-            return
-
     with rasterio.open(INPUT_FILE) as src:
-        # Copiem metadatele și adăugăm o bandă în plus
+        # Copiem metadatele și adăugăm două benzi în plus
         profile = src.profile.copy()
         nr_benzi_originale = src.count
         
         profile.update(
-            count=nr_benzi_originale + 1, # Adăugăm un strat
+            count=nr_benzi_originale + 2, # Construibil + Adâncime pădure
             BIGTIFF='YES',
             compress='lzw',
             tiled=True
@@ -56,32 +100,40 @@ def calculeaza_construibil():
         idx_apa = 4
         idx_urban = 5
 
-        print("--- Pasul 1: Calculăm 'Pădurea Adâncă' (Global) ---")
-        # Citim toată banda de pădure pentru a face eroziunea corect
-        print("Citesc stratul de pădure...")
-        banda_padure = src.read(idx_padure)
-        
-        # Masca Pădurii: Unde valoarea este -1 (Interior Pădure)
-        mask_padure = (banda_padure == -1)
-        
-        print(f"Erodez pădurea cu {ITERATII_EROZIUNE} pixeli ({DISTANTA_INTERIOR_PADURE}m)...")
-        # True unde ești adânc în pădure (neconstruibil)
-        mask_padure_adanca = binary_erosion(mask_padure, iterations=ITERATII_EROZIUNE)
-        
-        del banda_padure 
-        print("Calcul pădure finalizat.")
+        # Tot ce determină un bloc de output în afară de datele de intrare
+        parametri = json.dumps({
+            "iteratii_eroziune": ITERATII_EROZIUNE, "adancime_maxima": ADANCIME_MAXIMA, "dimensiuni": [src.width, src.height],
+            "benzi": src.count, "dtypes": list(src.dtypes), "descrieri": list(src.descriptions),
+            "transform": list(src.transform), "crs": str(src.crs),
+        })
+        manifest = ManifestBlocuri(OUTPUT_FILE, parametri)
+        incremental = manifest.vechi is not None and not complet
 
-        print(f"\n--- Pasul 2: Generăm '{OUTPUT_FILE}' ---")
+        # Fără manifest valid: ștergem fișierul vechi de output și îl scriem complet
+        if not incremental and os.path.exists(OUTPUT_FILE):
+            try:
+                os.remove(OUTPUT_FILE)
+            except PermissionError:
+                print(f"EROARE: Nu pot șterge '{OUTPUT_FILE}'. Este deschis?")
+                return
+
+        print(f"\n--- Generăm '{OUTPUT_FILE}'{' (doar blocurile schimbate)' if incremental else ''} ---")
         
-        with rasterio.open(OUTPUT_FILE, 'w', **profile) as dst:
-            # Setăm descrierile benzilor
-            dst.descriptions = src.descriptions + ("Construibil (Bool)",)
+        with rasterio.open(OUTPUT_FILE, 'r+') if incremental else rasterio.open(OUTPUT_FILE, 'w', **profile) as dst:
+            if not incremental:
+                # Setăm descrierile benzilor
+                dst.descriptions = src.descriptions + ("Construibil (Bool)", "Adâncime Pădure (pixeli)")
+                # Pragul cu care a fost calculată banda Construibil (scor_final.py îl citește)
+                dst.update_tags(DISTANTA_INTERIOR_PADURE=DISTANTA_INTERIOR_PADURE,
+                                ADANCIME_MAXIMA=ADANCIME_MAXIMA, PIXEL_SIZE=PIXEL_SIZE)
             
             # Definim indecșii pentru scrierea datelor originale (de la 1 la 5)
             indexes_original = list(range(1, nr_benzi_originale + 1))
             
             windows = [window for ij, window in dst.block_windows(1)]
-            print(f"Procesez {len(windows)} blocuri de date...")
+            manifest.incepe(len(windows), incremental)
+            print(f"Procesez {len(windows)} blocuri de date (adâncimea pădurii până la {ADANCIME_MAXIMA} pixeli, "
+                  f"pădure adâncă peste {DISTANTA_INTERIOR_PADURE}m)...")
             
             # Încercăm să importăm tqdm, dacă nu, folosim iterator simplu
             try:
@@ -90,46 +142,56 @@ def calculeaza_construibil():
             except ImportError:
                 iterator = windows
 
-            for window in iterator:
+            rescrise = 0
+            for i, window in enumerate(iterator):
                 # 1. Citim datele originale
                 data_block = src.read(window=window)
+
+                # Amprenta intrărilor: blocul și pădurea din jur (adâncimea vede ADANCIME_MAXIMA pixeli)
+                window_halo = fereastra_halo(window, ADANCIME_MAXIMA, src.height, src.width)
+                padure_halo = src.read(idx_padure, window=window_halo)
+                amprenta = amprenta_bloc(data_block, padure_halo)
+                manifest.actualizeaza(i, amprenta)
+                if amprenta == manifest.veche(i):
+                    continue
+                rescrise += 1
                 
                 # 2. Scriem datele originale în straturile 1-5
                 # --- AICI ERA EROAREA: Specificăm indexes explicit ---
                 dst.write(data_block, window=window, indexes=indexes_original)
                 
-                # 3. Calculăm Stratul CONSTRUIBIL
-                b_drum = data_block[idx_drum - 1]
-                b_rail = data_block[idx_rail - 1]
-                b_apa  = data_block[idx_apa - 1]
-                b_urban= data_block[idx_urban - 1]
-                
-                # Inițializăm cu 1 (True - Construibil)
-                construibil = np.ones(b_drum.shape, dtype=np.uint8)
-                
-                # APLICĂM REGULILE DE EXCLUDERE (False = 0)
-                # Obstacole directe (-1 înseamnă "pe obiect")
-                construibil[b_drum == -1] = 0
-                construibil[b_rail == -1] = 0
-                construibil[b_apa == -1]  = 0
-                construibil[b_urban == -1]= 0
-                
-                # Pădurea Adâncă (tăiem bucata din masca globală)
-                r_start = window.row_off
-                r_end = r_start + window.height
-                c_start = window.col_off
-                c_end = c_start + window.width
-                
-                block_padure_adanca = mask_padure_adanca[r_start:r_end, c_start:c_end]
-                
-                # Unde e pădure adâncă, punem 0
-                construibil[block_padure_adanca] = 0
+                # 3. Adâncimea în pădure (calculată local, pe bloc + halo)
+                adancime = adancime_padure(padure_halo, window, window_halo)
+
+                # 4. Calculăm Stratul CONSTRUIBIL cu pragul implicit
+                construibil = masca_construibil(data_block[idx_drum - 1], data_block[idx_rail - 1],
+                                                data_block[idx_apa - 1], data_block[idx_urban - 1], adancime)
                 
-                # 4. Scriem noul strat (Ultima bandă - index 6)
-                dst.write(construibil, window=window, indexes=profile['count'])
+                # 5. Scriem noile straturi (index 6 și 7)
+                dst.write(construibil, window=window, indexes=nr_benzi_originale + 1)
+                dst.write(adancime, window=window, indexes=nr_benzi_originale + 2)
+
+    manifest.salveaza()
+    print(f"\n✅ SUCCES! Fișierul '{OUTPUT_FILE}' are acum {profile['count']} benzi "
+          f"({rescrise} din {len(windows)} blocuri rescrise).")
+    print("Banda 6 este masca 'Construibil', banda 7 adâncimea în pădure.")
 
-    print(f"\n✅ SUCCES! Fișierul '{OUTPUT_FILE}' are acum {profile['count']} benzi.")
-    print("Ultima bandă este masca 'Construibil'.")
+def adancime_padure(padure_halo, window, window_halo):
+    """
+    Adâncimea în pădure (float32, tăiată la ADANCIME_MAXIMA) pe 'window', din banda de pădure
+    citită pe 'window_halo' (fereastra extinsă cu ADANCIME_MAXIMA pixeli, tăiată la marginea
+    rasterului). În afara rasterului nu e pădure (ca la binary_erosion), deci bordăm cu un pixel
+    fără pădure. Pe marginile interioare ale halo-ului bordura e la peste ADANCIME_MAXIMA pixeli
+    de bloc, deci după tăiere rezultatul e identic cu transformata pe tot rasterul.
+    """
+    # Masca Pădurii: Unde valoarea este -1 (Interior Pădure)
+    mask_padure = np.pad(padure_halo == -1, 1)
+    adancime = distance_transform_cdt(mask_padure, metric="taxicab")
+
+    r0 = window.row_off - window_halo.row_off + 1
+    c0 = window.col_off - window_halo.col_off + 1
+    adancime = adancime[r0:r0 + window.height, c0:c0 + window.width]
+    return np.minimum(adancime, ADANCIME_MAXIMA).astype(np.float32)
 
 # Funcție de test
 def test_interogare(row, col):
@@ -137,16 +199,17 @@ def test_interogare(row, col):
     with rasterio.open(OUTPUT_FILE) as src:
         window = rasterio.windows.Window(col, row, 1, 1)
         vals = src.read(window=window)
-        # Ultima valoare e construibil
-        is_buildable = bool(vals[-1][0][0])
+        # Banda 6 e construibil, banda 7 adâncimea în pădure
+        is_buildable = bool(vals[IDX_CONSTRUIBIL - 1][0][0])
         print(f"\nPixel [{row}, {col}]:")
         print(f"  Construibil: {'DA' if is_buildable else 'NU (Restricționat)'}")
+        print(f"  Adâncime în pădure: {vals[IDX_ADANCIME_PADURE - 1][0][0] * PIXEL_SIZE:g}m")
         
         descriptions = src.descriptions
         # Verificăm de ce nu e construibil
         if not is_buildable:
             found_reason = False
-            for i, val in enumerate(vals[:-1]):
+            for i, val in enumerate(vals[:IDX_CONSTRUIBIL - 1]):
                 val_num = val[0][0]
                 if val_num == -1:
                     print(f"  - Blocat de: {descriptions[i]}")
@@ -155,5 +218,10 @@ def test_interogare(row, col):
                 print("  - Blocat de: Pădure Adâncă (Eroziune)")
 
 if __name__ == "__main__":
-    calculeaza_construibil()
+    parser = argparse.ArgumentParser(description="Adaugă masca Construibil la cubul master")
+    parser.add_argument("--complet", action="store_true",
+                        help="Rescrie toate blocurile (ignoră manifestul de blocuri)")
+    args = parser.parse_args()
+
+    calculeaza_construibil(args.complet)
     test_interogare(12000, 12000)
\ No newline at end of file
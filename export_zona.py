@@ -1,6 +1,8 @@
 import argparse
+import io
 import rasterio
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import numpy as np
 from rasterio.warp import transform_bounds
 from rasterio.windows import from_bounds
@@ -18,48 +20,44 @@ if sys.platform.startswith('win'):
 INPUT_FILE = "MATRICE_SCOR_FINAL.tif"
 OUTPUT_PNG = "zona_selectata.png"
 
-def extract_region(lat1, lon1, lat2, lon2):
-    if not Path(INPUT_FILE).exists():
-        print(f"EROARE: Nu gasesc fisierul '{INPUT_FILE}'")
-        return
-
-    print(f"--- Extragere Zona (cu Legenda) ---")
-    print(f"Coordonate: {lat1}, {lon1} <-> {lat2}, {lon2}")
-
-    with rasterio.open(INPUT_FILE) as src:
-        # 1. Calculăm limitele
-        south, north = min(lat1, lat2), max(lat1, lat2)
-        west, east = min(lon1, lon2), max(lon1, lon2)
-
-        try:
-            left, bottom, right, top = transform_bounds(
-                "EPSG:4326", src.crs, west, south, east, north
-            )
-        except Exception as e:
-            print(f"Eroare conversie coordonate: {e}")
-            return
-
-        # 2. Calculăm fereastra
-        window = from_bounds(left, bottom, right, top, transform=src.transform)
-        window = window.round_offsets().round_lengths()
-        
-        # 3. Citim datele
-        try:
-            data = src.read(1, window=window)
-        except Exception:
-            print("EROARE: Coordonate in afara hartii.")
-            return
-
-        if data.size == 0:
-            print("EROARE: Zona goala.")
-            return
-
-    # --- VIZUALIZARE ---
-    print("Generez imaginea...")
-    
+def citeste_zona(src, lat1, lon1, lat2, lon2):
+    """Citește din rasterul de scor fereastra corespunzătoare BBox-ului GPS."""
+    # 1. Calculăm limitele
+    south, north = min(lat1, lat2), max(lat1, lat2)
+    west, east = min(lon1, lon2), max(lon1, lon2)
+
+    try:
+        left, bottom, right, top = transform_bounds(
+            "EPSG:4326", src.crs, west, south, east, north
+        )
+    except Exception as e:
+        raise ValueError(f"Eroare conversie coordonate: {e}")
+
+    # 2. Calculăm fereastra
+    window = from_bounds(left, bottom, right, top, transform=src.transform)
+    window = window.round_offsets().round_lengths()
+
+    # 3. Citim datele
+    try:
+        data = src.read(1, window=window)
+    except Exception:
+        raise ValueError("Coordonate in afara hartii.")
+
+    if data.size == 0:
+        raise ValueError("Zona goala.")
+
+    return data
+
+def randeaza_png(data):
+    """
+    Desenează harta de scor (cu legendă) și returnează imaginea PNG ca bytes.
+    Folosește API-ul orientat pe obiecte (fără pyplot), deci poate rula în paralel pe mai multe fire.
+    """
     # Creăm o figură mai lată pentru a face loc legendei
-    fig, ax = plt.subplots(figsize=(12, 10))
-    
+    fig = Figure(figsize=(12, 10))
+    FigureCanvasAgg(fig)
+    ax = fig.subplots()
+
     # A. FUNDALUL GRI (Zone Interzise: -1)
     mask_interzis = (data == -1)
     cmap_interzis = mcolors.ListedColormap(['#404040']) # Gri închis
@@ -77,19 +75,42 @@ def extract_region(lat1, lon1, lat2, lon2):
     # --- LEGENDA 1: Bara de Culori (Scor) ---
     cbar = fig.colorbar(im, ax=ax, fraction=0.046, pad=0.04)
     cbar.set_label('Punctaj Tactic (0 - 45)', rotation=270, labelpad=15, fontsize=10)
-    
+
     # --- LEGENDA 2: Zona Interzisă ---
     # Creăm un "patch" (pătrățel de culoare) manual
     grey_patch = mpatches.Patch(color='#404040', label='Zona Restrictionata\n(Drum/Apa/Urban/Padure)')
-    
+
     # Adăugăm legenda în colțul din stânga sus (sau unde dorești)
-    plt.legend(handles=[grey_patch], loc='upper left', bbox_to_anchor=(0, 1.05), frameon=True)
+    ax.legend(handles=[grey_patch], loc='upper left', bbox_to_anchor=(0, 1.05), frameon=True)
+
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', bbox_inches='tight', dpi=150)
+    return buf.getvalue()
+
+def extract_region(lat1, lon1, lat2, lon2, output_png=OUTPUT_PNG):
+    if not Path(INPUT_FILE).exists():
+        print(f"EROARE: Nu gasesc fisierul '{INPUT_FILE}'")
+        return
+
+    print(f"--- Extragere Zona (cu Legenda) ---")
+    print(f"Coordonate: {lat1}, {lon1} <-> {lat2}, {lon2}")
+
+    with rasterio.open(INPUT_FILE) as src:
+        try:
+            data = citeste_zona(src, lat1, lon1, lat2, lon2)
+        except ValueError as e:
+            print(f"EROARE: {e}")
+            return
+
+    # --- VIZUALIZARE ---
+    print("Generez imaginea...")
+    png = randeaza_png(data)
 
     # Salvăm
-    plt.savefig(OUTPUT_PNG, bbox_inches='tight', dpi=150)
-    plt.close()
-    
-    print(f"✅ SUCCES! Imaginea salvata ca: '{OUTPUT_PNG}'")
+    with open(output_png, "wb") as f:
+        f.write(png)
+
+    print(f"✅ SUCCES! Imaginea salvata ca: '{output_png}'")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
@@ -97,6 +118,7 @@ if __name__ == "__main__":
     parser.add_argument("lon1", type=float)
     parser.add_argument("lat2", type=float)
     parser.add_argument("lon2", type=float)
+    parser.add_argument("--output", default=OUTPUT_PNG, help="Fișierul PNG generat")
     args = parser.parse_args()
 
-    extract_region(args.lat1, args.lon1, args.lat2, args.lon2)
\ No newline at end of file
+    extract_region(args.lat1, args.lon1, args.lat2, args.lon2, args.output)
@@ -0,0 +1,123 @@
+import os
+import io
+import gzip
+import json
+import hashlib
+import threading
+from pathlib import Path
+
+import geopandas as gpd
+from pyproj import CRS
+from shapely import wkb
+
+# --- CONFIGURARE ---
+BASE_DIR = Path(__file__).resolve().parent
+CACHE_DIR = BASE_DIR / "cache_geometrii"
+
+# Zona de lucru implicită (aceleași 6 județe în tot pipeline-ul)
+JUDETE_TARGET = [
+    {"county": "Suceava", "country": "Romania"},
+    {"county": "Botoșani", "country": "Romania"},
+    {"county": "Iași", "country": "Romania"},
+    {"county": "Neamț", "country": "Romania"},
+    {"county": "Bacău", "country": "Romania"},
+    {"county": "Vaslui", "country": "Romania"}
+]
+
+# Toleranțe de simplificare (grade WGS84) pentru browser. 0 = geometria completă.
+TOLERANTE = [0.0, 0.0005, 0.002, 0.01]
+TOLERANTA_IMPLICITA = 0.0005  # ~50m, suficient pentru conturul de pe hartă
+
+_memorie = {}
+_lock = threading.Lock()
+
+def cheie_judete(judete_lista=JUDETE_TARGET):
+    """Cheie stabilă pentru o listă de județe (ordinea nu contează)."""
+    canonic = sorted(json.dumps(j, sort_keys=True, ensure_ascii=False) for j in judete_lista)
+    return hashlib.sha1("|".join(canonic).encode("utf-8")).hexdigest()[:16]
+
+def _folder(judete_lista):
+    folder = CACHE_DIR / cheie_judete(judete_lista)
+    folder.mkdir(parents=True, exist_ok=True)
+    return folder
+
+def _nume_crs(crs):
+    crs = CRS.from_user_input(crs)
+    epsg = crs.to_epsg()
+    if epsg is not None:
+        return f"epsg{epsg}"
+    return "crs_" + hashlib.sha1(crs.to_wkt().encode("utf-8")).hexdigest()[:12]
+
+def _din_memorie(cheie, calculeaza):
+    with _lock:
+        if cheie in _memorie:
+            return _memorie[cheie]
+    valoare = calculeaza()
+    with _lock:
+        _memorie[cheie] = valoare
+    return valoare
+
+def _scrie_atomic(cale, date):
+    tmp = cale.with_name(f"{cale.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(date)
+    os.replace(tmp, cale)
+
+def judete(judete_lista=JUDETE_TARGET):
+    """GeoDataFrame cu poligoanele județelor (WGS84). Geocodează doar prima dată."""
+    def calculeaza():
+        cale = _folder(judete_lista) / "judete.geojson"
+        if cale.exists():
+            return gpd.read_file(cale)
+
+        import osmnx as ox
+        print(f"Geocodez {len(judete_lista)} județe (prima rulare, se salvează în '{cale.parent.name}')...")
+        gdf = ox.geocode_to_gdf(judete_lista)
+        _scrie_atomic(cale, gdf.to_json().encode("utf-8"))
+        return gdf
+
+    return _din_memorie(("judete", cheie_judete(judete_lista)), calculeaza)
+
+def uniune(judete_lista=JUDETE_TARGET, crs="EPSG:4326"):
+    """Uniunea județelor ca geometrie shapely, reproiectată în 'crs' (ex: CRS-ul rasterului)."""
+    nume = _nume_crs(crs)
+
+    def calculeaza():
+        cale = _folder(judete_lista) / f"uniune_{nume}.wkb"
+        if cale.exists():
+            return wkb.loads(cale.read_bytes())
+
+        gdf = judete(judete_lista)
+        geometrie = gdf.union_all() if hasattr(gdf, "union_all") else gdf.unary_union
+        if nume != "epsg4326":
+            geometrie = gpd.GeoSeries([geometrie], crs="EPSG:4326").to_crs(crs).iloc[0]
+        _scrie_atomic(cale, wkb.dumps(geometrie))
+        return geometrie
+
+    return _din_memorie(("uniune", cheie_judete(judete_lista), nume), calculeaza)
+
+def geojson_simplificat(toleranta=TOLERANTA_IMPLICITA, judete_lista=JUDETE_TARGET):
+    """
+    GeoJSON-ul județelor simplificat la toleranța cea mai apropiată din TOLERANTE.
+    Returnează (json_bytes, gzip_bytes, etag), gata de servit browserului.
+    """
+    toleranta = min(TOLERANTE, key=lambda t: abs(t - toleranta))
+
+    def calculeaza():
+        folder = _folder(judete_lista)
+        cale = folder / f"judete_tol{toleranta:g}.geojson"
+        if cale.exists():
+            date = cale.read_bytes()
+        else:
+            gdf = judete(judete_lista).copy()
+            if toleranta > 0:
+                gdf["geometry"] = gdf.geometry.simplify(toleranta, preserve_topology=True)
+            date = gdf.to_json().encode("utf-8")
+            _scrie_atomic(cale, date)
+
+        buf = io.BytesIO()
+        with gzip.GzipFile(fileobj=buf, mode="wb", mtime=0) as gz:
+            gz.write(date)
+        etag = hashlib.sha1(date).hexdigest()[:20]
+        return date, buf.getvalue(), etag
+
+    return _din_memorie(("geojson", cheie_judete(judete_lista), toleranta), calculeaza)
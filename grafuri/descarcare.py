@@ -1,6 +1,7 @@
 import osmnx as ox
 import matplotlib.pyplot as plt
 import sys
+from pathlib import Path
 
 
 
@@ -11,30 +12,25 @@ if sys.platform.startswith('win'):
     except AttributeError:
         pass
 
+# Modulul comun de geometrii se află în rădăcina proiectului
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import geometrie_judete
+
 # Configurăm log-urile
 ox.settings.log_console = True
 ox.settings.use_cache = True
 
 # Definim lista folosind DICTIONARE (Căutare structurată)
 # Asta elimină confuzia între Oraș și Județ
-queries = [
-    {"county": "Suceava", "country": "Romania"},
-    {"county": "Botoșani", "country": "Romania"}, # Cu diacritice e mai sigur în OSM
-    {"county": "Neamț", "country": "Romania"},
-    {"county": "Iași", "country": "Romania"},
-    {"county": "Bacău", "country": "Romania"},
-    {"county": "Vaslui", "country": "Romania"}
-]
+queries = geometrie_judete.JUDETE_TARGET
 
 print("--- 1. Căutăm limitele administrative (Poligoanele)... ---")
 
 try:
-    # Îi dăm lista de dicționare. OSMNX va face request pentru fiecare.
-    gdf_judete = ox.geocode_to_gdf(queries)
+    # Geometria vine din cache-ul local; OSMNX e apelat doar la prima rulare.
+    # Primim direct uniunea județelor (o singură formă mare)
+    zona_totala = geometrie_judete.uniune(queries)
     print("Victorie! Am găsit toate cele 6 județe.")
-    
-    # Le unim într-o singură formă mare
-    zona_totala = gdf_judete.unary_union
     print("Am unit județele într-o singură regiune (Nord-Est).")
 
 except Exception as e:
@@ -3,6 +3,7 @@ import rasterio
 from rasterio import features
 import numpy as np
 import sys
+from pathlib import Path
 
 
 
@@ -13,6 +14,10 @@ if sys.platform.startswith('win'):
     except AttributeError:
         pass
 
+# Modulul comun de geometrii se află în rădăcina proiectului
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import geometrie_judete
+
 # Setări OSMnx
 ox.settings.log_console = True
 ox.settings.use_cache = True
@@ -23,19 +28,11 @@ fisier_sursa_drumuri = "../grafuri/matrice_drumuri_10m.tif" # Îl folosim ca șa
 fisier_output_rail = "matrice_cai_ferate_10m.tif"
 
 # 1. Definim zona (aceleași județe)
-queries = [
-    {"county": "Suceava", "country": "Romania"},
-    {"county": "Botoșani", "country": "Romania"},
-    {"county": "Neamț", "country": "Romania"},
-    {"county": "Iași", "country": "Romania"},
-    {"county": "Bacău", "country": "Romania"},
-    {"county": "Vaslui", "country": "Romania"}
-]
+queries = geometrie_judete.JUDETE_TARGET
 
 print("--- 1. Obținem conturul zonei (Poligoanele) ---")
 try:
-    gdf_judete = ox.geocode_to_gdf(queries)
-    zona_totala = gdf_judete.unary_union
+    zona_totala = geometrie_judete.uniune(queries)
     print("Zona definită cu succes.")
 except Exception as e:
     print(f"Eroare la geocodare: {e}")
@@ -5,7 +5,6 @@ import numpy as np
 from pathlib import Path
 from shapely.geometry import box
 import rasterio.mask
-import osmnx as ox
 import warnings
 from rasterio.warp import reproject, Resampling
 import sys
@@ -19,6 +18,10 @@ if sys.platform.startswith('win'):
     except AttributeError:
         pass
 
+# Modulul comun de geometrii se află în rădăcina proiectului
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import geometrie_judete
+
 # Ignorăm avertismentele pentru un output curat
 warnings.filterwarnings("ignore")
 
@@ -28,14 +31,7 @@ TEMP_DIR = Path("./tmp")
 FOLDER_VEGETATIE = "CLMS_CLCplus_RASTER_2018_010m_eu_03035_V1_1"
 
 # --- 1. DEFINIM ZONA DE LUCRU ---
-JUDETE_TARGET = [
-    {"county": "Suceava", "country": "Romania"},
-    {"county": "Botoșani", "country": "Romania"},
-    {"county": "Iași", "country": "Romania"},
-    {"county": "Neamț", "country": "Romania"},
-    {"county": "Bacău", "country": "Romania"},
-    {"county": "Vaslui", "country": "Romania"}
-]
+JUDETE_TARGET = geometrie_judete.JUDETE_TARGET
 
 # --- 2. FUNCȚII UTILITARE ---
 
@@ -177,8 +173,7 @@ if __name__ == "__main__":
 
     print("--- Pasul 1: Geometria județelor ---")
     try:
-        gdf_judete = ox.geocode_to_gdf(JUDETE_TARGET)
-        zona_totala_poligon = gdf_judete.unary_union 
+        zona_totala_poligon = geometrie_judete.uniune(JUDETE_TARGET)
     except Exception as e:
         print(f"Eroare: {e}")
         exit()
@@ -5,11 +5,9 @@ import numpy as np
 from pathlib import Path
 from shapely.geometry import box
 import rasterio.mask
-import osmnx as ox
 import warnings
 from rasterio.warp import reproject, Resampling, transform_bounds
 from rasterio.windows import from_bounds
-import geopandas as gpd
 from hda import Client, Configuration
 import sys
 
@@ -22,6 +20,10 @@ if sys.platform.startswith('win'):
     except AttributeError:
         pass
 
+# Modulul comun de geometrii se află în rădăcina proiectului
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import geometrie_judete
+
 # Ignorăm avertismentele inutile
 warnings.filterwarnings("ignore")
 
@@ -46,14 +48,7 @@ YEAR = "2018"
 TARGET_FOLDER_NAME = "CLMS_CLCplus_RASTER_2018_010m_eu_03035_V1_1"
 
 # 4. Zona de Interes
-JUDETE_TARGET = [
-    {"county": "Suceava", "country": "Romania"},
-    {"county": "Botoșani", "country": "Romania"},
-    {"county": "Iași", "country": "Romania"},
-    {"county": "Neamț", "country": "Romania"},
-    {"county": "Bacău", "country": "Romania"},
-    {"county": "Vaslui", "country": "Romania"}
-]
+JUDETE_TARGET = geometrie_judete.JUDETE_TARGET
 
 # ==========================================
 #           FUNCȚII UTILITARE
@@ -138,7 +133,7 @@ def maskTheMap(matrice_valori):
         
     return flavoured
 
-def surgical_extraction(source_folder_name, output_filename, template_path, target_geometry_wgs84):
+def surgical_extraction(source_folder_name, output_filename, template_path, judete):
     """Extrage, Aliniază, Reproiectează și Maschează datele."""
     source_folder = TEMP_DIR / source_folder_name
     
@@ -166,9 +161,7 @@ def surgical_extraction(source_folder_name, output_filename, template_path, targ
 
             # --- CONVERSIE POLIGON: WGS84 -> UTM ---
             print("Convertim forma județelor în sistem metric...")
-            poly_series = gpd.GeoSeries([target_geometry_wgs84], crs="EPSG:4326")
-            poly_utm = poly_series.to_crs(dst_crs)
-            target_geometry_utm = poly_utm.geometry[0]
+            target_geometry_utm = geometrie_judete.uniune(judete, crs=dst_crs)
 
             # 2. Analizăm SURSA (Europa LAEA)
             with rasterio.open(source_path) as src:
@@ -256,8 +249,7 @@ if __name__ == "__main__":
     # 1. Calcul Geometrie Globală
     print("--- Pasul 1: Calcul Geometrie Județe (WGS84) ---")
     try:
-        gdf_judete = ox.geocode_to_gdf(JUDETE_TARGET)
-        zona_totala_wgs84 = gdf_judete.unary_union
+        zona_totala_wgs84 = geometrie_judete.uniune(JUDETE_TARGET)
         
         # Extragem Bounding Box-ul pentru download (West, South, East, North)
         bounds = zona_totala_wgs84.bounds
@@ -282,7 +274,7 @@ if __name__ == "__main__":
         TARGET_FOLDER_NAME, 
         OUTPUT_FILE,
         TEMPLATE_FILE,
-        zona_totala_wgs84
+        JUDETE_TARGET
     )
     
     print("\nScript complet finalizat.")
\ No newline at end of file
@@ -3,11 +3,9 @@ import numpy as np
 from pathlib import Path
 from shapely.geometry import box
 import rasterio.mask
-import osmnx as ox
 import warnings
 from rasterio.warp import reproject, Resampling, transform_bounds
 from rasterio.windows import from_bounds
-import geopandas as gpd
 import sys
 
 
@@ -19,6 +17,10 @@ if sys.platform.startswith('win'):
     except AttributeError:
         pass
 
+# Modulul comun de geometrii se află în rădăcina proiectului
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import geometrie_judete
+
 warnings.filterwarnings("ignore")
 
 # --- CONFIGURARE ---
@@ -28,14 +30,7 @@ TEMP_DIR = Path("./tmp")
 FOLDER_VEGETATIE = "CLMS_CLCplus_RASTER_2018_010m_eu_03035_V1_1"
 
 # --- 1. DEFINIRE ZONA ---
-JUDETE_TARGET = [
-    {"county": "Suceava", "country": "Romania"},
-    {"county": "Botoșani", "country": "Romania"},
-    {"county": "Iași", "country": "Romania"},
-    {"county": "Neamț", "country": "Romania"},
-    {"county": "Bacău", "country": "Romania"},
-    {"county": "Vaslui", "country": "Romania"}
-]
+JUDETE_TARGET = geometrie_judete.JUDETE_TARGET
 
 def maskTheMap(matrice_valori):
     """Transformă valorile originale în scoruri militare."""
@@ -63,7 +58,7 @@ def maskTheMap(matrice_valori):
         
     return flavoured
 
-def surgical_extraction(source_folder_name, output_filename, template_path, target_geometry_wgs84):
+def surgical_extraction(source_folder_name, output_filename, template_path, judete):
     source_folder = TEMP_DIR / source_folder_name
     tif_files = list(source_folder.rglob("*.tif"))
     
@@ -87,11 +82,8 @@ def surgical_extraction(source_folder_name, output_filename, template_path, targ
 
             # --- FIX: REPROIECTĂM POLIGONUL DE TĂIERE ---
             print("Convertim forma județelor din GPS (WGS84) în Metri (UTM)...")
-            # Creăm un GeoSeries temporar pentru a face conversia matematică
-            poly_series = gpd.GeoSeries([target_geometry_wgs84], crs="EPSG:4326")
-            poly_utm = poly_series.to_crs(dst_crs)
-            # Extragem geometria convertită
-            target_geometry_utm = poly_utm.geometry[0]
+            # Conversia se face o singură dată și se păstrează în cache-ul comun
+            target_geometry_utm = geometrie_judete.uniune(judete, crs=dst_crs)
 
 
             # 2. Analizăm SURSA (Europa LAEA)
@@ -184,13 +176,12 @@ if __name__ == "__main__":
         exit()
 
     print("--- Pasul 1: Geometria județelor ---")
-    gdf_judete = ox.geocode_to_gdf(JUDETE_TARGET)
-    zona_totala_poligon_wgs84 = gdf_judete.unary_union 
+    geometrie_judete.judete(JUDETE_TARGET)
 
     print("--- Pasul 2: Extracție Chirurgicală ---")
     surgical_extraction(
         FOLDER_VEGETATIE, 
         "matrice_satelit_finala.tif",
         TEMPLATE_FILE,
-        zona_totala_poligon_wgs84
+        JUDETE_TARGET
     )
\ No newline at end of file
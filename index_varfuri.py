@@ -0,0 +1,199 @@
+import rasterio
+import numpy as np
+from rasterio.windows import Window
+from scipy.ndimage import maximum_filter
+from pathlib import Path
+import os
+import sys
+import time
+import argparse
+
+from algoritm1_tif import (GrilaDistanta, baze_din_seminte_locale, fereastraInRaster, imagineIntegrala,
+                           selectareCuRespectareDistanta, sumeDreptunghiuri)
+
+if sys.platform.startswith('win'):
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+        sys.stderr.reconfigure(encoding='utf-8')
+    except AttributeError:
+        pass
+
+# Index de vârfuri (maxime locale) al rasterului de scor, calculat o singură dată
+# după scor_final.py. Interogările pe zone mari își iau semințele din index și citesc
+# rezoluția completă doar în jurul semințelor alese.
+
+# --- CONFIGURARE ---
+INPUT_FILE = "MATRICE_SCOR_FINAL.tif"
+LATURA_TILE = 512            # pixeli; vârfurile sunt grupate pe tile-uri de această latură
+VARFURI_PER_TILE = 128       # câte vârfuri păstrăm per tile (cele mai puternice)
+RAZA_VECINATATE = 2          # suma scorurilor pozitive pe o vecinătate 5x5 (departajare)
+DISTANTA_SUPRIMARE = 8       # două vârfuri din același tile sunt la cel puțin atâția pixeli
+
+def cale_index(cale_raster):
+    """Fișierul index de lângă raster: MATRICE_SCOR_FINAL.tif -> MATRICE_SCOR_FINAL.varfuri.npz"""
+    return os.path.splitext(str(cale_raster))[0] + ".varfuri.npz"
+
+# --- CONSTRUIRE (etapa offline) ---
+def varfuri_tile(src, window):
+    """
+    Vârfurile unui tile: pixeli pozitivi egali cu maximul vecinătății 3x3, ordonați după
+    (scor, suma vecinătății) și rariți la DISTANTA_SUPRIMARE. Tile-ul e citit cu o ramă
+    de RAZA_VECINATATE pixeli, ca rezultatul să nu depindă de marginea tile-ului.
+    Returnează (rows, cols, scor, vecinatate) în coordonate globale.
+    """
+    r = RAZA_VECINATATE
+    cu_rama = Window(window.col_off - r, window.row_off - r, window.width + 2 * r, window.height + 2 * r)
+    mat = src.read(1, window=cu_rama, boundless=True, fill_value=-1)
+
+    interior = mat[r:-r, r:-r]
+    maxim_local = maximum_filter(mat, size=3, mode="constant", cval=-128)[r:-r, r:-r]
+    vecinatate = sumeDreptunghiuri(imagineIntegrala(np.maximum(mat, 0)), 2 * r + 1, 2 * r + 1)
+
+    rows, cols = np.nonzero((interior > 0) & (interior == maxim_local))
+    if rows.size == 0:
+        gol = np.zeros(0, dtype=np.int32)
+        return gol, gol, gol.astype(np.int8), gol
+
+    scor = interior[rows, cols]
+    vecin = vecinatate[rows, cols]
+    ordine = np.lexsort((-vecin, -scor.astype(np.int16)))
+
+    grila = GrilaDistanta(DISTANTA_SUPRIMARE)
+    alese = []
+    for k in ordine.tolist():
+        i, j = int(rows[k]), int(cols[k])
+        if grila.liber(i, j):
+            grila.adauga(i, j)
+            alese.append(k)
+            if len(alese) == VARFURI_PER_TILE:
+                break
+
+    alese = np.array(alese, dtype=np.intp)
+    return ((rows[alese] + window.row_off).astype(np.int32), (cols[alese] + window.col_off).astype(np.int32),
+            scor[alese].astype(np.int8), vecin[alese].astype(np.int32))
+
+def index_actual(cale_raster):
+    """
+    True dacă indexul de lângă raster a fost construit pentru versiunea lui curentă
+    (VERSIUNE_SCOR nu se schimbă când scor_final.py nu rescrie niciun bloc).
+    """
+    with rasterio.open(cale_raster) as src:
+        versiune = src.tags().get("VERSIUNE_SCOR")
+    try:
+        with np.load(cale_index(cale_raster)) as date:
+            return bool(versiune) and str(date["versiune"]) == versiune and int(date["latura_tile"]) == LATURA_TILE
+    except (FileNotFoundError, KeyError, ValueError, OSError):
+        return False
+
+def construieste_index(cale_raster=INPUT_FILE, complet=False):
+    """
+    Calculează indexul pe tot rasterul și îl salvează lângă el (scriere atomică).
+    Fără 'complet', un index deja construit pentru versiunea curentă a rasterului este păstrat.
+    """
+    if not Path(cale_raster).exists():
+        print(f"EROARE: Nu găsesc '{cale_raster}'")
+        return
+    if not complet and index_actual(cale_raster):
+        print(f"Indexul de vârfuri pentru '{cale_raster}' este la zi (aceeași VERSIUNE_SCOR), nu îl reconstruiesc.")
+        return
+
+    print(f"--- Construiesc indexul de vârfuri pentru '{cale_raster}' ---")
+    with rasterio.open(cale_raster) as src:
+        tiles_x = -(-src.width // LATURA_TILE)
+        tiles_y = -(-src.height // LATURA_TILE)
+        print(f"Procesez {tiles_x * tiles_y} tile-uri de {LATURA_TILE}x{LATURA_TILE}...")
+
+        rows, cols, scoruri, vecinatati = [], [], [], []
+        inceput = np.zeros(tiles_x * tiles_y + 1, dtype=np.int64)
+        for ty in range(tiles_y):
+            for tx in range(tiles_x):
+                window = Window(tx * LATURA_TILE, ty * LATURA_TILE,
+                                min(LATURA_TILE, src.width - tx * LATURA_TILE),
+                                min(LATURA_TILE, src.height - ty * LATURA_TILE))
+                r, c, s, v = varfuri_tile(src, window)
+                rows.append(r); cols.append(c); scoruri.append(s); vecinatati.append(v)
+                k = ty * tiles_x + tx
+                inceput[k + 1] = inceput[k] + len(r)
+
+        versiune = src.tags().get("VERSIUNE_SCOR", "")
+
+    cale = cale_index(cale_raster)
+    tmp = f"{cale}.{os.getpid()}.tmp.npz"
+    np.savez_compressed(
+        tmp,
+        rows=np.concatenate(rows), cols=np.concatenate(cols),
+        scor=np.concatenate(scoruri), vecinatate=np.concatenate(vecinatati),
+        inceput=inceput, latura_tile=LATURA_TILE, tiles_x=tiles_x, tiles_y=tiles_y,
+        versiune=np.array(versiune),
+    )
+    os.replace(tmp, cale)
+    print(f"\n✅ SUCCES! {int(inceput[-1])} vârfuri salvate în '{cale}'.")
+
+# --- INTEROGARE ---
+class IndexVarfuri:
+    """Indexul încărcat în memorie; vârfurile sunt stocate consecutiv pe tile-uri."""
+
+    def __init__(self, cale):
+        with np.load(cale) as date:
+            self.rows = date["rows"]
+            self.cols = date["cols"]
+            self.scor = date["scor"]
+            self.vecinatate = date["vecinatate"]
+            self.inceput = date["inceput"]
+            self.latura_tile = int(date["latura_tile"])
+            self.tiles_x = int(date["tiles_x"])
+            self.tiles_y = int(date["tiles_y"])
+            self.versiune = str(date["versiune"])
+
+    def candidati(self, window):
+        """Vârfurile din fereastră, [(scor, r, c)] relativ la fereastră, cele mai puternice primele."""
+        L = self.latura_tile
+        ty0, ty1 = max(window.row_off // L, 0), min((window.row_off + window.height - 1) // L, self.tiles_y - 1)
+        tx0, tx1 = max(window.col_off // L, 0), min((window.col_off + window.width - 1) // L, self.tiles_x - 1)
+        if ty1 < ty0 or tx1 < tx0:
+            return []
+
+        # Tile-urile unei linii sunt consecutive în index -> o singură felie per linie
+        felii = [slice(self.inceput[ty * self.tiles_x + tx0], self.inceput[ty * self.tiles_x + tx1 + 1])
+                 for ty in range(ty0, ty1 + 1)]
+        rows = np.concatenate([self.rows[f] for f in felii]) - window.row_off
+        cols = np.concatenate([self.cols[f] for f in felii]) - window.col_off
+        scor = np.concatenate([self.scor[f] for f in felii])
+        vecin = np.concatenate([self.vecinatate[f] for f in felii])
+
+        in_fereastra = (rows >= 0) & (rows < window.height) & (cols >= 0) & (cols < window.width)
+        rows, cols, scor, vecin = rows[in_fereastra], cols[in_fereastra], scor[in_fereastra], vecin[in_fereastra]
+        ordine = np.lexsort((-vecin, -scor.astype(np.int16)))
+        return list(zip(scor[ordine].tolist(), rows[ordine].tolist(), cols[ordine].tolist()))
+
+def baze_din_index(src, index, window, patrate, nr_baze, timpi=None):
+    """
+    Varianta lui baze_din_matrice pentru zone mari: semințele vin din index, iar
+    rasterul este citit doar în jurul lor. Returnează (lista_baze, pixeli_cititi).
+    """
+    if timpi is None:
+        timpi = {}
+
+    window = fereastraInRaster(src, window)
+
+    t = time.perf_counter()
+    candidati = index.candidati(window)
+    timpi["index"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    selectate = selectareCuRespectareDistanta(nr_baze, patrate, candidati)
+    timpi["selectie"] = time.perf_counter() - t
+
+    if not selectate:
+        print("Indexul nu are vârfuri în zona selectată.")
+        return [], 0
+
+    return baze_din_seminte_locale(src, window, selectate, patrate, nr_baze, timpi)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Construiește indexul de vârfuri al rasterului de scor")
+    parser.add_argument("--complet", action="store_true",
+                        help="Reconstruiește indexul chiar dacă e la zi")
+    args = parser.parse_args()
+
+    construieste_index(complet=args.complet)
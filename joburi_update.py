@@ -0,0 +1,247 @@
+import os
+import sys
+import json
+import time
+import uuid
+import threading
+import itertools
+import subprocess
+from collections import deque
+
+from update_pipeline import PIPELINE
+
+# --- CONFIGURARE ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MAX_LINII_LOG = 500   # câte linii de stdout păstrăm per job
+MAX_EVENIMENTE = 2000 # câte evenimente SSE păstrăm per job (liniile de log, inclusiv refresh-urile tqdm)
+MAX_JOBURI = 20       # câte joburi terminate ținem în memorie pentru /api/jobs/<id>
+TIMEOUT_OPRIRE = 10   # secunde de așteptare după terminate() înainte de kill()
+
+_joburi = {}
+_lock = threading.Lock()
+
+class UpdateInCurs(RuntimeError):
+    """Există deja un update al pipeline-ului în execuție."""
+
+    def __init__(self, job):
+        super().__init__(f"Update already running (job {job.id})")
+        self.job = job
+
+class JobUpdate:
+    """
+    Un update complet al pipeline-ului, rulat pas cu pas într-un fir separat.
+    'la_rescriere' e apelat chiar înainte de primul pas care rescrie rasterul de scor,
+    'dupa_rescriere' la sfârșitul jobului (dacă 'la_rescriere' a fost apelat).
+    """
+
+    def __init__(self, la_rescriere=None, dupa_rescriere=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.status = "queued"  # queued -> running -> success / error / cancelled
+        self.pasi = [
+            {"folder": pas["folder"], "script": pas["script"], "desc": pas["desc"],
+             "status": "pending", "durata": None}
+            for pas in PIPELINE
+        ]
+        self.pas_curent = None
+        self.creat = time.time()
+        self.pornit = None
+        self.terminat = None
+        self.eroare = None
+        self.log = deque(maxlen=MAX_LINII_LOG)
+
+        # Ultimele MAX_EVENIMENTE evenimente; '_primul' = indexul global al celui mai vechi păstrat
+        self._evenimente = deque(maxlen=MAX_EVENIMENTE)
+        self._primul = 0
+        self._cond = threading.Condition()
+        self._anulat = threading.Event()
+        self._proc = None
+        self._final = False
+        self._rescrie = [pas.get("rescrie_raster", False) for pas in PIPELINE]
+        self._la_rescriere = la_rescriere
+        self._dupa_rescriere = dupa_rescriere
+        self._eliberat = False
+
+    @property
+    def activ(self):
+        return self.status in ("queued", "running")
+
+    def to_dict(self):
+        durata = None
+        if self.pornit is not None:
+            durata = (self.terminat or time.time()) - self.pornit
+        return {
+            "id": self.id,
+            "status": self.status,
+            "pas_curent": self.pas_curent,
+            "total_pasi": len(self.pasi),
+            "pasi": self.pasi,
+            "durata": durata,
+            "eroare": self.eroare,
+            "log": list(self.log)[-20:],
+        }
+
+    # --- EVENIMENTE (SSE) ---
+    def _emite(self, tip, **date):
+        with self._cond:
+            if len(self._evenimente) == self._evenimente.maxlen:
+                self._primul += 1
+            self._evenimente.append((tip, date))
+            if tip == "done":
+                self._final = True
+            self._cond.notify_all()
+
+    def evenimente(self, de_la=0, keepalive=15):
+        """
+        Generator de evenimente (index, tip, date) începând cu 'de_la'.
+        Produce None la fiecare 'keepalive' secunde fără activitate și se oprește
+        după evenimentul final al jobului. Evenimentele mai vechi decât cele păstrate
+        sunt sărite (starea completă a pașilor e în to_dict).
+        """
+        idx = de_la
+        while True:
+            with self._cond:
+                idx = max(idx, self._primul)
+                if idx >= self._primul + len(self._evenimente):
+                    if self._final:
+                        return
+                    self._cond.wait(timeout=keepalive)
+                    idx = max(idx, self._primul)
+                noi = list(itertools.islice(self._evenimente, idx - self._primul, None))
+
+            if not noi:
+                yield None
+                continue
+
+            for tip, date in noi:
+                yield idx, tip, date
+                idx += 1
+
+    # --- CONTROL ---
+    def anuleaza(self):
+        self._anulat.set()
+        proc = self._proc
+        if proc is not None and proc.poll() is None:
+            proc.terminate()
+
+    def ruleaza(self):
+        self.status = "running"
+        self.pornit = time.time()
+        self._emite("start", job=self.id, total_pasi=len(self.pasi))
+
+        env = os.environ.copy()
+        env["PYTHONUNBUFFERED"] = "1"
+        env["PYTHONIOENCODING"] = "utf-8"
+
+        try:
+            for i, pas in enumerate(self.pasi):
+                if self._anulat.is_set():
+                    break
+
+                self.pas_curent = i
+                pas["status"] = "running"
+                self._emite("step", index=i, desc=pas["desc"], status="running")
+
+                folder = os.path.join(BASE_DIR, pas["folder"])
+                if not os.path.exists(os.path.join(folder, pas["script"])):
+                    raise RuntimeError(f"Nu găsesc scriptul: {pas['folder']}/{pas['script']}")
+
+                if self._rescrie[i] and not self._eliberat:
+                    self._eliberat = True
+                    if self._la_rescriere is not None:
+                        self._la_rescriere()
+
+                t_start = time.time()
+                self._proc = subprocess.Popen(
+                    [sys.executable, pas["script"]],
+                    cwd=folder,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    text=True,
+                    encoding="utf-8",
+                    errors="replace",
+                    env=env,
+                )
+                if self._anulat.is_set():
+                    self._proc.terminate()
+                for linie in self._proc.stdout:
+                    linie = linie.rstrip()
+                    if linie:
+                        self.log.append(linie)
+                        self._emite("log", index=i, line=linie)
+                cod = self._proc.wait()
+                self._proc = None
+
+                pas["durata"] = round(time.time() - t_start, 1)
+
+                if self._anulat.is_set():
+                    pas["status"] = "cancelled"
+                    self._emite("step", index=i, desc=pas["desc"], status="cancelled", durata=pas["durata"])
+                    break
+
+                if cod != 0:
+                    pas["status"] = "error"
+                    self._emite("step", index=i, desc=pas["desc"], status="error", durata=pas["durata"])
+                    raise RuntimeError(f"Scriptul '{pas['script']}' a ieșit cu codul {cod}")
+
+                pas["status"] = "success"
+                self._emite("step", index=i, desc=pas["desc"], status="success", durata=pas["durata"])
+
+            self.status = "cancelled" if self._anulat.is_set() else "success"
+
+        except Exception as e:
+            self.status = "error"
+            self.eroare = str(e)
+            if self._proc is not None and self._proc.poll() is None:
+                self._proc.kill()
+
+        finally:
+            if self._eliberat and self._dupa_rescriere is not None:
+                self._dupa_rescriere()
+            self.terminat = time.time()
+            self._emite("done", status=self.status, eroare=self.eroare,
+                        durata=round(self.terminat - self.pornit, 1))
+
+def _ruleaza_in_fundal(job):
+    job.ruleaza()
+
+def porneste_update(la_rescriere=None, dupa_rescriere=None):
+    """
+    Pornește un job de update (vezi JobUpdate pentru callback-uri). Ridică UpdateInCurs
+    dacă rulează deja unul.
+    """
+    with _lock:
+        for job in _joburi.values():
+            if job.activ:
+                raise UpdateInCurs(job)
+
+        # Păstrăm doar ultimele MAX_JOBURI joburi terminate
+        while len(_joburi) >= MAX_JOBURI:
+            del _joburi[next(iter(_joburi))]
+
+        job = JobUpdate(la_rescriere, dupa_rescriere)
+        _joburi[job.id] = job
+
+    threading.Thread(target=_ruleaza_in_fundal, args=(job,), daemon=True).start()
+    return job
+
+def gaseste_job(job_id):
+    return _joburi.get(job_id)
+
+def anuleaza_job(job_id, timeout=TIMEOUT_OPRIRE):
+    """Cere oprirea jobului; forțează kill() dacă procesul nu se oprește la timp."""
+    job = _joburi.get(job_id)
+    if job is None:
+        return None
+    job.anuleaza()
+
+    proc = job._proc
+    if proc is not None:
+        try:
+            proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+    return job
+
+def format_sse(idx, tip, date):
+    """Serializează un eveniment în formatul Server-Sent Events."""
+    return f"id: {idx}\nevent: {tip}\ndata: {json.dumps(date, ensure_ascii=False)}\n\n"
@@ -0,0 +1,81 @@
+import os
+import hashlib
+
+import numpy as np
+
+# Manifestul de blocuri al unui raster scris pe blocuri (construibilitate.py, scor_final.py):
+# amprenta datelor de intrare ale fiecărui bloc la ultima scriere. La o nouă rulare sunt
+# recalculate și rescrise doar blocurile ale căror intrări s-au schimbat (ex: doar stratul
+# de cale ferată), restul rămân pe loc în raster.
+# 'parametri' = tot ce nu se vede în date (grila, ponderile, eroziunea, ...): dacă diferă,
+# sau rasterul a fost modificat de altcineva după manifest, totul se recalculează.
+
+OCTETI_AMPRENTA = 16
+
+def cale_manifest(cale_raster):
+    """MATRICE_SCOR_FINAL.tif -> MATRICE_SCOR_FINAL.blocuri.npz"""
+    return os.path.splitext(str(cale_raster))[0] + ".blocuri.npz"
+
+def amprenta_bloc(*date):
+    """Amprenta (blake2b, 16 octeți) datelor de intrare ale unui bloc (unul sau mai multe array-uri)."""
+    h = hashlib.blake2b(digest_size=OCTETI_AMPRENTA)
+    for array in date:
+        array = np.ascontiguousarray(array)
+        h.update(f"{array.dtype.str}{array.shape}".encode())
+        h.update(array)
+    return h.digest()
+
+def _stare_raster(cale_raster):
+    stat = os.stat(cale_raster)
+    return f"{stat.st_mtime_ns}_{stat.st_size}"
+
+class ManifestBlocuri:
+    """
+    Amprentele blocurilor unui raster, în ordinea din block_windows. 'vechi' = amprentele
+    ultimei scrieri (None: rasterul trebuie scris complet).
+    """
+
+    def __init__(self, cale_raster, parametri):
+        self.cale_raster = str(cale_raster)
+        self.cale = cale_manifest(cale_raster)
+        self.parametri = parametri
+        self.vechi = self._incarca()
+        self.amprente = None
+
+    def _incarca(self):
+        try:
+            stare = _stare_raster(self.cale_raster)
+            with np.load(self.cale) as date:
+                if str(date["parametri"]) != self.parametri or str(date["stare"]) != stare:
+                    return None
+                return date["amprente"]
+        except (FileNotFoundError, KeyError, ValueError, OSError):
+            return None
+
+    def incepe(self, nr_blocuri, incremental=True):
+        """
+        Înainte de prima scriere: șterge manifestul de pe disc (o rulare întreruptă lasă
+        rasterul fără manifest, deci următoarea îl scrie complet). Fără 'incremental',
+        toate blocurile sunt considerate schimbate.
+        """
+        if not incremental or (self.vechi is not None and len(self.vechi) != nr_blocuri):
+            self.vechi = None
+        self.amprente = np.zeros((nr_blocuri, OCTETI_AMPRENTA), dtype=np.uint8)
+        try:
+            os.remove(self.cale)
+        except FileNotFoundError:
+            pass
+
+    def veche(self, i):
+        """Amprenta blocului i la ultima scriere, sau None."""
+        return None if self.vechi is None else self.vechi[i].tobytes()
+
+    def actualizeaza(self, i, amprenta):
+        self.amprente[i] = np.frombuffer(amprenta, dtype=np.uint8)
+
+    def salveaza(self):
+        """După închiderea rasterului (starea lui pe disc intră în manifest)."""
+        tmp = f"{self.cale}.{os.getpid()}.tmp.npz"
+        np.savez_compressed(tmp, amprente=self.amprente, parametri=np.array(self.parametri),
+                            stare=np.array(_stare_raster(self.cale_raster)))
+        os.replace(tmp, self.cale)
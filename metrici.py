@@ -0,0 +1,156 @@
+import threading
+
+# Metrici în format text Prometheus (fără dependențe externe).
+
+BUCKETE_LATENTA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BUCKETE_PIXELI = (1e4, 1e5, 1e6, 4e6, 1.6e7, 6.4e7, 2.56e8)
+
+# Numele etapelor din 'timpi' (algoritm1_tif.cauta_baze) -> funcția corespunzătoare
+ETAPE_ALGORITM = {
+    "citire": "citire",
+    "index": "IndexVarfuri.candidati",
+    "maxime": "primele100ElementeMaxime",
+    "selectie": "selectareCuRespectareDistanta",
+    "amprente": "scoruriAmprenta",
+    "selectie_amprente": "selectareAmprente",
+    "bnb": "cauta_dreptunghiuri",
+    "configuratii": "generareConfiguratii",
+    "optimizare": "optimizareConfiguratii",
+    "gps": "structurarePentruJSON",
+}
+
+_registru = []
+
+def _escape(valoare):
+    return str(valoare).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_etichete(etichete):
+    if not etichete:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in etichete) + "}"
+
+def _format_valoare(v):
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+class _Metrica:
+    tip = None
+
+    def __init__(self, nume, descriere, etichete=()):
+        self.nume = nume
+        self.descriere = descriere
+        self.etichete = tuple(etichete)
+        self._lock = threading.Lock()
+        _registru.append(self)
+
+    def _cheie(self, etichete):
+        return tuple((k, etichete[k]) for k in self.etichete)
+
+    def antet(self):
+        return [f"# HELP {self.nume} {self.descriere}", f"# TYPE {self.nume} {self.tip}"]
+
+class Counter(_Metrica):
+    tip = "counter"
+
+    def __init__(self, nume, descriere, etichete=()):
+        super().__init__(nume, descriere, etichete)
+        self._valori = {}
+
+    def inc(self, valoare=1, **etichete):
+        cheie = self._cheie(etichete)
+        with self._lock:
+            self._valori[cheie] = self._valori.get(cheie, 0) + valoare
+
+    def colecteaza(self):
+        with self._lock:
+            valori = list(self._valori.items())
+        return [f"{self.nume}{_format_etichete(k)} {_format_valoare(v)}" for k, v in valori]
+
+class Histogram(_Metrica):
+    tip = "histogram"
+
+    def __init__(self, nume, descriere, etichete=(), buckete=BUCKETE_LATENTA):
+        super().__init__(nume, descriere, etichete)
+        self.buckete = tuple(sorted(buckete))
+        self._serii = {}  # cheie -> [contoare per bucket..., suma, total]
+
+    def observe(self, valoare, **etichete):
+        cheie = self._cheie(etichete)
+        with self._lock:
+            serie = self._serii.get(cheie)
+            if serie is None:
+                serie = self._serii[cheie] = [0] * len(self.buckete) + [0.0, 0]
+            for i, limita in enumerate(self.buckete):
+                if valoare <= limita:
+                    serie[i] += 1
+                    break
+            serie[-2] += valoare
+            serie[-1] += 1
+
+    def colecteaza(self):
+        with self._lock:
+            serii = [(k, list(v)) for k, v in self._serii.items()]
+
+        linii = []
+        for cheie, serie in serii:
+            cumulat = 0
+            for limita, numar in zip(self.buckete, serie):
+                cumulat += numar
+                etichete = cheie + (("le", _format_valoare(float(limita))),)
+                linii.append(f"{self.nume}_bucket{_format_etichete(etichete)} {cumulat}")
+            etichete = cheie + (("le", "+Inf"),)
+            linii.append(f"{self.nume}_bucket{_format_etichete(etichete)} {serie[-1]}")
+            linii.append(f"{self.nume}_sum{_format_etichete(cheie)} {_format_valoare(float(serie[-2]))}")
+            linii.append(f"{self.nume}_count{_format_etichete(cheie)} {serie[-1]}")
+        return linii
+
+class Gauge(_Metrica):
+    """
+    Valoare citită la fiecare scrape dintr-o funcție: functie() -> [(dict_etichete, valoare)].
+    Cu tip="counter" expune contoare ținute în altă parte (ex: hit-urile unui cache).
+    """
+    tip = "gauge"
+
+    def __init__(self, nume, descriere, functie, etichete=(), tip="gauge"):
+        super().__init__(nume, descriere, etichete)
+        self.functie = functie
+        self.tip = tip
+
+    def colecteaza(self):
+        linii = []
+        for etichete, valoare in self.functie():
+            linii.append(f"{self.nume}{_format_etichete(self._cheie(etichete))} {_format_valoare(valoare)}")
+        return linii
+
+def genereaza():
+    """Textul complet pentru /metrics."""
+    linii = []
+    for metrica in list(_registru):
+        try:
+            valori = metrica.colecteaza()
+        except Exception:
+            continue
+        linii.extend(metrica.antet())
+        linii.extend(valori)
+    return "\n".join(linii) + "\n"
+
+# --- METRICI COMUNE ---
+CERERI_HTTP = Counter("app_http_requests_total", "Numar de cereri HTTP per ruta",
+                      ("route", "method", "status"))
+LATENTA_HTTP = Histogram("app_http_request_duration_seconds", "Latenta cererilor HTTP per ruta",
+                         ("route", "method"))
+ETAPE = Histogram("app_analysis_stage_duration_seconds", "Durata etapelor algoritmului de baze",
+                  ("stage",))
+PIXELI_CITITI = Histogram("app_analysis_pixels_read", "Pixeli cititi din rasterul de scor per cerere",
+                          ("operation",), buckete=BUCKETE_PIXELI)
+BYTES_CITITI = Counter("app_analysis_bytes_read_total", "Bytes cititi din rasterul de scor",
+                       ("operation",))
+
+def inregistreaza_analiza(timpi, pixeli, bytes_cititi, operatie="run"):
+    """Înregistrează timpii pe etape și volumul de date citit pentru o analiză."""
+    for nume, durata in timpi.items():
+        if nume in ETAPE_ALGORITM:
+            ETAPE.observe(durata, stage=ETAPE_ALGORITM[nume])
+    PIXELI_CITITI.observe(pixeli, operation=operatie)
+    BYTES_CITITI.inc(bytes_cititi, operation=operatie)
@@ -0,0 +1,342 @@
+import os
+import atexit
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+import rasterio
+
+from algoritm1_tif import banda_profil, cauta_baze, cauta_baze_streaming, dimensiuniAmprenta, fereastra_din_gps
+from cache_rezultate import CacheRezultate, cheie_cerere
+from export_zona import citeste_zona, randeaza_png
+from index_varfuri import IndexVarfuri, baze_din_index, cale_index
+from piramida_scor import PiramidaScor, cale_piramida, cauta_dreptunghiuri
+from construibilitate import iteratii_padure
+from scor_final import incarca_profiluri, prag_padure_cub
+from scor_virtual import ScorVirtual
+import metrici
+
+# --- CONFIGURARE ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+INPUT_FILE = os.path.join(BASE_DIR, "MATRICE_SCOR_FINAL.tif")
+MAX_WORKERS_CRESTERE = os.cpu_count() or 2
+# De la această mărime a ferestrei semințele vin din indexul de vârfuri (dacă există)
+PRAG_PIXELI_INDEX = 4_000_000
+# Fără index, de la această mărime zona este parcursă pe blocuri (memorie limitată)
+PRAG_PIXELI_STREAMING = 64_000_000
+MEMORIE_STREAMING_MB = 256
+# Modul virtual (SCOR_VIRTUAL=1): scorul este calculat la cerere din cubul master cu ponderile
+# din PONDERI_FILE, fără MATRICE_SCOR_FINAL.tif (ponderile noi au efect imediat)
+SCOR_VIRTUAL = os.environ.get("SCOR_VIRTUAL", "0") == "1"
+MASTER_FILE = os.path.join(BASE_DIR, "MASTER_DATASET_EXTENDED.tif")
+PONDERI_FILE = os.path.join(BASE_DIR, "ponderi_scor.json")
+
+# Fiecare fir al serverului își ține propriul handle rasterio (GDAL nu permite
+# citiri concurente pe același handle). Handle-urile rămân deschise între cereri.
+# Cât timp un fir folosește handle-ul ține lacătul lui (elibereaza așteaptă citirile în curs).
+_local = threading.local()
+_lock = threading.Lock()
+_deschise = []  # [(handle, lacătul firului care îl folosește)]
+_generatie = 0
+_blocat = False  # rasterul e rescris de pipeline (blocheaza / deblocheaza)
+_cache = None
+_pool_crestere = None
+_insotitoare = {}  # cale -> (mtime_ns, obiect încărcat)
+
+class RasterIndisponibil(RuntimeError):
+    """Rasterul de scor este rescris de pipeline-ul de update; poate fi redeschis după."""
+
+    def __init__(self):
+        super().__init__("Score raster is being rebuilt by the update pipeline, retry later")
+
+def versiune_raster():
+    """
+    Identifică versiunea rasterului pe disc (mtime + mărime). În modul virtual: a cubului
+    master și a fișierului de ponderi.
+    """
+    if SCOR_VIRTUAL:
+        stat = os.stat(MASTER_FILE)
+        try:
+            mtime_ponderi = os.stat(PONDERI_FILE).st_mtime_ns
+        except FileNotFoundError:
+            mtime_ponderi = 0
+        return (stat.st_mtime_ns, stat.st_size, mtime_ponderi)
+    stat = os.stat(INPUT_FILE)
+    return (stat.st_mtime_ns, stat.st_size)
+
+def _deschide():
+    if SCOR_VIRTUAL:
+        return ScorVirtual(MASTER_FILE, incarca_profiluri(PONDERI_FILE))
+    return rasterio.open(INPUT_FILE)
+
+@contextmanager
+def dataset_scor():
+    """
+    Context: handle-ul firului curent, redeschis dacă rasterul s-a schimbat. Rămâne
+    deschis cât timp e folosit în bloc (elibereaza nu îl închide sub o citire în curs).
+    """
+    lacat = getattr(_local, "lacat", None)
+    if lacat is None:
+        lacat = _local.lacat = threading.RLock()
+    with lacat:
+        yield _handle_fir(lacat)
+
+def _handle_fir(lacat):
+    """Apelat cu lacătul firului ținut."""
+    if _blocat:
+        raise RasterIndisponibil()
+    versiune = versiune_raster()
+    src = getattr(_local, "src", None)
+
+    if src is None or src.closed or _local.versiune != versiune or _local.generatie != _generatie:
+        if src is not None and not src.closed:
+            src.close()
+        src_nou = _deschide()
+        with _lock:
+            # blocheaza() a rulat între timp: elibereaza() nu a văzut handle-ul nou
+            if _blocat:
+                src_nou.close()
+                raise RasterIndisponibil()
+            _deschise[:] = [(s, l) for s, l in _deschise if s is not src]
+            _deschise.append((src_nou, lacat))
+        src = src_nou
+        _local.src = src
+        _local.versiune = versiune
+        _local.generatie = _generatie
+
+    return src
+
+def elibereaza():
+    """
+    Închide toate handle-urile deschise (ex: înainte ca pipeline-ul să rescrie
+    rasterul; pe Windows un fișier deschis nu poate fi șters). Un handle folosit
+    de o cerere în curs e închis după ce cererea îl eliberează.
+    """
+    global _generatie
+    with _lock:
+        _generatie += 1
+        deschise = list(_deschise)
+        _deschise.clear()
+
+    # Fără _lock: firul care ține un handle poate avea nevoie de el până termină
+    for src, lacat in deschise:
+        with lacat:
+            if not src.closed:
+                src.close()
+
+def blocheaza():
+    """
+    Închide handle-urile și refuză redeschiderea lor (RasterIndisponibil) până la
+    deblocheaza(): apelat de jobul de update înainte de pașii care rescriu rasterul.
+    """
+    global _blocat
+    with _lock:
+        _blocat = True
+    elibereaza()
+
+def deblocheaza():
+    global _blocat
+    with _lock:
+        _blocat = False
+
+def blocat():
+    return _blocat
+
+def versiune_continut(src):
+    """
+    Versiunea conținutului rasterului: eticheta scrisă de scor_final.py la fiecare
+    regenerare, sau mtime + mărime pentru rasterele mai vechi fără etichetă.
+    """
+    versiune = src.tags().get("VERSIUNE_SCOR")
+    if versiune:
+        return versiune
+    return "_".join(map(str, versiune_raster()))
+
+def cache_rezultate():
+    """Cache-ul de rezultate (creat la primul apel, partajat de toate firele)."""
+    global _cache
+    with _lock:
+        if _cache is None:
+            _cache = CacheRezultate()
+    return _cache
+
+def _fisier_insotitor(cale, clasa, src):
+    """
+    Un fișier calculat offline lângă raster (index, piramidă), încărcat o singură dată.
+    None dacă lipsește sau a fost construit pentru altă versiune a rasterului.
+    """
+    try:
+        mtime = os.stat(cale).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+    with _lock:
+        if _insotitoare.get(cale, (None,))[0] != mtime:
+            _insotitoare[cale] = (mtime, clasa(cale))
+        obiect = _insotitoare[cale][1]
+    return obiect if obiect.versiune == src.tags().get("VERSIUNE_SCOR") else None
+
+def index_varfuri(src):
+    """Indexul de vârfuri al rasterului (index_varfuri.py), sau None."""
+    return _fisier_insotitor(cale_index(INPUT_FILE), IndexVarfuri, src)
+
+def piramida(src):
+    """Piramida max/sumă a rasterului (piramida_scor.py), sau None."""
+    return _fisier_insotitor(cale_piramida(INPUT_FILE), PiramidaScor, src)
+
+def cu_prag_padure(src, prag_padure):
+    """
+    (raster, prag_diferit): rasterul de scor cu pragul pădurii adânci cerut (metri). În modul
+    virtual orice prag (recalculat din banda de adâncime a cubului); altfel doar pragul cu
+    care a fost scris rasterul (ValueError pentru altul).
+    """
+    if SCOR_VIRTUAL:
+        vedere = src.cu_prag_padure(prag_padure)
+        return vedere, iteratii_padure(vedere.prag_padure) != iteratii_padure(prag_padure_cub(src))
+    prag_raster = prag_padure_cub(src)
+    if iteratii_padure(prag_padure) != iteratii_padure(prag_raster):
+        raise ValueError(f"Rasterul de scor are pragul pădurii adânci de {prag_raster:g}m; alt prag cere "
+                         f"modul virtual (SCOR_VIRTUAL=1) sau scor_final.py --padure-adanca")
+    return src, False
+
+def pool_crestere():
+    """
+    Pool-ul de procese pentru creșterea semințelor în paralel (fereastra ajunge la
+    worker-i prin memorie partajată). Creat la prima cerere și refolosit între cereri.
+    """
+    global _pool_crestere
+    with _lock:
+        if _pool_crestere is None:
+            _pool_crestere = ProcessPoolExecutor(max_workers=MAX_WORKERS_CRESTERE)
+    return _pool_crestere
+
+def opreste_pool_crestere():
+    global _pool_crestere
+    with _lock:
+        if _pool_crestere is not None:
+            _pool_crestere.shutdown(wait=True, cancel_futures=True)
+            _pool_crestere = None
+
+# La ieșirea serverului worker-ii de creștere sunt opriți explicit
+atexit.register(opreste_pool_crestere)
+
+def mod_cautare(src, window, banda_implicita=True):
+    """
+    Modul de căutare al unei ferestre (același pentru /api/run și /api/run/batch): (index, mod),
+    mod = "index" (semințe din indexul de vârfuri), "streaming" (parcurgere pe blocuri, memorie
+    limitată) sau None (fereastra este citită complet). Modul intră în cheia de cache.
+    """
+    pixeli = window.width * window.height
+    if pixeli >= PRAG_PIXELI_INDEX:
+        index = index_varfuri(src) if banda_implicita else None
+        if index is not None:
+            return index, "index"
+        if pixeli >= PRAG_PIXELI_STREAMING:
+            return None, "streaming"
+    return None, None
+
+def ruleaza_analiza(lat1, lon1, lat2, lon2, patrate, nr_baze, foloseste_cache=True,
+                    dreptunghi=None, unitate="pixeli", optimizare=False, profil=None, prag_padure=None):
+    """
+    Rulează algoritmul de baze în procesul curent.
+    'dreptunghi' = (inaltime, latime) în 'unitate' (pixeli/metri) cere baze dreptunghiulare fixe.
+    'optimizare' alege bazele fără suprapuneri dintr-un pool mai mare (doar pe fereastra completă).
+    'profil' alege banda rasterului de scor (None = profilul implicit, banda 1).
+    'prag_padure' = pragul pădurii adânci în metri (None = cel al rasterului de scor).
+    Returnează (lista_baze, timpi, din_cache) unde 'timpi' conține durata fiecărei etape în secunde.
+    """
+    timpi = {}
+    t_start = time.perf_counter()
+
+    with dataset_scor() as src:
+        prag_diferit = False
+        if prag_padure is not None:
+            src, prag_diferit = cu_prag_padure(src, prag_padure)
+        timpi["deschidere"] = time.perf_counter() - t_start
+
+        window = fereastra_din_gps(src, lat1, lon1, lat2, lon2)
+        banda = banda_profil(src, profil)
+        # Indexul de vârfuri și piramida sunt calculate doar pentru banda 1, cu pragul rasterului
+        banda_implicita = banda == 1 and not prag_diferit
+
+        amprenta, index, piramida_bnb, streaming = None, None, None, False
+        parametri = patrate
+        if dreptunghi is not None:
+            amprenta = dimensiuniAmprenta(src, dreptunghi[0], dreptunghi[1], unitate)
+            # În cheia de cache, mărimea bazei devine forma dreptunghiului
+            parametri = f"{amprenta[0]}x{amprenta[1]}"
+            if banda_implicita and window.width * window.height >= PRAG_PIXELI_INDEX:
+                # Același rezultat ca scanarea completă, dar citim doar tile-urile promițătoare
+                piramida_bnb = piramida(src)
+        elif optimizare:
+            parametri = f"{patrate}|optimizare"
+        else:
+            index, mod = mod_cautare(src, window, banda_implicita)
+            streaming = mod == "streaming"
+            if mod is not None:
+                parametri = f"{patrate}|{mod}"
+        if banda != 1:
+            parametri = f"{parametri}|{profil}"
+        if prag_diferit:
+            parametri = f"{parametri}|padure{iteratii_padure(prag_padure)}"
+
+        if foloseste_cache:
+            t = time.perf_counter()
+            versiune = versiune_continut(src)
+            cache = cache_rezultate()
+            cache.verifica_versiune(versiune)
+            cheie = cheie_cerere(versiune, window, parametri, nr_baze)
+            baze = cache.get(cheie)
+            timpi["cache"] = time.perf_counter() - t
+
+            if baze is not None:
+                timpi["total"] = time.perf_counter() - t_start
+                return baze, timpi, True
+
+        if piramida_bnb is not None:
+            baze, pixeli = cauta_dreptunghiuri(src, piramida_bnb, window, amprenta[0], amprenta[1], nr_baze, timpi)
+        elif index is not None:
+            # Zonă mare: nu citim toată fereastra, doar vecinătatea semințelor din index
+            baze, pixeli = baze_din_index(src, index, window, patrate, nr_baze, timpi)
+        elif streaming:
+            baze, pixeli = cauta_baze_streaming(src, window, patrate, nr_baze, timpi, MEMORIE_STREAMING_MB, banda)
+        else:
+            baze = cauta_baze(src, lat1, lon1, lat2, lon2, patrate, nr_baze, timpi=timpi, window=window,
+                              amprenta=amprenta, executor=pool_crestere(), optimizare=optimizare, banda=banda)
+            pixeli = window.width * window.height
+
+        if foloseste_cache:
+            cache.put(cheie, versiune, baze)
+        timpi["total"] = time.perf_counter() - t_start
+
+        metrici.inregistreaza_analiza(timpi, pixeli, pixeli * np.dtype(src.dtypes[0]).itemsize)
+
+        return baze, timpi, False
+
+def randeaza_zona(lat1, lon1, lat2, lon2):
+    """
+    Generează în memorie PNG-ul de previzualizare al zonei (fără fișiere partajate pe disc).
+    Returnează (png_bytes, timpi).
+    """
+    timpi = {}
+    t_start = time.perf_counter()
+
+    with dataset_scor() as src:
+        data = citeste_zona(src, lat1, lon1, lat2, lon2)
+    timpi["citire"] = time.perf_counter() - t_start
+
+    t = time.perf_counter()
+    png = randeaza_png(data)
+    timpi["randare"] = time.perf_counter() - t
+
+    metrici.PIXELI_CITITI.observe(data.size, operation="visualize")
+    metrici.BYTES_CITITI.inc(data.nbytes, operation="visualize")
+    timpi["total"] = time.perf_counter() - t_start
+
+    return png, timpi
+
+def format_server_timing(timpi):
+    """Formatează timpii pentru header-ul HTTP 'Server-Timing' (milisecunde)."""
+    return ", ".join(f"{nume};dur={durata * 1000:.1f}" for nume, durata in timpi.items())
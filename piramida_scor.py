@@ -0,0 +1,243 @@
+import rasterio
+import numpy as np
+from rasterio.windows import Window
+from pathlib import Path
+import heapq
+import os
+import sys
+import time
+import argparse
+
+from algoritm1_tif import (GrilaDistanta, configuratiiDinAmprente, fereastraInRaster, scoruriAmprenta,
+                           structurarePentruJSON)
+
+if sys.platform.startswith('win'):
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+        sys.stderr.reconfigure(encoding='utf-8')
+    except AttributeError:
+        pass
+
+# Piramida rasterului de scor: pe fiecare nivel, maximul și suma scorurilor pozitive
+# pe blocuri (nivelul 0 = blocuri de LATURA_BLOC pixeli, fiecare nivel următor unește
+# 2x2 blocuri). Căutarea branch-and-bound o folosește ca să elimine zonele care nu pot
+# conține o bază mai bună decât cele deja găsite.
+
+# --- CONFIGURARE ---
+INPUT_FILE = "MATRICE_SCOR_FINAL.tif"
+LATURA_BLOC = 64      # pixeli per bloc la nivelul 0 (și latura tile-urilor evaluate exact)
+
+def cale_piramida(cale_raster):
+    """MATRICE_SCOR_FINAL.tif -> MATRICE_SCOR_FINAL.piramida.npz"""
+    return os.path.splitext(str(cale_raster))[0] + ".piramida.npz"
+
+# --- CONSTRUIRE (etapa offline) ---
+def _reduce_2x2(maxime, sume):
+    """Nivelul următor: max / sumă pe grupuri de 2x2 blocuri (marginea impară e completată)."""
+    linii, coloane = -(-maxime.shape[0] // 2) * 2, -(-maxime.shape[1] // 2) * 2
+    m = np.full((linii, coloane), -1, dtype=maxime.dtype)
+    s = np.zeros((linii, coloane), dtype=np.int64)
+    m[:maxime.shape[0], :maxime.shape[1]] = maxime
+    s[:sume.shape[0], :sume.shape[1]] = sume
+    m = m.reshape(linii // 2, 2, coloane // 2, 2).max(axis=(1, 3))
+    s = s.reshape(linii // 2, 2, coloane // 2, 2).sum(axis=(1, 3))
+    return m, s
+
+def piramida_actuala(cale_raster):
+    """True dacă piramida de lângă raster a fost construită pentru versiunea lui curentă."""
+    with rasterio.open(cale_raster) as src:
+        versiune = src.tags().get("VERSIUNE_SCOR")
+    try:
+        with np.load(cale_piramida(cale_raster)) as date:
+            return bool(versiune) and str(date["versiune"]) == versiune and int(date["latura_bloc"]) == LATURA_BLOC
+    except (FileNotFoundError, KeyError, ValueError, OSError):
+        return False
+
+def construieste_piramida(cale_raster=INPUT_FILE, complet=False):
+    """
+    Calculează piramida citind rasterul în benzi de LATURA_BLOC linii și o salvează lângă el.
+    Fără 'complet', o piramidă deja construită pentru versiunea curentă a rasterului este păstrată.
+    """
+    if not Path(cale_raster).exists():
+        print(f"EROARE: Nu găsesc '{cale_raster}'")
+        return
+    if not complet and piramida_actuala(cale_raster):
+        print(f"Piramida de scor pentru '{cale_raster}' este la zi (aceeași VERSIUNE_SCOR), nu o reconstruiesc.")
+        return
+
+    print(f"--- Construiesc piramida de scor pentru '{cale_raster}' ---")
+    with rasterio.open(cale_raster) as src:
+        B = LATURA_BLOC
+        blocuri_y, blocuri_x = -(-src.height // B), -(-src.width // B)
+        maxime = np.full((blocuri_y, blocuri_x), -1, dtype=np.int8)
+        sume = np.zeros((blocuri_y, blocuri_x), dtype=np.int64)
+
+        for by in range(blocuri_y):
+            banda = src.read(1, window=Window(0, by * B, blocuri_x * B, B), boundless=True, fill_value=-1)
+            banda = banda.reshape(B, blocuri_x, B)
+            maxime[by] = banda.max(axis=(0, 2))
+            sume[by] = np.maximum(banda, 0).sum(axis=(0, 2), dtype=np.int64)
+
+        versiune = src.tags().get("VERSIUNE_SCOR", "")
+
+    niveluri = {"max_0": maxime, "suma_0": sume}
+    nivel = 0
+    while maxime.shape[0] > 1 or maxime.shape[1] > 1:
+        maxime, sume = _reduce_2x2(maxime, sume)
+        nivel += 1
+        niveluri[f"max_{nivel}"], niveluri[f"suma_{nivel}"] = maxime, sume
+
+    cale = cale_piramida(cale_raster)
+    tmp = f"{cale}.{os.getpid()}.tmp.npz"
+    np.savez_compressed(tmp, latura_bloc=LATURA_BLOC, niveluri=nivel + 1, versiune=np.array(versiune), **niveluri)
+    os.replace(tmp, cale)
+    print(f"\n✅ SUCCES! Piramidă cu {nivel + 1} niveluri salvată în '{cale}'.")
+
+# --- CĂUTARE BRANCH-AND-BOUND ---
+class PiramidaScor:
+    """Piramida încărcată în memorie (câțiva MB chiar pentru rasterul întreg)."""
+
+    def __init__(self, cale):
+        with np.load(cale) as date:
+            self.latura = int(date["latura_bloc"])
+            niveluri = int(date["niveluri"])
+            self.maxime = [date[f"max_{n}"] for n in range(niveluri)]
+            self.sume = [date[f"suma_{n}"] for n in range(niveluri)]
+            self.versiune = str(date["versiune"])
+
+    def limita(self, nivel, r0, c0, r1, c1, arie):
+        """
+        Limită superioară pentru suma oricărui dreptunghi de 'arie' pixeli inclus în
+        pixelii [r0, r1) x [c0, c1): min(suma pozitivă a blocurilor, arie x maximul lor).
+        """
+        S = self.latura << nivel
+        felie = (slice(r0 // S, (r1 - 1) // S + 1), slice(c0 // S, (c1 - 1) // S + 1))
+        maxim = int(self.maxime[nivel][felie].max())
+        if maxim <= 0:
+            return 0
+        return min(int(self.sume[nivel][felie].sum()), arie * maxim)
+
+def cauta_dreptunghiuri(src, piramida, window, linii, coloane, nr_baze, timpi=None):
+    """
+    Cele mai bune 'nr_baze' dreptunghiuri linii x coloane care nu se suprapun, ca
+    amprente_din_matrice, dar fără să citească toată fereastra: tile-urile (pozițiile
+    colțului stânga-sus) sunt explorate în ordinea limitei superioare din piramidă și
+    sunt evaluate exact doar cele care pot încă bate a k-a bază găsită.
+    Returnează (lista_baze, pixeli_cititi).
+    """
+    if timpi is None:
+        timpi = {}
+    window = fereastraInRaster(src, window)
+    if linii > window.height or coloane > window.width:
+        print(f"Nu încape niciun dreptunghi {linii}x{coloane} în zonă.")
+        return [], 0
+
+    t = time.perf_counter()
+    arie = linii * coloane
+    # Colțurile stânga-sus posibile (coordonate absolute, capăt exclusiv)
+    ar0, ac0 = window.row_off, window.col_off
+    ar1, ac1 = ar0 + window.height - linii + 1, ac0 + window.width - coloane + 1
+
+    def intrare_tile(nivel, tr, tc):
+        S = piramida.latura << nivel
+        r0, c0 = max(tr, ar0), max(tc, ac0)
+        r1, c1 = min(tr + S, ar1), min(tc + S, ac1)
+        if r0 >= r1 or c0 >= c1:
+            return None
+        limita = piramida.limita(nivel, r0, c0, r1 - 1 + linii, c1 - 1 + coloane, arie)
+        if limita <= 0:
+            return None
+        # La egalitate tile-ul se desface înaintea candidaților (tipul 0 < 1): ordinea rasterului rămâne exactă
+        return (-limita, 0, r0, c0, (nivel, tr, tc))
+
+    # Pornim de la nivelul la care un tile acoperă toată fereastra
+    nivel_sus = len(piramida.maxime) - 1
+    while nivel_sus > 0 and (piramida.latura << (nivel_sus - 1)) >= max(window.height, window.width):
+        nivel_sus -= 1
+    S = piramida.latura << nivel_sus
+    coada = []
+    for tr in range(ar0 // S * S, ar1, S):
+        for tc in range(ac0 // S * S, ac1, S):
+            intrare = intrare_tile(nivel_sus, tr, tc)
+            if intrare is not None:
+                coada.append(intrare)
+    heapq.heapify(coada)
+
+    grila = GrilaDistanta(linii, coloane)
+    selectate, frunze = [], []
+    pixeli_cititi = tile_evaluate = 0
+
+    while coada and len(selectate) < nr_baze:
+        cheie, tip, r, c, date = heapq.heappop(coada)
+
+        if tip == 1:
+            # Candidat exact: cel mai bun rămas din frunza lui
+            if grila.liber(r, c):
+                grila.adauga(r, c)
+                selectate.append((-cheie, r - ar0, c - ac0))
+            frunza = frunze[date]
+            frunza[3] += 1
+            if frunza[3] < len(frunza[0]):
+                k = frunza[3]
+                heapq.heappush(coada, (-frunza[0][k], 1, frunza[1][k], frunza[2][k], date))
+            continue
+
+        nivel, tr, tc = date
+        if nivel > 0:
+            jumatate = (piramida.latura << nivel) // 2
+            for dr in (0, jumatate):
+                for dc in (0, jumatate):
+                    intrare = intrare_tile(nivel - 1, tr + dr, tc + dc)
+                    if intrare is not None:
+                        heapq.heappush(coada, intrare)
+            continue
+
+        # Frunză: evaluăm exact toate colțurile din tile (cu rama de linii-1 / coloane-1 pixeli)
+        r0, c0 = max(tr, ar0), max(tc, ac0)
+        r1, c1 = min(tr + piramida.latura, ar1), min(tc + piramida.latura, ac1)
+        mat = src.read(1, window=Window(c0, r0, c1 - c0 + coloane - 1, r1 - r0 + linii - 1))
+        pixeli_cititi += mat.size
+        tile_evaluate += 1
+
+        plat = scoruriAmprenta(mat, linii, coloane).ravel()
+        pozitive = np.flatnonzero(plat > 0)
+        if pozitive.size == 0:
+            continue
+        pozitive = pozitive[np.argsort(-plat[pozitive], kind="stable")]
+        latime = c1 - c0
+        frunze.append([plat[pozitive].tolist(), (pozitive // latime + r0).tolist(),
+                       (pozitive % latime + c0).tolist(), 0])
+        f = frunze[-1]
+        heapq.heappush(coada, (-f[0][0], 1, f[1][0], f[2][0], len(frunze) - 1))
+
+    timpi["bnb"] = time.perf_counter() - t
+    print(f"Branch-and-bound: {tile_evaluate} tile-uri evaluate exact, {pixeli_cititi} pixeli citiți")
+
+    if not selectate:
+        print(f"Nu încape niciun dreptunghi {linii}x{coloane} construibil în zonă.")
+        return [], pixeli_cititi
+
+    # Citim doar dreptunghiurile alese pentru lista de celule
+    t = time.perf_counter()
+    configuratii = []
+    for suma, r, c in selectate:
+        mat = src.read(1, window=Window(window.col_off + c, window.row_off + r, coloane, linii))
+        pixeli_cititi += mat.size
+        configuratii.extend(
+            (s, [(v, i + r, j + c) for v, i, j in celule])
+            for s, celule in configuratiiDinAmprente([(suma, 0, 0)], linii, coloane, mat))
+    timpi["configuratii"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    rezultat_final = structurarePentruJSON(configuratii, src, window.row_off, window.col_off)
+    timpi["gps"] = time.perf_counter() - t
+
+    return rezultat_final, pixeli_cititi
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Construiește piramida max/sumă a rasterului de scor")
+    parser.add_argument("--complet", action="store_true",
+                        help="Reconstruiește piramida chiar dacă e la zi")
+    args = parser.parse_args()
+
+    construieste_piramida(complet=args.complet)
@@ -1,9 +1,21 @@
 import rasterio
+from rasterio.enums import Resampling
 import numpy as np
 import os
+import uuid
+import json
+import hashlib
+import argparse
+from functools import lru_cache
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import sys
 
+from construibilitate import DISTANTA_INTERIOR_PADURE, IDX_ADANCIME_PADURE, iteratii_padure, masca_construibil
+from manifest_blocuri import ManifestBlocuri, amprenta_bloc
+
 
 
 if sys.platform.startswith('win'):
@@ -16,119 +28,393 @@ if sys.platform.startswith('win'):
 # --- CONFIGURARE ---
 INPUT_FILE = "MASTER_DATASET_EXTENDED.tif"
 OUTPUT_FILE = "MATRICE_SCOR_FINAL.tif"
+FACTORI_OVERVIEW = [2, 4, 8, 16, 32, 64]
+MAX_WORKERS = os.cpu_count() or 1
+
+# Handle-urile deschise de firele de lucru (unul per fir), închise la final
+_local = threading.local()
+_lock = threading.Lock()
+_deschise = []
+
+# Indecșii benzilor din MASTER_DATASET_EXTENDED.tif (1-based)
+IDX_DRUM = 1
+IDX_RAIL = 2
+IDX_PADURE = 3
+IDX_APA = 4
+IDX_URBAN = 5
+IDX_CONSTRUIBIL = 6
+# Toate benzile de care are nevoie scorul, citite dintr-un singur apel per bloc
+BENZI_SCOR = [IDX_DRUM, IDX_RAIL, IDX_PADURE, IDX_APA, IDX_CONSTRUIBIL]
+# Cu alt prag al pădurii adânci decât cel al benzii Construibil, masca e recalculată din aceste benzi
+BENZI_PRAG = [IDX_DRUM, IDX_RAIL, IDX_PADURE, IDX_APA, IDX_URBAN, IDX_ADANCIME_PADURE]
+
+# --- PONDERI SCOR ---
+# Nodurile de interpolare liniară (np.interp) per bandă și scorurile pădurii. Pot fi
+# suprascrise dintr-un fișier JSON cu aceeași structură (PONDERI_FILE). Versiunea
+# ponderilor este amprenta conținutului, deci orice modificare invalidează cache-urile.
+PONDERI_FILE = "ponderi_scor.json"
+PONDERI_IMPLICITE = {
+    # 1. CALE FERATĂ (Band 2) - Gradual (Max 40p)
+    # Noduri de distanță (pixeli, 10m/unitate): 0, 1, 10, 50, 150, 151
+    # Scoruri: 0 la fix, 40 la 10m-100m, scade la 15 la 500m, etc.
+    "rail": {"xp": [0, 1, 10, 50, 150, 151], "fp": [0, 40, 40, 15, 5, 0]},
+    # 2. DRUM (Band 1) - Gradual (Max 35p)
+    # Puncte: 0m, 10m, 50m, 200m, 700m, 2000m
+    "drum": {"xp": [0, 1, 5, 20, 70, 200, 201], "fp": [0, 35, 35, 20, 10, 3, 0]},
+    # 3. APĂ (Band 4) - Gradual (Max 12p)
+    # Puncte: 0m, 30m, 40m, 100m, 300m, 600m
+    "apa": {"xp": [0, 3, 4, 10, 30, 60, 61], "fp": [0, 0, 12, 12, 5, 2, 0]},
+    # 4. PĂDURE (Band 3) - Fix + Margine (Max 23p)
+    # Scor maxim dacă pixelul e ÎN pădure (-1); bonus de lizieră la 10m-50m de pădure
+    "padure": {"in_padure": 23, "liziera": 15, "liziera_min": 1, "liziera_max": 5},
+}
+# Peste atâtea intrări tabelul de scor nu mai merită construit (se folosește np.interp)
+MAX_INTRARI_TABEL = 64_000_000
+
+class Ponderi:
+    """Un set de ponderi validat; 'versiune' = amprenta conținutului (identifică blocurile calculate)."""
+
+    def __init__(self, config=PONDERI_IMPLICITE, nume="implicite"):
+        try:
+            self.xp_rail, self.fp_rail = self._noduri(config["rail"])
+            self.xp_drum, self.fp_drum = self._noduri(config["drum"])
+            self.xp_apa, self.fp_apa = self._noduri(config["apa"])
+            padure = config["padure"]
+            self.scor_in_padure = float(padure["in_padure"])
+            self.scor_liziera = float(padure["liziera"])
+            self.liziera_min, self.liziera_max = int(padure["liziera_min"]), int(padure["liziera_max"])
+            # Distanțele negative sunt rezervate (-1 = în pădure); tabelul de scor taie pădurea la -2
+            if not 0 <= self.liziera_min <= self.liziera_max:
+                raise ValueError("'liziera_min'/'liziera_max' trebuie să respecte 0 <= liziera_min <= liziera_max")
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Ponderi invalide ({nume}): {e}")
+
+        # Scor maxim posibil: trebuie să încapă în int8
+        maxim = (self.fp_rail.max() + self.fp_drum.max() + self.fp_apa.max()
+                 + max(self.scor_in_padure, self.scor_liziera))
+        if maxim > 127:
+            raise ValueError(f"Ponderi invalide ({nume}): scorul maxim {maxim:g} nu încape în int8")
+
+        continut = {k: config[k] for k in ("rail", "drum", "apa", "padure")}
+        self.versiune = hashlib.sha1(json.dumps(continut, sort_keys=True).encode()).hexdigest()[:12]
+        self.nume = nume
+
+    @staticmethod
+    def _noduri(banda):
+        xp, fp = np.array(banda["xp"], dtype=np.float64), np.array(banda["fp"], dtype=np.float64)
+        if xp.ndim != 1 or xp.shape != fp.shape or xp.size < 2:
+            raise ValueError("'xp' și 'fp' trebuie să fie liste de aceeași lungime (minim 2)")
+        if xp[0] < 0 or np.any(np.diff(xp) <= 0):
+            raise ValueError("'xp' trebuie să fie crescător, de la o distanță >= 0")
+        if fp.min() < 0:
+            raise ValueError("'fp' nu poate avea scoruri negative")
+        return xp, fp
+
+    def dimensiuni_tabel(self):
+        """(rail, drum, apă, categorii pădure): distanțele se taie la ultimul nod al fiecărei benzi."""
+        return (int(np.ceil(self.xp_rail[-1])) + 1, int(np.ceil(self.xp_drum[-1])) + 1,
+                int(np.ceil(self.xp_apa[-1])) + 1, 3)
+
+    def __eq__(self, other):
+        return isinstance(other, Ponderi) and other.versiune == self.versiune
+
+    def __hash__(self):
+        return hash(self.versiune)
+
+PONDERI = Ponderi()
+
+def incarca_profiluri(cale=PONDERI_FILE):
+    """
+    Profilurile de scor din fișier, în ordinea benzilor (primul = banda 1, profilul implicit).
+    Fișierul are fie o listă "profile" de ponderi cu "nume", fie un singur set de ponderi.
+    Fără fișier: doar ponderile implicite.
+    """
+    if not cale or not Path(cale).exists():
+        return [PONDERI]
+
+    with open(cale, encoding="utf-8") as f:
+        config = json.load(f)
+    if "profile" not in config:
+        return [Ponderi(config, config.get("nume", Path(cale).stem))]
+
+    profiluri = [Ponderi(p, p.get("nume", "")) for p in config["profile"]]
+    nume = [p.nume for p in profiluri]
+    if not profiluri or any(not n or "," in n for n in nume) or len(set(nume)) != len(nume):
+        raise ValueError(f"Profiluri invalide în '{cale}': numele trebuie să fie unice, nevide, fără virgulă")
+    return profiluri
+
+def scor_bloc_interp(date, ponderi=PONDERI):
+    """
+    Scorul int8 al unui bloc; 'date' = benzile BENZI_SCOR ale blocului, în această ordine.
+    Calculul de referință, în virgulă mobilă (folosit direct doar pentru distanțe neîntregi).
+    """
+    dist_drum, dist_rail, dist_padure, dist_apa, mask_construibil = date
+
+    # Inițializăm matricea de scor cu 0 (float pentru calcul precis, apoi convertim)
+    scor = np.zeros(dist_drum.shape, dtype=np.float32)
+
+    # numpy interp funcționează corect și pe matrice 2D în versiunile noi
+    scor += np.interp(dist_rail, ponderi.xp_rail, ponderi.fp_rail)
+    scor += np.interp(dist_drum, ponderi.xp_drum, ponderi.fp_drum)
+    scor += np.interp(dist_apa, ponderi.xp_apa, ponderi.fp_apa)
+
+    # Pădure: scor maxim dacă pixelul e ÎN pădure (-1)
+    scor_padure = np.where(dist_padure == -1, ponderi.scor_in_padure, 0.0)
+    # Bonus de margine (Liziera), doar unde nu e deja în pădure
+    scor_padure += np.where((dist_padure >= ponderi.liziera_min) & (dist_padure <= ponderi.liziera_max)
+                            & (dist_padure != -1), ponderi.scor_liziera, 0.0)
+    scor += scor_padure
+
+    # Rotunjim scorul total și îl convertim la int8
+    scor_final = scor.round().astype(np.int8)
+
+    # Dacă nu e construibil (0), scorul devine -1
+    return np.where(mask_construibil == 1, scor_final, -1)
+
+# --- TABEL DE SCOR (distanțe întregi) ---
+# Distanțele din cub sunt numere întregi de pixeli, iar dincolo de ultimul nod scorul nu se
+# mai schimbă. Scorul unui pixel depinde deci doar de (rail, drum, apă tăiate la ultimul nod,
+# categoria pădurii): ~5.7M combinații cu ponderile implicite, tabelate o singură dată cu
+# scor_bloc_interp, deci identic bit cu bit cu calculul în virgulă mobilă (inclusiv
+# rotunjirea sumei). Tabele separate per bandă, rotunjite la int8 și adunate, ar rotunji altfel suma.
+
+@lru_cache(maxsize=4)
+def tabel_scor(ponderi=PONDERI):
+    """
+    (tabel, categorii): tabel = scorul int8 aplatizat, indexat [rail, drum, apă, categorie_pădure],
+    categorii = categoria pădurii (0 nimic, 1 în pădure, 2 lizieră) pentru distanțele
+    -2..liziera_max+1 (valorile din afară sunt tăiate la capete, cu aceeași categorie).
+    """
+    nr_rail, nr_drum, nr_apa, nr_categorii = ponderi.dimensiuni_tabel()
+    # O distanță din fiecare categorie de pădure (-2: nici în pădure, nici lizieră, oricare ar fi liziera_min)
+    reprezentanti = np.array([-2, -1, ponderi.liziera_min], dtype=np.float32)
+    drum, apa, padure = np.meshgrid(np.arange(nr_drum, dtype=np.float32), np.arange(nr_apa, dtype=np.float32),
+                                    reprezentanti, indexing="ij")
+    construibil = np.ones_like(drum)
+
+    tabel = np.empty((nr_rail, nr_drum, nr_apa, nr_categorii), dtype=np.int8)
+    for rail in range(nr_rail):  # felie cu felie, fără temporare float64 de 5.7M
+        tabel[rail] = scor_bloc_interp((drum, np.full_like(drum, rail), padure, apa, construibil), ponderi)
 
-def calculeaza_scor():
+    d = np.arange(-2, ponderi.liziera_max + 2)
+    categorii = np.select([d == -1, (d >= ponderi.liziera_min) & (d <= ponderi.liziera_max)], [1, 2], 0)
+    return tabel.reshape(-1), categorii.astype(np.int32)
+
+def scor_bloc(date, ponderi=PONDERI):
+    """
+    Scorul int8 al unui bloc, identic cu scor_bloc_interp, din tabelul de scor: un indice
+    întreg per pixel și o singură indexare, fără intermediari float. Blocurile cu distanțe
+    neîntregi (sau NaN) trec prin calculul în virgulă mobilă.
+    """
+    dimensiuni = ponderi.dimensiuni_tabel()
+    if (np.prod(dimensiuni) > MAX_INTRARI_TABEL or
+            (date.dtype.kind == "f" and not np.array_equal(date, np.rint(date)))):
+        return scor_bloc_interp(date, ponderi)
+
+    tabel, categorii = tabel_scor(ponderi)
+    nr_rail, nr_drum, nr_apa, nr_categorii = dimensiuni
+    dist_drum, dist_rail, dist_padure, dist_apa, mask_construibil = date
+
+    idx = np.clip(dist_rail, 0, nr_rail - 1).astype(np.int32)
+    idx *= nr_drum
+    idx += np.clip(dist_drum, 0, nr_drum - 1).astype(np.int32)
+    idx *= nr_apa
+    idx += np.clip(dist_apa, 0, nr_apa - 1).astype(np.int32)
+    idx *= nr_categorii
+    idx += np.take(categorii, np.clip(dist_padure, -2, ponderi.liziera_max + 1).astype(np.int32) + 2)
+
+    scor = np.take(tabel, idx)
+    # Dacă nu e construibil (0), scorul devine -1
+    scor[mask_construibil != 1] = -1
+    return scor
+
+# --- PRAGUL PĂDURII ADÂNCI ---
+def prag_padure_cub(src):
+    """Pragul (metri) cu care construibilitate.py a calculat banda Construibil a cubului."""
+    return float(src.tags().get("DISTANTA_INTERIOR_PADURE", DISTANTA_INTERIOR_PADURE))
+
+def iteratii_citire(src, prag_padure=None):
+    """
+    None dacă masca Construibil a cubului are deja pragul cerut (metri; None = cel al cubului),
+    altfel pragul în pixeli, pentru citeste_date_scor. ValueError pentru un prag invalid sau
+    un cub fără banda de adâncime a pădurii.
+    """
+    if prag_padure is None:
+        return None
+    iteratii = iteratii_padure(prag_padure)
+    if iteratii == iteratii_padure(prag_padure_cub(src)):
+        return None
+    if src.count < IDX_ADANCIME_PADURE:
+        raise ValueError("Cubul master nu are banda de adâncime a pădurii: rulează construibilitate.py "
+                         "pentru alt prag al pădurii adânci")
+    return iteratii
+
+def citeste_date_scor(src, window=None, iteratii=None):
+    """
+    Benzile BENZI_SCOR ale ferestrei, în ordinea din scor_bloc. Cu 'iteratii' (iteratii_citire),
+    masca Construibil e recalculată din obstacole și adâncimea pădurii cu acest prag.
+    """
+    if iteratii is None:
+        return src.read(BENZI_SCOR, window=window)
+    drum, rail, padure, apa, urban, adancime = src.read(BENZI_PRAG, window=window)
+    construibil = masca_construibil(drum, rail, apa, urban, adancime, iteratii)
+    return np.stack([drum, rail, padure, apa, construibil.astype(drum.dtype)])
+
+def scor_profiluri(date, profiluri):
+    """Scorul blocului pentru fiecare profil, (N, h, w) int8, din aceleași benzi citite o dată."""
+    return np.stack([scor_bloc(date, ponderi) for ponderi in profiluri])
+
+def _scor_incremental(src, window, profiluri, amprenta_veche, iteratii):
+    """(amprenta, scoruri) ale blocului; scoruri = None dacă intrările lui nu s-au schimbat."""
+    date = citeste_date_scor(src, window, iteratii)
+    amprenta = amprenta_bloc(date)
+    if amprenta == amprenta_veche:
+        return amprenta, None
+    return amprenta, scor_profiluri(date, profiluri)
+
+def _scor_fereastra(window, profiluri, amprenta_veche, iteratii):
+    """Rulat de firele de lucru: fiecare fir citește cu propriul handle (GDAL nu e thread-safe)."""
+    src = getattr(_local, "src", None)
+    if src is None:
+        src = _local.src = rasterio.open(INPUT_FILE)
+        with _lock:
+            _deschise.append(src)
+    return _scor_incremental(src, window, profiluri, amprenta_veche, iteratii)
+
+def _blocuri_paralel(windows, workers, profiluri, amprente_vechi, iteratii):
+    """
+    Generator: (window, (amprenta, scor)) în ordinea ferestrelor. Citirea (decompresie LZW) și
+    calculul rulează pe 'workers' fire (GDAL și numpy eliberează GIL-ul); scrierea
+    rămâne la apelant, pe un singur fir. Cel mult 2 x workers blocuri sunt în lucru.
+    """
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            in_lucru = deque()
+            for window, amprenta_veche in zip(windows, amprente_vechi):
+                in_lucru.append((window, executor.submit(_scor_fereastra, window, profiluri, amprenta_veche,
+                                                         iteratii)))
+                if len(in_lucru) >= 2 * workers:
+                    window_gata, future = in_lucru.popleft()
+                    yield window_gata, future.result()
+            while in_lucru:
+                window_gata, future = in_lucru.popleft()
+                yield window_gata, future.result()
+    finally:
+        with _lock:
+            for src in _deschise:
+                src.close()
+            _deschise.clear()
+
+def calculeaza_scor(workers=MAX_WORKERS, profiluri=None, complet=False, prag_padure=None):
+    """
+    Scrie OUTPUT_FILE cu o bandă per profil de scor ('profiluri' implicit din PONDERI_FILE).
+    Fiecare bloc al cubului master este citit o singură dată pentru toate profilurile.
+    'prag_padure' = pragul pădurii adânci în metri (implicit cel al benzii Construibil din cub).
+    Dacă OUTPUT_FILE are un manifest de blocuri cu aceiași parametri, sunt rescrise doar
+    blocurile ale căror benzi de intrare s-au schimbat ('complet' = rescrie tot).
+    """
     if not Path(INPUT_FILE).exists():
         print(f"EROARE: Nu găsesc '{INPUT_FILE}'")
         return
 
-    # Ștergem fișierul vechi dacă există
-    if os.path.exists(OUTPUT_FILE):
-        try:
-            os.remove(OUTPUT_FILE)
-        except PermissionError:
-            print(f"EROARE: Închide fișierul '{OUTPUT_FILE}' din alte programe!")
-            return
-
-    print(f"--- Încep calculul scorului GRADUAL pe baza ponderilor liniare ---")
+    if profiluri is None:
+        profiluri = incarca_profiluri()
+    print(f"--- Încep calculul scorului GRADUAL pe baza ponderilor liniare "
+          f"({', '.join(p.nume for p in profiluri)}) ---")
 
     with rasterio.open(INPUT_FILE) as src:
         # Verificăm dacă avem toate cele 6 benzi
         if src.count < 6:
             print(f"EROARE: Fișierul are doar {src.count} benzi. Rulează scriptul de 'Construibil' înainte!")
             return
+        try:
+            iteratii = iteratii_citire(src, prag_padure)
+        except ValueError as e:
+            print(f"EROARE: {e}")
+            return
+        prag_efectiv = prag_padure_cub(src) if iteratii is None else prag_padure
 
         # Pregătim profilul pentru output
         # Scor maxim posibil: 40 (Rail) + 35 (Drum) + 12 (Apa) + 23 (Padure) = 110. 
         # int8 (max 127) este suficient.
         profile = src.profile.copy()
         profile.update(
-            count=1,
+            count=len(profiluri),
             dtype=rasterio.int8,
             compress='lzw',
             BIGTIFF='YES',
             nodata=-1 # Folosim -1 pentru neconstruibil
         )
 
-        # Indecșii benzilor (1-based)
-        IDX_DRUM = 1
-        IDX_RAIL = 2
-        IDX_PADURE = 3
-        IDX_APA = 4
-        IDX_CONSTRUIBIL = 6
+        # Tot ce determină un bloc de scor în afară de benzile lui din cubul master
+        parametri = json.dumps({
+            "profiluri": [[p.nume, p.versiune] for p in profiluri], "benzi": BENZI_SCOR,
+            "dimensiuni": [src.width, src.height], "blocuri": src.block_shapes[0],
+            "transform": list(src.transform), "crs": str(src.crs), "overview": FACTORI_OVERVIEW,
+        })
+        manifest = ManifestBlocuri(OUTPUT_FILE, parametri)
+        incremental = manifest.vechi is not None and not complet
+
+        # Fără manifest valid: ștergem fișierul vechi și îl scriem complet
+        if not incremental and os.path.exists(OUTPUT_FILE):
+            try:
+                os.remove(OUTPUT_FILE)
+            except PermissionError:
+                print(f"EROARE: Închide fișierul '{OUTPUT_FILE}' din alte programe!")
+                return
 
-        with rasterio.open(OUTPUT_FILE, 'w', **profile) as dst:
-            dst.set_band_description(1, "Scor Tactic Final Gradual (Max 110p)")
+        with rasterio.open(OUTPUT_FILE, 'r+') if incremental else rasterio.open(OUTPUT_FILE, 'w', **profile) as dst:
+            if not incremental:
+                for banda, ponderi in enumerate(profiluri, start=1):
+                    dst.set_band_description(banda, f"Scor Tactic Final Gradual - profil {ponderi.nume}")
+                    dst.update_tags(banda, PROFIL=ponderi.nume, VERSIUNE_PONDERI=ponderi.versiune)
+                # PROFILURI = numele benzilor, în ordine (algoritm1_tif.banda_profil)
+                dst.update_tags(PROFILURI=",".join(p.nume for p in profiluri),
+                                VERSIUNE_PONDERI=",".join(p.versiune for p in profiluri))
+            # Pragul pădurii adânci al scorului (motor_analiza verifică pragul cerut de interogări)
+            dst.update_tags(DISTANTA_INTERIOR_PADURE=f"{float(prag_efectiv):g}")
 
             # Procesăm pe blocuri (ferestre) pentru eficiență memorie
             windows = [window for ij, window in dst.block_windows(1)]
-            print(f"Procesez {len(windows)} blocuri de date...")
+            manifest.incepe(len(windows), incremental)
+            amprente_vechi = [manifest.veche(i) for i in range(len(windows))]
+            print(f"Procesez {len(windows)} blocuri de date ({workers} fire"
+                  f"{', doar blocurile schimbate' if manifest.vechi is not None else ''})...")
+
+            for ponderi in profiluri:
+                tabel_scor(ponderi)  # construite o singură dată, înainte să pornească firele
+            if workers > 1:
+                blocuri = _blocuri_paralel(windows, workers, profiluri, amprente_vechi, iteratii)
+            else:
+                blocuri = ((window, _scor_incremental(src, window, profiluri, veche, iteratii))
+                           for window, veche in zip(windows, amprente_vechi))
 
             # Încercăm să folosim tqdm pentru progress bar
             try:
                 from tqdm import tqdm
-                iterator = tqdm(windows)
+                iterator = tqdm(blocuri, total=len(windows))
             except ImportError:
-                iterator = windows
-
-            for window in iterator:
-                # Citim datele necesare
-                dist_drum = src.read(IDX_DRUM, window=window)
-                dist_rail = src.read(IDX_RAIL, window=window)
-                dist_padure = src.read(IDX_PADURE, window=window)
-                dist_apa = src.read(IDX_APA, window=window)
-                mask_construibil = src.read(IDX_CONSTRUIBIL, window=window)
-
-                # Inițializăm matricea de scor cu 0 (float pentru calcul precis, apoi convertim)
-                scor = np.zeros(dist_drum.shape, dtype=np.float32)
-                
-                # --- NOU: CALCUL SCOR GRADUAL CU INTERPOLARE (np.interp) ---
-                # np.interp funcționează liniar între punctele date (XP, FP)
-
-                # --- 1. CALE FERATĂ (Band 2) - Gradual (Max 40p) ---
-                # Noduri de distanță (pixeli, 10m/unitate): 0, 1, 10, 50, 150, 151
-                xp_rail = np.array([0, 1, 10, 50, 150, 151])
-                # Scoruri: 0 la fix, 40 la 10m-100m, scade la 15 la 500m, etc.
-                fp_rail = np.array([0, 40, 40, 15, 5, 0]) 
-                
-                # numpy interp funcționează corect și pe matrice 2D în versiunile noi
-                scor += np.interp(dist_rail, xp_rail, fp_rail)
-
-                # --- 2. DRUM (Band 1) - Gradual (Max 35p) ---
-                # Puncte: 0m, 10m, 50m, 200m, 700m, 2000m
-                xp_drum = np.array([0, 1, 5, 20, 70, 200, 201])
-                fp_drum = np.array([0, 35, 35, 20, 10, 3, 0]) 
-
-                scor += np.interp(dist_drum, xp_drum, fp_drum)
-
-                # --- 3. APĂ (Band 4) - Gradual (Max 12p) ---
-                # Puncte: 0m, 30m, 40m, 100m, 300m, 600m
-                xp_apa = np.array([0, 3, 4, 10, 30, 60, 61])
-                fp_apa = np.array([0, 0, 12, 12, 5, 2, 0])
-
-                scor += np.interp(dist_apa, xp_apa, fp_apa)
-                
-                # --- 4. PĂDURE (Band 3) - Fix + Margine (Max 23p) ---
-                # 4a. Scor maxim dacă pixelul e ÎN pădure (-1)
-                scor_padure = np.where(dist_padure == -1, 23.0, 0.0)
-                
-                # 4b. Bonus de margine (Liziera): 15p dacă ești la 10m-50m de pădure
-                # Doar unde nu e deja în pădure
-                scor_padure += np.where((dist_padure >= 1) & (dist_padure <= 5) & (dist_padure != -1), 15.0, 0.0)
-                
-                scor += scor_padure
-
-                # --- 5. APLICARE MASCĂ CONSTRUIBIL (Band 6) ---
-                # Rotunjim scorul total și îl convertim la int8
-                scor_final = scor.round().astype(np.int8)
-
-                # Dacă nu e construibil (0), scorul devine -1
-                scor_final = np.where(mask_construibil == 1, scor_final, -1)
-
-                # Scriem rezultatul
-                dst.write(scor_final, window=window, indexes=1)
-
-    print(f"\n✅ SUCCES! Matricea de scor GRADUAL a fost salvată în '{OUTPUT_FILE}'.")
+                iterator = blocuri
+
+            # Scriem rezultatele în ordinea blocurilor, dintr-un singur fir
+            rescrise = 0
+            for i, (window, (amprenta, scoruri)) in enumerate(iterator):
+                manifest.actualizeaza(i, amprenta)
+                if scoruri is not None:
+                    dst.write(scoruri, window=window)
+                    rescrise += 1
+
+            if rescrise:
+                # Versiune unică a acestei generări: invalidează cache-ul de rezultate al serverului
+                dst.update_tags(VERSIUNE_SCOR=uuid.uuid4().hex)
+                # Overview-uri pentru tile-urile de la zoom mic (serverul citește din ele)
+                print("Generez overview-urile...")
+                dst.build_overviews(FACTORI_OVERVIEW, Resampling.nearest)
+                dst.update_tags(ns='rio_overview', resampling='nearest')
+
+    manifest.salveaza()
+    print(f"\n✅ SUCCES! Matricea de scor GRADUAL a fost salvată în '{OUTPUT_FILE}' "
+          f"({rescrise} din {len(windows)} blocuri rescrise).")
 
 def test_pixel(row, col):
     if not Path(OUTPUT_FILE).exists(): return
@@ -141,6 +427,16 @@ def test_pixel(row, col):
             print(f"Atenție: Pixelul [{row}, {col}] este în afara domeniului.")
 
 if __name__ == "__main__":
-    calculeaza_scor()
+    parser = argparse.ArgumentParser(description="Calculează MATRICE_SCOR_FINAL.tif din MASTER_DATASET_EXTENDED.tif")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS,
+                        help="Fire pentru citire și calcul (1 = serial; implicit toate nucleele)")
+    parser.add_argument("--ponderi", default=PONDERI_FILE, help="Fișierul JSON cu profilurile de scor")
+    parser.add_argument("--complet", action="store_true",
+                        help="Rescrie toate blocurile (ignoră manifestul de blocuri)")
+    parser.add_argument("--padure-adanca", type=float, default=None, metavar="METRI",
+                        help="Pragul pădurii adânci (neconstruibilă); implicit cel din cubul master")
+    args = parser.parse_args()
+
+    calculeaza_scor(max(1, args.workers), incarca_profiluri(args.ponderi), args.complet, args.padure_adanca)
     # Testăm un punct (ex: mijlocul hărții)
     test_pixel(12000, 12000)
\ No newline at end of file
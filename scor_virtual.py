@@ -0,0 +1,197 @@
+import os
+import sys
+import copy
+import argparse
+
+import numpy as np
+import rasterio
+from rasterio.enums import Resampling
+from rasterio.vrt import WarpedVRT
+from rasterio.windows import Window
+
+from cache_lru import CacheLRU
+from scor_final import (IDX_CONSTRUIBIL, PONDERI_FILE, citeste_date_scor, incarca_profiluri, iteratii_citire,
+                        prag_padure_cub, scor_bloc)
+
+if sys.platform.startswith('win'):
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+        sys.stderr.reconfigure(encoding='utf-8')
+    except AttributeError:
+        pass
+
+# Rasterul de scor "virtual": scorul este calculat la cerere din MASTER_DATASET_EXTENDED.tif,
+# doar pentru blocurile pe care le citește o interogare, un tile sau o previzualizare.
+# O modificare a ponderilor (ponderi_scor.json) are efect imediat, fără rescrierea
+# MATRICE_SCOR_FINAL.tif. Ca și rasterul scris de scor_final.py, are o bandă per profil.
+# Pragul pădurii adânci se poate schimba per interogare (cu_prag_padure), din banda de adâncime
+# a cubului. Blocurile calculate sunt păstrate într-un cache LRU, cu cheia (versiunea cubului
+# master, versiunea ponderilor profilului, pragul pădurii, bloc).
+
+# --- CONFIGURARE ---
+INPUT_FILE = "MASTER_DATASET_EXTENDED.tif"
+LATURA_BLOC = 256              # grila de blocuri calculate (aliniată cu tile-urile cubului)
+MAX_BLOCURI_CACHE = 2048       # ~ 2048 x 64 KB = 128 MB
+
+_blocuri = CacheLRU(MAX_BLOCURI_CACHE)
+
+def statistici_cache():
+    return {"intrari": len(_blocuri), "hits": _blocuri.hits, "misses": _blocuri.misses}
+
+class ScorVirtual:
+    """
+    Se comportă ca un dataset rasterio int8 cu o bandă per profil (subsetul folosit de
+    server: read, tags, transform, crs, ...). Ca și handle-urile rasterio, nu se folosește din mai
+    multe fire deodată; cache-ul de blocuri este însă comun tuturor.
+    """
+
+    def __init__(self, cale_master, profiluri, prag_padure=None):
+        self._src = rasterio.open(cale_master)
+        if self._src.count < IDX_CONSTRUIBIL:
+            nr_benzi = self._src.count
+            self._src.close()
+            raise ValueError(f"'{cale_master}' are doar {nr_benzi} benzi (lipsește masca Construibil)")
+
+        self.profiluri = list(profiluri)
+        try:
+            self._iteratii = iteratii_citire(self._src, prag_padure)
+        except ValueError:
+            self._src.close()
+            raise
+        self.prag_padure = prag_padure_cub(self._src) if self._iteratii is None else float(prag_padure)
+        stat = os.stat(cale_master)
+        self._versiune_master = f"{stat.st_mtime_ns}_{stat.st_size}"
+        self.versiune = f"virtual_{self._versiune_master}_{'_'.join(p.versiune for p in self.profiluri)}"
+
+        self.width, self.height = self._src.width, self._src.height
+        self.transform, self.crs = self._src.transform, self._src.crs
+        self.bounds, self.res = self._src.bounds, self._src.res
+        self.count, self.dtypes, self.nodata = len(self.profiluri), ("int8",) * len(self.profiluri), -1
+
+    @property
+    def closed(self):
+        return self._src.closed
+
+    def close(self):
+        self._src.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def cu_prag_padure(self, prag_padure):
+        """
+        Același raster virtual (același handle, același cache de blocuri) cu alt prag al pădurii
+        adânci, în metri. 'versiune' rămâne aceeași: pragul intră în cheile de cache ale apelantului.
+        """
+        vedere = copy.copy(self)
+        vedere._iteratii = iteratii_citire(self._src, prag_padure)
+        vedere.prag_padure = prag_padure_cub(self._src) if vedere._iteratii is None else float(prag_padure)
+        return vedere
+
+    def tags(self, bidx=0, ns=None):
+        if bidx:
+            ponderi = self.profiluri[bidx - 1]
+            return {"PROFIL": ponderi.nume, "VERSIUNE_PONDERI": ponderi.versiune}
+        return {"VERSIUNE_SCOR": self.versiune, "PROFILURI": ",".join(p.nume for p in self.profiluri),
+                "VERSIUNE_PONDERI": ",".join(p.versiune for p in self.profiluri),
+                "DISTANTA_INTERIOR_PADURE": f"{self.prag_padure:g}"}
+
+    def xy(self, row, col, offset="center"):
+        return rasterio.transform.xy(self.transform, row, col, offset=offset)
+
+    def _bloc(self, banda, bi, bj):
+        """Scorul blocului (bi, bj) din grila LATURA_BLOC pentru profilul benzii, din cache sau calculat acum."""
+        ponderi = self.profiluri[banda - 1]
+        cheie = (self._versiune_master, ponderi.versiune, self._iteratii, bi, bj)
+        scor = _blocuri.get(cheie)
+        if scor is None:
+            B = LATURA_BLOC
+            window = Window(bj * B, bi * B, min(B, self.width - bj * B), min(B, self.height - bi * B))
+            scor = scor_bloc(citeste_date_scor(self._src, window, self._iteratii), ponderi)
+            scor.setflags(write=False)
+            _blocuri.put(cheie, scor)
+        return scor
+
+    def read(self, indexes=1, window=None, boundless=False, fill_value=None):
+        """
+        Ca DatasetReader.read pe o singură bandă (un profil): fără 'boundless' fereastra se taie la marginea
+        rasterului, cu 'boundless' exteriorul primește 'fill_value' (implicit nodata = -1).
+        """
+        banda = indexes if isinstance(indexes, int) else indexes[0]
+        if not isinstance(indexes, int) and len(indexes) != 1:
+            raise ValueError("ScorVirtual citește o singură bandă (profil) odată")
+        if not 1 <= banda <= self.count:
+            raise IndexError(f"Banda {banda} nu există (profiluri: {self.count})")
+        if window is None:
+            window = Window(0, 0, self.width, self.height)
+        window = window.round_offsets().round_lengths()
+        c0, r0 = int(window.col_off), int(window.row_off)
+        c1, r1 = c0 + int(window.width), r0 + int(window.height)
+
+        # Partea din raster a ferestrei
+        ir0, ic0 = max(r0, 0), max(c0, 0)
+        ir1, ic1 = min(r1, self.height), min(c1, self.width)
+
+        if boundless:
+            out = np.full((r1 - r0, c1 - c0), self.nodata if fill_value is None else fill_value, dtype=np.int8)
+            baza_r, baza_c = r0, c0
+        else:
+            out = np.empty((max(ir1 - ir0, 0), max(ic1 - ic0, 0)), dtype=np.int8)
+            baza_r, baza_c = ir0, ic0
+
+        B = LATURA_BLOC
+        if ir0 < ir1 and ic0 < ic1:
+            for bi in range(ir0 // B, (ir1 - 1) // B + 1):
+                for bj in range(ic0 // B, (ic1 - 1) // B + 1):
+                    scor = self._bloc(banda, bi, bj)
+                    br0, bc0 = max(ir0, bi * B), max(ic0, bj * B)
+                    br1, bc1 = min(ir1, (bi + 1) * B), min(ic1, (bj + 1) * B)
+                    out[br0 - baza_r:br1 - baza_r, bc0 - baza_c:bc1 - baza_c] = \
+                        scor[br0 - bi * B:br1 - bi * B, bc0 - bj * B:bc1 - bj * B]
+
+        return out if isinstance(indexes, int) else out[np.newaxis]
+
+    def citeste_reproiectat(self, crs, transform, width, height, nodata):
+        """
+        Scorul profilului implicit (banda 1) pe altă grilă (tile-uri), prin cel mai apropiat vecin. Scorul e calculat
+        pixel cu pixel, deci reproiectăm benzile cubului și calculăm scorul doar pe pixelii
+        tile-ului; exteriorul rasterului primește 'nodata' (int16).
+        """
+        with WarpedVRT(self._src, crs=crs, transform=transform, width=width, height=height,
+                       src_nodata=np.nan, nodata=np.nan, resampling=Resampling.nearest) as vrt:
+            date = citeste_date_scor(vrt, iteratii=self._iteratii)
+
+        in_afara = np.isnan(date[0])
+        date[:, in_afara] = 0
+        scor = scor_bloc(date, self.profiluri[0]).astype(np.int16)
+        scor[in_afara] = nodata
+        return scor
+
+if __name__ == "__main__":
+    # Verificare: scorul virtual al unei ferestre, față de MATRICE_SCOR_FINAL.tif (dacă există)
+    parser = argparse.ArgumentParser(description="Scorul calculat la cerere pe o fereastră a cubului master")
+    parser.add_argument("row", type=int)
+    parser.add_argument("col", type=int)
+    parser.add_argument("--latura", type=int, default=1024)
+    parser.add_argument("--ponderi", default=PONDERI_FILE, help="Fișierul JSON cu profilurile de scor")
+    parser.add_argument("--banda", type=int, default=1, help="Banda (profilul) comparat")
+    parser.add_argument("--padure-adanca", type=float, default=None, metavar="METRI",
+                        help="Pragul pădurii adânci; implicit cel din cubul master")
+    parser.add_argument("--compara", default="MATRICE_SCOR_FINAL.tif", help="Rasterul de scor scris de scor_final.py")
+    args = parser.parse_args()
+
+    profiluri = incarca_profiluri(args.ponderi)
+    ponderi = profiluri[args.banda - 1]
+    window = Window(args.col, args.row, args.latura, args.latura)
+    with ScorVirtual(INPUT_FILE, profiluri, args.padure_adanca) as virtual:
+        scor = virtual.read(args.banda, window=window)
+    print(f"Ponderi '{ponderi.nume}' ({ponderi.versiune}): fereastra {scor.shape}, "
+          f"scor maxim {scor.max()}, {np.count_nonzero(scor == -1)} pixeli neconstruibili")
+
+    if os.path.exists(args.compara):
+        with rasterio.open(args.compara) as src:
+            identic = np.array_equal(scor, src.read(args.banda, window=window))
+        print(f"Identic cu '{args.compara}': {identic}")
@@ -0,0 +1,182 @@
+import io
+import math
+import os
+import shutil
+import threading
+
+import numpy as np
+import matplotlib
+from PIL import Image
+from affine import Affine
+from rasterio.enums import Resampling
+from rasterio.warp import reproject, transform_bounds
+from rasterio.transform import from_bounds
+from rasterio.windows import Window
+from rasterio.windows import from_bounds as fereastra_din_limite
+
+import motor_analiza
+from cache_lru import CacheLRU
+
+# --- CONFIGURARE ---
+TILE_SIZE = 256
+SCOR_MAX = 45              # Aceeași scală de culori ca în export_zona.py (vmin=0, vmax=45)
+CULOARE_INTERZIS = (0x40, 0x40, 0x40, 200)   # Gri închis pentru -1 (neconstruibil)
+OPACITATE_SCOR = 200
+MAX_TILES_MEMORIE = 2048   # ~ 2048 * (câțiva KB) PNG în RAM
+# Cache pe disc opțional: setează variabila de mediu TILE_CACHE_DIR pentru a-l activa.
+# Tile-urile stau în subdirectorul dedicat TILE_CACHE_DIR/tiles_scor/<eticheta versiunii>;
+# doar acesta este curățat la schimbarea versiunii (TILE_CACHE_DIR poate fi partajat, ex: /tmp).
+TILE_CACHE_DIR = os.environ.get("TILE_CACHE_DIR")
+DIR_TILES = os.path.join(TILE_CACHE_DIR, "tiles_scor") if TILE_CACHE_DIR else None
+
+NODATA_VRT = -128          # Valoare imposibilă în scor: o folosim pentru "în afara hărții"
+ORIGINE_3857 = math.pi * 6378137.0
+
+def _construieste_lut():
+    """LUT RGBA (256 x 4) indexat cu valoarea int8 reinterpretată ca uint8."""
+    turbo = matplotlib.colormaps["turbo"]
+    lut = np.zeros((256, 4), dtype=np.uint8)
+
+    scoruri = np.arange(0, 128)
+    culori = turbo(np.clip(scoruri / SCOR_MAX, 0, 1))
+    lut[scoruri, :3] = (culori[:, :3] * 255).round().astype(np.uint8)
+    lut[scoruri, 3] = OPACITATE_SCOR
+
+    lut[np.uint8(np.int8(-1))] = CULOARE_INTERZIS
+    # NODATA_VRT și restul valorilor negative rămân transparente
+    return lut
+
+LUT_TURBO = _construieste_lut()
+
+def _png(rgba):
+    buf = io.BytesIO()
+    Image.fromarray(rgba).save(buf, format="PNG", optimize=False)
+    return buf.getvalue()
+
+TILE_GOL = _png(np.zeros((TILE_SIZE, TILE_SIZE, 4), dtype=np.uint8))
+
+_cache = CacheLRU(MAX_TILES_MEMORIE)
+_versiune_cache = None
+_lock_versiune = threading.Lock()
+
+def _verifica_versiune():
+    """
+    Invalidează cache-ul (memorie + disc) dacă rasterul de scor a fost regenerat.
+    Returnează eticheta versiunii curente.
+    """
+    global _versiune_cache
+    eticheta = "_".join(map(str, motor_analiza.versiune_raster()))
+
+    with _lock_versiune:
+        if eticheta != _versiune_cache:
+            _cache.clear()
+            if DIR_TILES and os.path.isdir(DIR_TILES):
+                for nume in os.listdir(DIR_TILES):
+                    if nume != eticheta:
+                        shutil.rmtree(os.path.join(DIR_TILES, nume), ignore_errors=True)
+            _versiune_cache = eticheta
+
+    return eticheta
+
+def statistici_cache():
+    return {"intrari": len(_cache), "hits": _cache.hits, "misses": _cache.misses}
+
+def limite_tile(z, x, y):
+    """Limitele (left, bottom, right, top) ale unui tile XYZ în EPSG:3857."""
+    marime = 2 * ORIGINE_3857 / (2 ** z)
+    left = -ORIGINE_3857 + x * marime
+    top = ORIGINE_3857 - y * marime
+    return left, top - marime, left + marime, top
+
+def _citeste_tile(src, left, bottom, right, top, transform_tile):
+    """
+    Citește tile-ul din overview-ul cel mai apropiat de rezoluția lui: o citire decimată
+    (out_shape, nearest) a ferestrei sursă, pe care GDAL o servește din overview-uri
+    (FACTORI_OVERVIEW din scor_final.py), apoi reproiectată în EPSG:3857.
+    """
+    s_left, s_bottom, s_right, s_top = transform_bounds("EPSG:3857", src.crs, left, bottom, right, top)
+
+    # Pixeli sursă per pixel de tile; alegem cel mai mare overview care nu e mai grosier de atât
+    pixeli_src = min((s_right - s_left) / abs(src.res[0]), (s_top - s_bottom) / abs(src.res[1])) / TILE_SIZE
+    factor = max((f for f in src.overviews(1) if f <= pixeli_src), default=1)
+
+    fereastra = fereastra_din_limite(s_left, s_bottom, s_right, s_top, src.transform)
+    col0 = max(0, math.floor(fereastra.col_off))
+    row0 = max(0, math.floor(fereastra.row_off))
+    col1 = min(src.width, math.ceil(fereastra.col_off + fereastra.width))
+    row1 = min(src.height, math.ceil(fereastra.row_off + fereastra.height))
+
+    data = np.full((TILE_SIZE, TILE_SIZE), NODATA_VRT, dtype=np.int16)
+    if col1 <= col0 or row1 <= row0:
+        return data
+
+    fereastra = Window(col0, row0, col1 - col0, row1 - row0)
+    latime = math.ceil(fereastra.width / factor)
+    inaltime = math.ceil(fereastra.height / factor)
+    sursa = src.read(1, window=fereastra, out_shape=(inaltime, latime), resampling=Resampling.nearest)
+    transform_sursa = src.window_transform(fereastra) * Affine.scale(fereastra.width / latime,
+                                                                      fereastra.height / inaltime)
+
+    # src_nodata=NODATA_VRT: păstrăm -1 ca valoare (gri), doar exteriorul devine transparent.
+    # int16: int8 nu e suportat ca tip de warp pe toate versiunile GDAL
+    reproject(sursa.astype(np.int16), data, src_transform=transform_sursa, src_crs=src.crs,
+              dst_transform=transform_tile, dst_crs="EPSG:3857",
+              src_nodata=NODATA_VRT, dst_nodata=NODATA_VRT, resampling=Resampling.nearest)
+    return data
+
+def _randeaza(src, z, x, y):
+    left, bottom, right, top = limite_tile(z, x, y)
+
+    # Ieșim rapid dacă tile-ul nu intersectează rasterul
+    r_left, r_bottom, r_right, r_top = transform_bounds(src.crs, "EPSG:3857", *src.bounds)
+    if right <= r_left or left >= r_right or top <= r_bottom or bottom >= r_top:
+        return TILE_GOL
+
+    transform_tile = from_bounds(left, bottom, right, top, TILE_SIZE, TILE_SIZE)
+    citeste_reproiectat = getattr(src, "citeste_reproiectat", None)
+    if citeste_reproiectat is not None:
+        # Scor virtual: calculat doar pe pixelii tile-ului (motor_analiza.SCOR_VIRTUAL)
+        data = citeste_reproiectat("EPSG:3857", transform_tile, TILE_SIZE, TILE_SIZE, NODATA_VRT)
+    else:
+        data = _citeste_tile(src, left, bottom, right, top, transform_tile)
+
+    if not (data != NODATA_VRT).any():
+        return TILE_GOL
+
+    # Datele sunt int16; valorile încap oricum în int8
+    rgba = LUT_TURBO[data.astype(np.int8).view(np.uint8)]
+    return _png(rgba)
+
+def tile_png(z, x, y):
+    """Returnează bytes PNG pentru tile-ul (z, x, y), din cache dacă există."""
+    if z < 0 or not (0 <= x < 2 ** z) or not (0 <= y < 2 ** z):
+        raise ValueError("Tile în afara grilei")
+
+    eticheta = _verifica_versiune()
+    cheie = (eticheta, z, x, y)
+
+    png = _cache.get(cheie)
+    if png is not None:
+        return png
+
+    cale_disc = None
+    if DIR_TILES:
+        cale_disc = os.path.join(DIR_TILES, eticheta, str(z), str(x), f"{y}.png")
+        if os.path.exists(cale_disc):
+            with open(cale_disc, "rb") as f:
+                png = f.read()
+            _cache.put(cheie, png)
+            return png
+
+    with motor_analiza.dataset_scor() as src:
+        png = _randeaza(src, z, x, y)
+    _cache.put(cheie, png)
+
+    if cale_disc:
+        os.makedirs(os.path.dirname(cale_disc), exist_ok=True)
+        tmp = f"{cale_disc}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(png)
+        os.replace(tmp, cale_disc)
+
+    return png
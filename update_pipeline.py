@@ -59,20 +59,37 @@ PIPELINE = [
 
     # --- ETAPA 4: ASAMBLARE FINALĂ (ROOT) ---
     # "." înseamnă folderul curent
+    # "rescrie_raster": pasul rescrie fișiere citite de server (cubul master, scorul și fișierele
+    # însoțitoare); serverul le eliberează înainte de primul astfel de pas (joburi_update.py)
     {
         "folder": ".",
         "script": "harta_mare.py",
-        "desc": "8. [Master] Unificare Straturi (Data Cube BigTIFF)"
+        "desc": "8. [Master] Unificare Straturi (Data Cube BigTIFF)",
+        "rescrie_raster": True
     },
     {
         "folder": ".",
         "script": "construibilitate.py",
-        "desc": "9. [Master] Calcul Mască Construibil (Banda 6)"
+        "desc": "9. [Master] Calcul Mască Construibil (Banda 6)",
+        "rescrie_raster": True
     },
     {
         "folder": ".",
         "script": "scor_final.py",
-        "desc": "10. [Final] Calcul SCOR TACTIC (0-45 puncte)"
+        "desc": "10. [Final] Calcul SCOR TACTIC (0-45 puncte)",
+        "rescrie_raster": True
+    },
+    {
+        "folder": ".",
+        "script": "index_varfuri.py",
+        "desc": "11. [Final] Index vârfuri de scor (semințe pentru zone mari)",
+        "rescrie_raster": True
+    },
+    {
+        "folder": ".",
+        "script": "piramida_scor.py",
+        "desc": "12. [Final] Piramidă max/sumă (căutare branch-and-bound)",
+        "rescrie_raster": True
     }
 ]
 
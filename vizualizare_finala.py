@@ -18,8 +18,8 @@ def visualize_buildable():
     print(f"--- Pregătesc vizualizarea pentru '{INPUT_FILE}' ---")
 
     with rasterio.open(INPUT_FILE) as src:
-        # 1. Identificăm ultima bandă (cea de construibil)
-        buildable_band_idx = src.count
+        # 1. Banda de construibil (6; după ea urmează banda de adâncime a pădurii)
+        buildable_band_idx = 6
         band_description = src.descriptions[buildable_band_idx-1]
         print(f"Citesc Banda {buildable_band_idx}: {band_description}")
 
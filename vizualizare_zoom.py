@@ -31,8 +31,9 @@ def microscop_harta():
         # 2. Citim Banda 1 (Distanța Drumuri) - ca să vedem unde e drumul
         drumuri_dist = src.read(1, window=window)
         
-        # 3. Citim Ultima Bandă (Masca Construibil) - ca să vedem restricția
-        idx_construibil = src.count
+        # 3. Citim Banda 6 (Masca Construibil) - ca să vedem restricția
+        # (după ea urmează banda de adâncime a pădurii)
+        idx_construibil = 6
         masca_construibil = src.read(idx_construibil, window=window)
 
     # --- VIZUALIZARE COMPARATIVĂ ---